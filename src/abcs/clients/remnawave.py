@@ -37,3 +37,12 @@ class ABCRemnawaveClient(ABC):
 
     @abstractmethod
     async def revoke_subscription(self, client_id: UUID, revoke_only_passwords: bool = False) -> None: ...
+
+    @abstractmethod
+    async def bulk_extend_expiration(self, client_ids: list[UUID], days: int) -> None: ...
+
+    @abstractmethod
+    async def bulk_delete_users(self, client_ids: list[UUID]) -> None: ...
+
+    @abstractmethod
+    async def bulk_revoke_subscription(self, client_ids: list[UUID]) -> None: ...
@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from uuid import UUID
+
+from dtos.rw_schema import RwUserItemSchema
+from enums import ClientStatus
+
+
+class ABCUserListener(ABC):
+    """
+    Получатель изменений пользователей для индексов в памяти: страниц синхронизации зеркала
+    и результатов изменяющих запросов. Вызывается синхронно, обработчики не должны ждать IO
+    """
+
+    @abstractmethod
+    def on_users(self, users: list[RwUserItemSchema]) -> None:
+        """Актуальные записи пользователей: страница синхронизации или созданный пользователь"""
+
+    @abstractmethod
+    def on_updated(
+        self,
+        client_ids: list[UUID],
+        status: ClientStatus | None = None,
+        extend_days: int | None = None,
+    ) -> None:
+        """Успешные смена статуса или продление"""
+
+    @abstractmethod
+    def on_deleted(self, client_ids: list[UUID]) -> None: ...
+
+    @abstractmethod
+    def on_synced(self, seen: set[UUID]) -> None:
+        """Полный проход закончен, пользователей не из seen больше нет"""
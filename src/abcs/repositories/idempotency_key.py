@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any
+
+from dtos.idempotency_key import IdempotencyKeyDTO
+
+
+class ABCIdempotencyKeyRepository(ABC):
+    @abstractmethod
+    async def get(self, key: str, now: datetime) -> IdempotencyKeyDTO | None: ...
+
+    @abstractmethod
+    async def claim(
+        self,
+        key: str,
+        fingerprint: str,
+        now: datetime,
+        expires_at: datetime,
+        stale_before: datetime,
+    ) -> bool: ...
+
+    @abstractmethod
+    async def extend(self, key: str, now: datetime) -> None: ...
+
+    @abstractmethod
+    async def complete(self, key: str, response: Any) -> None: ...
+
+    @abstractmethod
+    async def release(self, key: str) -> None: ...
+
+    @abstractmethod
+    async def delete_expired(self, now: datetime) -> int: ...
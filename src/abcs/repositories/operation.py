@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import Any
 from uuid import UUID
 
@@ -9,5 +10,16 @@ class ABCOperationRepository(ABC):
     @abstractmethod
     async def get_operations(self, client_id: UUID, limit: int, page: int) -> list[OperationDTO]: ...
 
+    @abstractmethod
+    async def get_operations_after(
+        self,
+        client_id: UUID,
+        limit: int,
+        cursor: tuple[datetime, UUID] | None = None,
+    ) -> list[OperationDTO]: ...
+
     @abstractmethod
     async def create_operation(self, operation_data: dict[str, Any]) -> OperationDTO: ...
+
+    @abstractmethod
+    async def create_operations(self, operations_data: list[dict[str, Any]]) -> list[OperationDTO]: ...
@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager
+from datetime import datetime
+from uuid import UUID
+
+from dtos.rw_schema import RwUserItemSchema
+from dtos.sync_state import SyncStateDTO
+from enums import ClientStatus
+
+
+class ABCUserRepository(ABC):
+    @abstractmethod
+    async def get_users(
+        self,
+        now: datetime,
+        status: ClientStatus | None,
+        expired: bool | None,
+        limit: int,
+        page: int,
+    ) -> list[RwUserItemSchema]: ...
+
+    @abstractmethod
+    def iter_users(
+        self,
+        page_size: int = 1000,
+        synced_after: datetime | None = None,
+    ) -> AsyncIterator[list[RwUserItemSchema]]: ...
+
+    @abstractmethod
+    async def search_users(self, query: str, limit: int) -> list[RwUserItemSchema]: ...
+
+    @abstractmethod
+    async def upsert_users(self, users: list[RwUserItemSchema], synced_at: datetime) -> None: ...
+
+    @abstractmethod
+    async def update_users(
+        self,
+        client_ids: list[UUID],
+        requested_at: datetime,
+        updated_at: datetime,
+        status: ClientStatus | None = None,
+        extend_days: int | None = None,
+    ) -> None: ...
+
+    @abstractmethod
+    async def delete_users(self, client_ids: list[UUID]) -> None: ...
+
+    @abstractmethod
+    async def get_existing_users(self, client_ids: list[UUID]) -> set[UUID]: ...
+
+    @abstractmethod
+    async def get_missing_users(self, seen: set[UUID], synced_before: datetime) -> set[UUID]: ...
+
+    @abstractmethod
+    async def get_sync_state(self, name: str = "users") -> SyncStateDTO | None: ...
+
+    @abstractmethod
+    async def save_sync_state(
+        self,
+        watermark: datetime | None,
+        synced_at: datetime,
+        rows: int,
+        name: str = "users",
+    ) -> None: ...
+
+    @abstractmethod
+    def sync_lock(self, name: str = "users") -> AbstractAsyncContextManager[bool]: ...
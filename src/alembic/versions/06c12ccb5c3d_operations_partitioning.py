@@ -0,0 +1,103 @@
+"""operations partitioning
+
+Revision ID: 06c12ccb5c3d
+Revises: d2d77f567a61
+Create Date: 2026-10-18 14:05:52.907114
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "06c12ccb5c3d"
+down_revision: str | Sequence[str] | None = "d2d77f567a61"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# сколько месяцев вперед создать партиции, дальше их ведет commands.operation_partitions
+PARTITIONS_AHEAD = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE operations RENAME TO operations_unpartitioned")
+    op.execute(
+        "ALTER TABLE operations_unpartitioned RENAME CONSTRAINT operations_pkey TO operations_unpartitioned_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_operations_client_id_created_at_id "
+        "RENAME TO ix_operations_unpartitioned_client_id_created_at_id"
+    )
+
+    op.execute(
+        """
+        CREATE TABLE operations (
+            id UUID NOT NULL,
+            client_id UUID NOT NULL,
+            path VARCHAR NOT NULL,
+            method method NOT NULL,
+            payload JSONB NOT NULL,
+            status_code INTEGER NOT NULL,
+            error TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT operations_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE INDEX ix_operations_client_id_created_at_id ON operations (client_id, created_at DESC, id DESC)")
+    op.execute("CREATE TABLE operations_default PARTITION OF operations DEFAULT")
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month date := date_trunc('month', coalesce(
+                (SELECT min(created_at) FROM operations_unpartitioned), now()
+            ) AT TIME ZONE 'UTC')::date;
+            last_month date := (
+                date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{PARTITIONS_AHEAD} months'
+            )::date;
+        BEGIN
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF operations FOR VALUES FROM (%L) TO (%L)',
+                    'operations_p' || to_char(month, 'YYYYMM'),
+                    month::timestamp AT TIME ZONE 'UTC',
+                    (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute("INSERT INTO operations SELECT * FROM operations_unpartitioned")
+    op.execute("DROP TABLE operations_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE operations RENAME TO operations_partitioned")
+    op.execute("ALTER TABLE operations_partitioned RENAME CONSTRAINT operations_pkey TO operations_partitioned_pkey")
+    op.execute(
+        "ALTER INDEX ix_operations_client_id_created_at_id RENAME TO ix_operations_partitioned_client_id_created_at_id"
+    )
+    op.execute(
+        """
+        CREATE TABLE operations (
+            id UUID NOT NULL,
+            client_id UUID NOT NULL,
+            path VARCHAR NOT NULL,
+            method method NOT NULL,
+            payload JSONB NOT NULL,
+            status_code INTEGER NOT NULL,
+            error TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT operations_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_operations_client_id_created_at_id ON operations (client_id, created_at DESC, id DESC)")
+    op.execute("INSERT INTO operations SELECT * FROM operations_partitioned")
+    op.execute("DROP TABLE operations_partitioned")
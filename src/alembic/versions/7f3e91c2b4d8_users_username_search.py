@@ -0,0 +1,45 @@
+"""users username search
+
+Revision ID: 7f3e91c2b4d8
+Revises: a3b585199063
+Create Date: 2026-10-18 18:02:11.734905
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7f3e91c2b4d8"
+down_revision: str | Sequence[str] | None = "a3b585199063"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_users_username_trgm",
+        "users",
+        ["username"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"username": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_users_username_lower_prefix",
+        "users",
+        [sa.text("lower(username) text_pattern_ops")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_username_lower_prefix", table_name="users")
+    op.drop_index("ix_users_username_trgm", table_name="users", postgresql_using="gin")
+    # расширение не удаляется: им могут пользоваться другие объекты БД
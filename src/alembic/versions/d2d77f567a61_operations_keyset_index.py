@@ -0,0 +1,37 @@
+"""operations keyset index
+
+Revision ID: d2d77f567a61
+Revises: 5cc82d1fca43
+Create Date: 2026-10-18 12:40:03.518327
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d2d77f567a61"
+down_revision: str | Sequence[str] | None = "5cc82d1fca43"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_operations_client_id_created_at_id",
+        "operations",
+        ["client_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+    # покрывается составным индексом
+    op.drop_index(op.f("ix_operations_client_id"), table_name="operations")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f("ix_operations_client_id"), "operations", ["client_id"], unique=False)
+    op.drop_index("ix_operations_client_id_created_at_id", table_name="operations")
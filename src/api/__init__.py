@@ -1,8 +1,12 @@
 from fastapi import APIRouter
 
 from .clients import router as clients_router
+from .health import router as health_router
+from .metrics import router as metrics_router
 from .operations import router as operations_router
 
 router = APIRouter()
 router.include_router(clients_router)
 router.include_router(operations_router)
+router.include_router(health_router)
+router.include_router(metrics_router)
@@ -1,14 +1,28 @@
-from datetime import UTC, datetime
-from typing import Annotated
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from typing import Annotated, Literal
 from uuid import UUID
 
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 from pydantic import Field, field_validator
 
-from api.dependencies import remnawave_client_dep
+from abcs.clients.remnawave import ABCRemnawaveClient
+from api.dependencies import (
+    client_bulk_dep,
+    client_stats_dep,
+    expiry_index_dep,
+    idempotent_dep,
+    remnawave_client_dep,
+    user_repo_dep,
+    user_sync_dep,
+)
+from config import settings
 from dtos.rw_schema import RwUserItemSchema
 from enums import ClientStatus
-from utils.exc import NotFoundError
+from services.client_export import iter_user_pages, to_csv, to_ndjson
+from utils.exc import NotFoundError, ServiceUnavailableError
 from utils.pydantic_utils import BaseSchemaModel
 
 
@@ -28,6 +42,20 @@ class ExtendRequestSchema(BaseSchemaModel):
     days: int = Field(..., ge=1, le=9999)
 
 
+class BulkClientsRequestSchema(BaseSchemaModel):
+    uuids: list[UUID] = Field(..., min_length=1, max_length=50_000)
+
+
+class BulkExtendRequestSchema(BulkClientsRequestSchema):
+    days: int = Field(..., ge=1, le=9999)
+
+
+class BulkItemResultSchema(BaseSchemaModel):
+    ok: bool
+    status_code: int | None = None
+    error: str | None = None
+
+
 class ClientSchema(BaseSchemaModel):
     uuid: UUID
     id: int
@@ -39,6 +67,21 @@ class ClientSchema(BaseSchemaModel):
     updated_at: datetime
 
 
+class ExpiringClientSchema(BaseSchemaModel):
+    uuid: UUID
+    expire_at: datetime
+
+
+class ClientStatsSchema(BaseSchemaModel):
+    total: int
+    by_status: dict[ClientStatus, int]
+    # окно ("1d", "7d", "30d") -> сколько клиентов истекает в нем
+    expiring: dict[str, int]
+    upstream_total: int | None
+    computed_at: datetime | None
+    reconciled_at: datetime | None
+
+
 class SubInfoUserSchema(BaseSchemaModel):
     short_uuid: str
     username: str
@@ -73,52 +116,182 @@ router = APIRouter(tags=["clients"], prefix="/clients")
 async def create_client(
     rw: remnawave_client_dep,
     body: CreateClientRequestSchema,
+    idempotent: idempotent_dep,
 ):
-    res = await rw.create_client(username=body.username, expire_at=body.expire_at)
-    client = res.response
-    return client
+    async def create() -> RwUserItemSchema:
+        res = await rw.create_client(username=body.username, expire_at=body.expire_at)
+        return res.response
+
+    return await idempotent(create, body)
+
+
+async def scan_clients(
+    rw: ABCRemnawaveClient,
+    now: datetime,
+    status: ClientStatus | None,
+    expired: bool | None,
+    offset: int,
+    limit: int,
+    concurrency: int = 1,
+    page_size: int = 1000,
+) -> list[RwUserItemSchema]:
+    # так как remnawave не поддерживает фильтры на эндпоинте, то один из вариантов сделать так:
+    # первая страница дает total, остальные запрашиваются параллельно и фильтруются по порядку
+    res = await rw.list_users(size=page_size, start=0)
+    if not res or not res.response or not res.response.users:
+        return []
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def fetch_page(start: int) -> list[RwUserItemSchema]:
+        async with semaphore:
+            page_res = await rw.list_users(size=page_size, start=start)
+        return page_res.response.users if page_res and page_res.response else []
+
+    tasks = [asyncio.create_task(fetch_page(start)) for start in range(page_size, res.response.total, page_size)]
+    filtered_clients = []
+    current_offset = 0
+    try:
+        batch = res.response.users
+        for next_page in [*tasks, None]:
+            for client in batch:
+                if filter_user(client, now, status, expired):
+                    if current_offset >= offset:
+                        filtered_clients.append(client)
+                        if len(filtered_clients) >= limit:
+                            return filtered_clients
+                    current_offset += 1
+            if next_page is None:
+                break
+            batch = await next_page
+    finally:
+        # страницы, которые уже не нужны, отменяются
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return filtered_clients
 
 
 @router.get("/", response_model=list[ClientSchema])
 async def list_clients(
     rw: remnawave_client_dep,
+    user_repository: user_repo_dep,
+    user_sync: user_sync_dep,
     status: Annotated[ClientStatus | None, Query()] = None,
     expired: Annotated[bool | None, Query()] = None,
-    page: Annotated[int, Query(qe=1)] = 1,
-    limit: Annotated[int, Query(qe=1, le=30)] = 30,
+    page: Annotated[int, Query(ge=1)] = 1,
+    limit: Annotated[int, Query(ge=1, le=30)] = 30,
 ):
     now = datetime.now(UTC)
+    if settings.USERS_MIRROR_ENABLED and user_sync and user_sync.ready:
+        return await user_repository.get_users(now, status, expired, limit=limit, page=page)
+
     offset = (page - 1) * limit
-    filtered_clients = []
+    return await scan_clients(
+        rw,
+        now,
+        status,
+        expired,
+        offset=offset,
+        limit=limit,
+        concurrency=settings.CLIENTS_SCAN_CONCURRENCY,
+    )
+
+
+@router.get("/search", response_model=list[ClientSchema])
+async def search_clients(
+    user_repository: user_repo_dep,
+    user_sync: user_sync_dep,
+    q: Annotated[str, Query(min_length=1, max_length=64)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+):
+    """Поиск по части username в зеркале пользователей, без запросов в RemnaWave"""
+    if not settings.USERS_MIRROR_ENABLED or not user_sync or not user_sync.ready:
+        raise ServiceUnavailableError("Users mirror is not ready")
+    return await user_repository.search_users(q, limit)
 
-    current_offset = 0
-    external_offset = 0
-    page_size = 1000
-    # так как remnawave не поддерживает фильтры на эндпоинте, то один из вариантов сделать так
-    while len(filtered_clients) < offset + limit:
-        res = await rw.list_users(size=page_size, start=external_offset)
 
-        if not res or not res.response or not res.response.users:
-            break
+EXPIRING_MAX_WITHIN = timedelta(days=366)
 
-        batch = res.response.users
-        total_external = res.response.total
-
-        for client in batch:
-            if filter_user(client, now, status, expired):
-                if current_offset >= offset:
-                    filtered_clients.append(client)
-                    if len(filtered_clients) >= offset + limit:
-                        break
-                current_offset += 1
-
-        external_offset += page_size
-
-        # if external_offset > 10000:  # Максимум 10 страниц
-        #     return filtered_clients
-        if external_offset > total_external:
-            return filtered_clients
-    return filtered_clients
+
+@router.get("/expiring", response_model=list[ExpiringClientSchema])
+async def list_expiring_clients(
+    expiry_index: expiry_index_dep,
+    user_sync: user_sync_dep,
+    within: Annotated[
+        timedelta,
+        Query(gt=timedelta(0), le=EXPIRING_MAX_WITHIN, description="Секунды или ISO 8601 duration, например P7D"),
+    ] = timedelta(days=1),
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+):
+    """Клиенты, истекающие в ближайшие within, по возрастанию expire_at. Из индекса планировщика истечений"""
+    if expiry_index is None or not user_sync or not user_sync.ready:
+        raise ServiceUnavailableError("Expiry index is not ready")
+    now = datetime.now(UTC)
+    events = expiry_index.between(now, now + within)[:limit]
+    return [ExpiringClientSchema(uuid=event.client_id, expire_at=event.expire_at) for event in events]
+
+
+@router.get("/stats", response_model=ClientStatsSchema)
+async def get_clients_stats(client_stats: client_stats_dep, user_sync: user_sync_dep):
+    """Число клиентов по статусам и истекающих за 1, 7, 30 дней из счетчиков, без обхода пользователей"""
+    if client_stats is None or not user_sync or not user_sync.ready:
+        raise ServiceUnavailableError("Client stats are not ready")
+    return client_stats.snapshot()
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.get("/export")
+async def export_clients(
+    rw: remnawave_client_dep,
+    status: Annotated[ClientStatus | None, Query()] = None,
+    expired: Annotated[bool | None, Query()] = None,
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+):
+    """Все клиенты потоком, построчно по мере получения страниц из RemnaWave"""
+    now = datetime.now(UTC)
+
+    async def rows() -> AsyncIterator[str]:
+        if export_format == "csv":
+            yield to_csv([], header=True)
+        async for users in iter_user_pages(rw, settings.CLIENTS_EXPORT_PAGE_SIZE):
+            users = [user for user in users if filter_user(user, now, status, expired)]
+            if users:
+                yield to_csv(users) if export_format == "csv" else to_ndjson(users)
+
+    return StreamingResponse(
+        rows(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="clients.{export_format}"'},
+    )
+
+
+# bulk роуты объявлены до /{client_id}/..., иначе "bulk" разбирался бы как client_id
+@router.post("/bulk/extend", response_model=dict[UUID, BulkItemResultSchema])
+async def bulk_extend_clients(bulk: client_bulk_dep, body: BulkExtendRequestSchema, idempotent: idempotent_dep):
+    return await idempotent(lambda: bulk.extend(body.uuids, body.days), body)
+
+
+@router.post("/bulk/block", response_model=dict[UUID, BulkItemResultSchema])
+async def bulk_block_clients(bulk: client_bulk_dep, body: BulkClientsRequestSchema, idempotent: idempotent_dep):
+    return await idempotent(lambda: bulk.block(body.uuids), body)
+
+
+@router.post("/bulk/unblock", response_model=dict[UUID, BulkItemResultSchema])
+async def bulk_unblock_clients(bulk: client_bulk_dep, body: BulkClientsRequestSchema, idempotent: idempotent_dep):
+    return await idempotent(lambda: bulk.unblock(body.uuids), body)
+
+
+@router.post("/bulk/delete", response_model=dict[UUID, BulkItemResultSchema])
+async def bulk_delete_clients(bulk: client_bulk_dep, body: BulkClientsRequestSchema, idempotent: idempotent_dep):
+    return await idempotent(lambda: bulk.delete(body.uuids), body)
+
+
+@router.post("/bulk/rotate", response_model=dict[UUID, BulkItemResultSchema])
+async def bulk_rotate_clients(bulk: client_bulk_dep, body: BulkClientsRequestSchema, idempotent: idempotent_dep):
+    return await idempotent(lambda: bulk.rotate(body.uuids), body)
 
 
 @router.get("/{client_id}", response_model=ClientSchema)
@@ -128,23 +301,28 @@ async def get_client(client_id: UUID, rw: remnawave_client_dep):
 
 
 @router.delete("/{client_id}", status_code=204)
-async def delete_client(client_id: UUID, rw: remnawave_client_dep):
-    await rw.delete_user(client_id)
+async def delete_client(client_id: UUID, rw: remnawave_client_dep, idempotent: idempotent_dep):
+    await idempotent(lambda: rw.delete_user(client_id))
 
 
 @router.post("/{client_id}/extend", status_code=204)
-async def extend_client(client_id: UUID, rw: remnawave_client_dep, body: ExtendRequestSchema):
-    await rw.extend_expiration(client_id, body.days)
+async def extend_client(
+    client_id: UUID,
+    rw: remnawave_client_dep,
+    body: ExtendRequestSchema,
+    idempotent: idempotent_dep,
+):
+    await idempotent(lambda: rw.extend_expiration(client_id, body.days), body)
 
 
 @router.post("/{client_id}/block", status_code=204)
-async def block_client(client_id: UUID, rw: remnawave_client_dep):
-    await rw.disable_user(client_id)
+async def block_client(client_id: UUID, rw: remnawave_client_dep, idempotent: idempotent_dep):
+    await idempotent(lambda: rw.disable_user(client_id))
 
 
 @router.post("/{client_id}/unblock", status_code=204)
-async def unblock_client(client_id: UUID, rw: remnawave_client_dep):
-    await rw.enable_user(client_id)
+async def unblock_client(client_id: UUID, rw: remnawave_client_dep, idempotent: idempotent_dep):
+    await idempotent(lambda: rw.enable_user(client_id))
 
 
 @router.get("/{client_id}/config", response_model=ConfigSchema)
@@ -157,5 +335,5 @@ async def get_client_config(client_id: UUID, rw: remnawave_client_dep):
 
 
 @router.post("/{client_id}/config/rotate", status_code=204)
-async def rotate_client_config(client_id: UUID, rw: remnawave_client_dep):
-    await rw.revoke_subscription(client_id)
+async def rotate_client_config(client_id: UUID, rw: remnawave_client_dep, idempotent: idempotent_dep):
+    await idempotent(lambda: rw.revoke_subscription(client_id))
@@ -1,10 +1,18 @@
-from typing import Annotated
+from collections.abc import Awaitable, Callable
+from typing import Annotated, Any
 
-from fastapi import Depends
+from fastapi import Depends, Header, Request, Response
 
 from abcs.clients.remnawave import ABCRemnawaveClient
 from abcs.repositories.operation import ABCOperationRepository
+from abcs.repositories.user import ABCUserRepository
+from services.client_bulk import ClientBulkService
+from services.client_stats import ClientStats
+from services.expiry_scheduler import ExpiryIndex
+from services.idempotency import IdempotencyService, request_fingerprint
+from services.user_sync import UserSync
 from utils.deps import get_dep
+from utils.request_context import idempotency_key_var
 
 
 def get_rw_client() -> ABCRemnawaveClient:
@@ -15,5 +23,67 @@ def get_operation_repository() -> ABCOperationRepository:
     return get_dep(ABCOperationRepository)
 
 
+def get_user_repository() -> ABCUserRepository:
+    return get_dep(ABCUserRepository)
+
+
+def get_client_bulk_service() -> ClientBulkService:
+    return get_dep(ClientBulkService)
+
+
+def get_user_sync() -> UserSync | None:
+    return get_dep(UserSync)
+
+
+def get_expiry_index() -> ExpiryIndex | None:
+    return get_dep(ExpiryIndex)
+
+
+def get_client_stats() -> ClientStats | None:
+    return get_dep(ClientStats)
+
+
+def get_idempotency_service() -> IdempotencyService:
+    return get_dep(IdempotencyService)
+
+
+class IdempotentCall:
+    """
+    Выполняет обработчик изменяющего запроса с учетом заголовка Idempotency-Key.
+    Без заголовка обработчик просто вызывается, повторный ответ помечается заголовком Idempotent-Replayed
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        service: Annotated[IdempotencyService, Depends(get_idempotency_service)],
+        key: Annotated[str | None, Header(alias="Idempotency-Key", min_length=1, max_length=255)] = None,
+    ):
+        self.request = request
+        self.response = response
+        self.service = service
+        self.key = key
+
+    async def __call__(self, func: Callable[[], Awaitable[Any]], body: Any = None) -> Any:
+        if self.key is None:
+            return await func()
+        fingerprint = request_fingerprint(self.request.method, self.request.url.path, body)
+        token = idempotency_key_var.set(self.key)
+        try:
+            result, replayed = await self.service.run(self.key, fingerprint, func)
+        finally:
+            idempotency_key_var.reset(token)
+        if replayed:
+            self.response.headers["Idempotent-Replayed"] = "true"
+        return result
+
+
 operation_repo_dep = Annotated[ABCOperationRepository, Depends(get_operation_repository)]
 remnawave_client_dep = Annotated[ABCRemnawaveClient, Depends(get_rw_client)]
+user_repo_dep = Annotated[ABCUserRepository, Depends(get_user_repository)]
+client_bulk_dep = Annotated[ClientBulkService, Depends(get_client_bulk_service)]
+user_sync_dep = Annotated[UserSync | None, Depends(get_user_sync)]
+expiry_index_dep = Annotated[ExpiryIndex | None, Depends(get_expiry_index)]
+client_stats_dep = Annotated[ClientStats | None, Depends(get_client_stats)]
+idempotent_dep = Annotated[IdempotentCall, Depends()]
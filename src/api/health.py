@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+
+from clients.remnawave import circuit_breakers, rate_limiters
+from enums import CircuitState
+from utils.http import all_pool_stats
+
+router = APIRouter(tags=["health"], prefix="/health")
+
+
+@router.get("/")
+async def health():
+    breakers = {
+        name: {
+            "state": breaker.state,
+            "error_rate": breaker.error_rate,
+            **vars(breaker.stats),
+        }
+        for name, breaker in circuit_breakers.items()
+    }
+    # 200 и при деградации: недоступность RemnaWave не повод перезапускать приложение
+    degraded = any(breaker.state != CircuitState.CLOSED for breaker in circuit_breakers.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "circuit_breakers": breakers,
+        "rate_limiters": {name: vars(limiter.stats) for name, limiter in rate_limiters.items()},
+        "http_pools": all_pool_stats(),
+    }
@@ -0,0 +1,113 @@
+from collections.abc import Iterator
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from clients.cached_remnawave import CachedRemnawaveClient
+from clients.remnawave import circuit_breakers, rate_limiters, retry_budget, rw_request
+from enums import CircuitState
+from services.expiry_scheduler import ExpiryScheduler
+from services.user_sync import UserSync
+from utils.deps import get_dep
+from utils.http import all_pool_stats
+from utils.metrics import CallbackMetric, Sample, registry
+from utils.operation_writer import OperationWriter
+
+CIRCUIT_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+def _http_pool() -> Iterator[Sample]:
+    for pool, stats in all_pool_stats().items():
+        for state, value in stats.items():
+            yield {"pool": pool, "state": state}, value
+
+
+def _rate_limiters_in_flight() -> Iterator[Sample]:
+    for name, limiter in rate_limiters.items():
+        yield {"group": name}, limiter.stats.in_flight
+
+
+def _rate_limiters_throttled() -> Iterator[Sample]:
+    for name, limiter in rate_limiters.items():
+        yield {"group": name}, limiter.stats.throttled
+
+
+def _circuit_breakers() -> Iterator[Sample]:
+    for name, breaker in circuit_breakers.items():
+        yield {"group": name}, CIRCUIT_STATE_VALUES[breaker.state]
+
+
+def _operation_writer() -> Iterator[Sample]:
+    writer: OperationWriter | None = get_dep(OperationWriter)
+    if writer:
+        yield {"stat": "queue_size"}, writer.queue_size
+        for stat, value in vars(writer.stats).items():
+            yield {"stat": stat}, value
+
+
+def _cache() -> Iterator[Sample]:
+    rw = get_dep(ABCRemnawaveClient)
+    if isinstance(rw, CachedRemnawaveClient):
+        for cache_name, cache in (("users", rw.users), ("subscriptions", rw.subscriptions)):
+            yield {"cache": cache_name, "stat": "size"}, len(cache)
+            for stat, value in vars(cache.stats).items():
+                yield {"cache": cache_name, "stat": stat}, value
+
+
+def _user_sync() -> Iterator[Sample]:
+    user_sync: UserSync | None = get_dep(UserSync)
+    if user_sync:
+        if user_sync.lag is not None:
+            yield {"stat": "lag_seconds"}, user_sync.lag
+        for stat, value in vars(user_sync.stats).items():
+            yield {"stat": stat}, value
+
+
+def _expiry_scheduler() -> Iterator[Sample]:
+    scheduler: ExpiryScheduler | None = get_dep(ExpiryScheduler)
+    if scheduler:
+        yield {"stat": "indexed"}, len(scheduler.index)
+        for stat, value in vars(scheduler.stats).items():
+            yield {"stat": stat}, value
+
+
+for metric in (
+    CallbackMetric("http_pool_connections", "httpx connection pool usage", _http_pool),
+    CallbackMetric("remnawave_rate_limit_in_flight", "Requests holding a rate limiter slot", _rate_limiters_in_flight),
+    CallbackMetric(
+        "remnawave_rate_limit_throttled_total",
+        "Requests that waited for a rate limiter slot",
+        _rate_limiters_throttled,
+        type_="counter",
+    ),
+    CallbackMetric(
+        "remnawave_circuit_state",
+        "Circuit breaker state: 0 closed, 1 half-open, 2 open",
+        _circuit_breakers,
+    ),
+    CallbackMetric(
+        "remnawave_retry_budget_exhausted_total",
+        "Retries refused by the retry budget",
+        lambda: [({}, retry_budget.exhausted)],
+        type_="counter",
+    ),
+    CallbackMetric(
+        "remnawave_coalesced_requests_total",
+        "GET requests served by an identical in-flight request",
+        lambda: [({}, rw_request.coalesced)],
+        type_="counter",
+    ),
+    CallbackMetric("operation_writer", "Audit writer queue and counters", _operation_writer),
+    CallbackMetric("remnawave_cache", "Cached RemnaWave client stats", _cache),
+    CallbackMetric("users_sync", "Users mirror sync: lag, duration, rows per second", _user_sync),
+    CallbackMetric("expiry_scheduler", "Expiry index size and scheduler counters", _expiry_scheduler),
+):
+    registry.register(metric)
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
@@ -1,11 +1,12 @@
 from datetime import datetime
-from typing import Annotated, Any
+from typing import Annotated, Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Response
 
 from api.dependencies import operation_repo_dep
 from enums import Method
+from utils.pagination import decode_cursor, encode_cursor
 from utils.pydantic_utils import BaseSchemaModel
 
 
@@ -18,6 +19,7 @@ class OperationSchema(BaseSchemaModel):
     status_code: int
     error: str | None
     created_at: datetime
+    idempotency_key: str | None
 
 
 router = APIRouter(tags=["operations"], prefix="/operations")
@@ -26,8 +28,24 @@ router = APIRouter(tags=["operations"], prefix="/operations")
 @router.get("/", response_model=list[OperationSchema])
 async def get_operations(
     operation_repository: operation_repo_dep,
+    response: Response,
     client_id: Annotated[UUID, Query()],
     limit: Annotated[int, Query(ge=1, le=100)] = 30,
     page: Annotated[int, Query(ge=1)] = 1,
+    paging: Annotated[Literal["offset", "cursor"], Query()] = "offset",
+    cursor: Annotated[str | None, Query()] = None,
 ):
-    return await operation_repository.get_operations(client_id, limit=limit, page=page)
+    """
+    paging=offset - старый режим limit/page.
+    paging=cursor (или передан cursor) - keyset пагинация, курсор следующей страницы в заголовке X-Next-Cursor
+    """
+    if paging == "offset" and cursor is None:
+        return await operation_repository.get_operations(client_id, limit=limit, page=page)
+
+    after = decode_cursor(cursor) if cursor else None
+    operations = await operation_repository.get_operations_after(client_id, limit=limit + 1, cursor=after)
+    if len(operations) > limit:
+        operations = operations[:limit]
+        last = operations[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return operations
@@ -0,0 +1,218 @@
+"""Нагрузочный прогон всех роутов /clients и /operations запущенного приложения
+
+python -m benchmarks.load [--url http://localhost:8000] [--concurrency 1,10,50] [--requests 200]
+    [--routes get_client,list_clients] [--output load.json] [--compare baseline.json]
+
+Приложение должно смотреть в benchmarks.mock_remnawave (или в тестовую панель): роуты создают, продлевают,
+блокируют и удаляют клиентов. Результаты пишутся в JSON вместе с коммитом, --compare печатает разницу
+с прошлым прогоном.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import subprocess
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+type Call = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Result:
+    route: str
+    concurrency: int
+    requests: int
+    errors: int
+    rps: float
+    p50: float
+    p95: float
+    p99: float
+
+
+class Fixtures:
+    """Клиенты, на которых гоняются роуты. Удаляемые создаются заранее, создание в замер не входит"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.client_ids: list[str] = []
+        self.disposable: list[str] = []
+
+    async def create_client(self) -> str:
+        expire_at = (datetime.now(UTC) + timedelta(days=30)).isoformat()
+        res = await self.client.post("/clients/", json={"username": f"load_{uuid4().hex[:12]}", "expireAt": expire_at})
+        res.raise_for_status()
+        return res.json()["uuid"]
+
+    async def prepare(self, clients: int, disposable: int) -> None:
+        self.client_ids = list(await asyncio.gather(*(self.create_client() for _ in range(clients))))
+        self.disposable = list(await asyncio.gather(*(self.create_client() for _ in range(disposable))))
+
+    def pick(self, i: int) -> str:
+        return self.client_ids[i % len(self.client_ids)]
+
+
+def make_routes(fixtures: Fixtures) -> dict[str, Callable[[int], Call]]:
+    """Имя роута -> фабрика запроса по номеру итерации"""
+
+    def bulk_uuids(i: int) -> list[str]:
+        return [fixtures.pick(i + j) for j in range(10)]
+
+    return {
+        "list_clients": lambda i: lambda c: c.get("/clients/", params={"page": i % 10 + 1, "limit": 30}),
+        "export_clients": lambda i: lambda c: c.get("/clients/export", params={"format": "ndjson"}),
+        "create_client": lambda i: lambda c: c.post(
+            "/clients/",
+            json={
+                "username": f"load_{uuid4().hex[:12]}",
+                "expireAt": (datetime.now(UTC) + timedelta(days=30)).isoformat(),
+            },
+        ),
+        "get_client": lambda i: lambda c: c.get(f"/clients/{fixtures.pick(i)}"),
+        "get_client_config": lambda i: lambda c: c.get(f"/clients/{fixtures.pick(i)}/config"),
+        "extend_client": lambda i: lambda c: c.post(f"/clients/{fixtures.pick(i)}/extend", json={"days": 1}),
+        "block_client": lambda i: lambda c: c.post(f"/clients/{fixtures.pick(i)}/block"),
+        "unblock_client": lambda i: lambda c: c.post(f"/clients/{fixtures.pick(i)}/unblock"),
+        "rotate_client_config": lambda i: lambda c: c.post(f"/clients/{fixtures.pick(i)}/config/rotate"),
+        "bulk_extend": lambda i: lambda c: c.post("/clients/bulk/extend", json={"uuids": bulk_uuids(i), "days": 1}),
+        "bulk_block": lambda i: lambda c: c.post("/clients/bulk/block", json={"uuids": bulk_uuids(i)}),
+        "bulk_unblock": lambda i: lambda c: c.post("/clients/bulk/unblock", json={"uuids": bulk_uuids(i)}),
+        "bulk_rotate": lambda i: lambda c: c.post("/clients/bulk/rotate", json={"uuids": bulk_uuids(i)}),
+        "get_operations": lambda i: lambda c: c.get("/operations/", params={"client_id": fixtures.pick(i)}),
+        "get_operations_cursor": lambda i: lambda c: c.get(
+            "/operations/", params={"client_id": fixtures.pick(i), "paging": "cursor"}
+        ),
+        # удаляет заранее созданных клиентов, по одному на запрос
+        "delete_client": lambda i: lambda c: c.delete(f"/clients/{fixtures.disposable.pop()}"),
+    }
+
+
+def percentile(quantiles: list[float], p: int) -> float:
+    return quantiles[p - 1] * 1000 if quantiles else 0.0
+
+
+async def run(client: httpx.AsyncClient, route: str, make_call: Callable[[int], Call], concurrency: int, requests: int):
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            call = make_call(i)
+            started = time.perf_counter()
+            try:
+                res = await call(client)
+                if res.is_error:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    result = Result(
+        route=route,
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        rps=len(latencies) / elapsed,
+        p50=percentile(quantiles, 50),
+        p95=percentile(quantiles, 95),
+        p99=percentile(quantiles, 99),
+    )
+    logger.info(
+        "%-22s c=%-4s rps = %8.1f  p50 = %7.2f ms  p95 = %7.2f ms  p99 = %7.2f ms  errors = %s",
+        route,
+        concurrency,
+        result.rps,
+        result.p50,
+        result.p95,
+        result.p99,
+        errors,
+    )
+    return result
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[Result], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    previous = {(item["route"], item["concurrency"]): item for item in baseline["results"]}
+    logger.info("Compared with %s (commit %s)", baseline_path, baseline.get("commit"))
+    for result in results:
+        old = previous.get((result.route, result.concurrency))
+        if not old or not old["rps"] or not old["p95"]:
+            continue
+        logger.info(
+            "%-22s c=%-4s rps %+7.1f%%  p95 %+7.1f%%",
+            result.route,
+            result.concurrency,
+            (result.rps / old["rps"] - 1) * 100,
+            (result.p95 / old["p95"] - 1) * 100,
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", default="1,10,50", help="уровни конкурентности через запятую")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на роут и уровень конкурентности")
+    parser.add_argument("--routes", default=None, help="роуты через запятую, по умолчанию все")
+    parser.add_argument("--clients", type=int, default=100, help="сколько клиентов создать под нагрузку")
+    parser.add_argument("--output", type=Path, default=Path("load.json"))
+    parser.add_argument("--compare", type=Path, default=None, help="JSON прошлого прогона")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    started_at = datetime.now(UTC)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        fixtures = Fixtures(client)
+        routes = make_routes(fixtures)
+        selected = args.routes.split(",") if args.routes else list(routes)
+        disposable = args.requests * len(levels) if "delete_client" in selected else 0
+        await fixtures.prepare(args.clients, disposable)
+
+        results = [
+            await run(client, route, routes[route], concurrency, args.requests)
+            for route in selected
+            for concurrency in levels
+        ]
+
+    report: dict[str, Any] = {
+        "commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "url": args.url,
+        "requests": args.requests,
+        "results": [asdict(result) for result in results],
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    logger.info("Results written to %s", args.output)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+"""Локальная замена RemnaWave для нагрузочных тестов: эндпоинты, которые использует clients/remnawave.py,
+пользователи в памяти, искусственные задержка, 5xx и 429
+
+python -m benchmarks.mock_remnawave [--port 3000] [--users 100000] [--latency 0.02] [--jitter 0.01]
+    [--error-rate 0.0] [--throttle-rate 0.0]
+
+Приложение под нагрузкой запускается с REMNAWAVE_URL=http://localhost:3000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID, uuid4
+
+import uvicorn
+from fastapi import Body, FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Faults:
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+
+
+def make_user(i: int, username: str | None = None, expire_at: datetime | None = None) -> dict[str, Any]:
+    now = datetime.now(UTC)
+    return {
+        "uuid": str(uuid4()),
+        "id": i,
+        "shortUuid": uuid4().hex[:16],
+        "username": username or f"user_{i}",
+        "status": "ACTIVE" if i % 10 else "DISABLED",
+        "expireAt": (expire_at or now + timedelta(days=i % 60 - 10)).isoformat(),
+        "createdAt": now.isoformat(),
+        "updatedAt": now.isoformat(),
+    }
+
+
+def create_app(users: int, faults: Faults) -> FastAPI:
+    app = FastAPI()
+    store: dict[str, dict[str, Any]] = {}
+    for i in range(users):
+        user = make_user(i)
+        store[user["uuid"]] = user
+    next_id = users
+
+    def not_found() -> JSONResponse:
+        return JSONResponse(status_code=404, content={"message": "User not found"})
+
+    def touch(user: dict[str, Any], **changes: Any) -> None:
+        user.update(changes, updatedAt=datetime.now(UTC).isoformat())
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if faults.latency or faults.jitter:
+            await asyncio.sleep(faults.latency + random.uniform(0, faults.jitter))
+        roll = random.random()
+        if roll < faults.throttle_rate:
+            return JSONResponse(status_code=429, content={"message": "Too many requests"}, headers={"Retry-After": "1"})
+        if roll < faults.throttle_rate + faults.error_rate:
+            return JSONResponse(status_code=500, content={"message": "Internal server error"})
+        return await call_next(request)
+
+    @app.post("/api/users")
+    async def create_user(body: dict = Body()):
+        nonlocal next_id
+        user = make_user(next_id, body["username"], datetime.fromisoformat(body["expireAt"]))
+        next_id += 1
+        store[user["uuid"]] = user
+        return {"response": user}
+
+    @app.get("/api/users")
+    async def list_users(size: int = 500, start: int = 0):
+        # dict хранит порядок вставки, как и выдача RemnaWave по созданию
+        page = list(store.values())[start : start + size]
+        return {"response": {"users": page, "total": len(store)}}
+
+    @app.post("/api/users/bulk/extend-expiration-date")
+    async def bulk_extend(body: dict = Body()):
+        for uuid in body["uuids"]:
+            if user := store.get(uuid):
+                expire_at = datetime.fromisoformat(user["expireAt"]) + timedelta(days=body["extendDays"])
+                touch(user, expireAt=expire_at.isoformat())
+        return {"response": {"affectedRows": len(body["uuids"])}}
+
+    @app.post("/api/users/bulk/delete")
+    async def bulk_delete(body: dict = Body()):
+        for uuid in body["uuids"]:
+            store.pop(uuid, None)
+        return {"response": {"affectedRows": len(body["uuids"])}}
+
+    @app.post("/api/users/bulk/revoke-subscription")
+    async def bulk_revoke(body: dict = Body()):
+        for uuid in body["uuids"]:
+            if user := store.get(uuid):
+                touch(user, shortUuid=uuid4().hex[:16])
+        return {"response": {"affectedRows": len(body["uuids"])}}
+
+    @app.get("/api/users/{uuid}")
+    async def get_user(uuid: UUID):
+        user = store.get(str(uuid))
+        return {"response": user} if user else not_found()
+
+    @app.delete("/api/users/{uuid}")
+    async def delete_user(uuid: UUID):
+        if store.pop(str(uuid), None) is None:
+            return not_found()
+        return {"response": {"isDeleted": True}}
+
+    @app.post("/api/users/{uuid}/actions/{action}")
+    async def user_action(uuid: UUID, action: str):
+        user = store.get(str(uuid))
+        if user is None:
+            return not_found()
+        if action == "disable":
+            touch(user, status="DISABLED")
+        elif action == "enable":
+            touch(user, status="ACTIVE")
+        elif action == "revoke":
+            touch(user, shortUuid=uuid4().hex[:16])
+        else:
+            return not_found()
+        return {"response": user}
+
+    @app.get("/api/subscriptions/by-uuid/{uuid}")
+    async def get_subscription(uuid: UUID):
+        user = store.get(str(uuid))
+        if user is None:
+            return {"response": {"isFound": False, "subscriptionUrl": ""}}
+        return {
+            "response": {
+                "isFound": True,
+                "user": {
+                    "shortUuid": user["shortUuid"],
+                    "username": user["username"],
+                    "expiresAt": user["expireAt"],
+                    "isActive": user["status"] == "ACTIVE",
+                    "userStatus": user["status"],
+                    "trafficUsed": "0",
+                    "trafficLimit": "0",
+                },
+                "links": [f"vless://{user['shortUuid']}@example.com:443"],
+                "ssConfLinks": {},
+                "subscriptionUrl": f"https://example.com/sub/{user['shortUuid']}",
+            }
+        }
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--latency", type=float, default=0.02, help="базовая задержка ответа, секунды")
+    parser.add_argument("--jitter", type=float, default=0.01, help="случайная добавка к задержке, секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="доля ответов 429")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.throttle_rate)
+    logger.info("Mock RemnaWave: %s users, %s", args.users, faults)
+    uvicorn.run(create_app(args.users, faults), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
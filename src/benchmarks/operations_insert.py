@@ -0,0 +1,126 @@
+"""Сравнение записи аудита операций в Postgres (в духе pgbench): старый путь add+flush+refresh,
+create_operation одним INSERT и пачки create_operations
+
+python -m benchmarks.operations_insert [--rows 5000] [--concurrency 10] [--batch-size 500]
+
+Пишет в таблицу operations из DATABASE_URL и удаляет свои строки после замера.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config import settings
+from db.models.operation import OperationModel
+from dtos.operation import OperationDTO
+from enums import Method
+from repositories.operation import OperationRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LegacyOperationRepository(OperationRepository):
+    """Прежняя реализация: INSERT, затем SELECT на refresh"""
+
+    async def create_operation(self, operation_data: dict[str, Any]) -> OperationDTO:
+        operation = OperationModel(**operation_data)
+        async with self.session() as session:
+            session.add(operation)
+            await session.flush()
+            await session.refresh(operation)
+        return OperationDTO.model_validate(operation)
+
+
+def make_operation(client_id: UUID) -> dict[str, Any]:
+    return {
+        "client_id": client_id,
+        "path": f"/api/users/{client_id}/actions/disable",
+        "method": Method.POST,
+        "payload": {},
+        "status_code": 200,
+        "error": None,
+    }
+
+
+async def run(
+    name: str,
+    calls: int,
+    concurrency: int,
+    rows_per_call: int,
+    call: Callable[[], Awaitable[Any]],
+) -> None:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    logger.info(
+        "%-28s tps = %9.1f  rows/s = %9.1f  latency avg = %6.2f ms  p95 = %6.2f ms",
+        name,
+        calls / elapsed,
+        calls * rows_per_call / elapsed,
+        statistics.fmean(latencies) * 1000,
+        latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    engine = create_async_engine(settings.DATABASE_URL, pool_size=args.concurrency)
+    legacy = LegacyOperationRepository(engine)
+    repository = OperationRepository(engine)
+    client_id = uuid4()
+
+    try:
+        await run(
+            "add+flush+refresh",
+            args.rows,
+            args.concurrency,
+            1,
+            lambda: legacy.create_operation(make_operation(client_id)),
+        )
+        await run(
+            "create_operation",
+            args.rows,
+            args.concurrency,
+            1,
+            lambda: repository.create_operation(make_operation(client_id)),
+        )
+        await run(
+            f"create_operations x{args.batch_size}",
+            max(args.rows // args.batch_size, 1),
+            args.concurrency,
+            args.batch_size,
+            lambda: repository.create_operations([make_operation(client_id) for _ in range(args.batch_size)]),
+        )
+    finally:
+        async with engine.begin() as connection:
+            await connection.execute(delete(OperationModel).where(OperationModel.client_id == client_id))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
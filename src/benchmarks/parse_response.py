@@ -0,0 +1,108 @@
+"""Микробенчмарк разбора ответов RemnaWave: новый TypeAdapter на вызов против закэшированного
+
+python -m benchmarks.parse_response [--users 1000] [--seconds 1]
+"""
+
+import argparse
+import json
+import logging
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from typing import Any
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+
+from dtos.rw_schema import (
+    CreateUserResponseSchema,
+    GetAllUsersResponseSchema,
+    GetSubscriptionInfoResponseSchema,
+    GetUserResponseSchema,
+)
+from utils.pydantic_utils import get_type_adapter
+
+logger = logging.getLogger(__name__)
+
+
+def make_user(i: int) -> dict[str, Any]:
+    now = datetime.now(UTC)
+    return {
+        "uuid": str(uuid4()),
+        "id": i,
+        "shortUuid": uuid4().hex[:16],
+        "username": f"user_{i}",
+        "status": "ACTIVE",
+        "expireAt": (now + timedelta(days=30)).isoformat(),
+        "createdAt": now.isoformat(),
+        "updatedAt": now.isoformat(),
+    }
+
+
+def make_payloads(users: int) -> dict[Any, bytes]:
+    now = datetime.now(UTC)
+    payloads = {
+        GetAllUsersResponseSchema: json.dumps(
+            {"response": {"users": [make_user(i) for i in range(users)], "total": users}}
+        ),
+        GetUserResponseSchema: json.dumps({"response": make_user(1)}),
+        CreateUserResponseSchema: json.dumps({"response": make_user(1)}),
+        GetSubscriptionInfoResponseSchema: json.dumps(
+            {
+                "response": {
+                    "isFound": True,
+                    "user": {
+                        "shortUuid": uuid4().hex[:16],
+                        "username": "user_1",
+                        "expiresAt": (now + timedelta(days=30)).isoformat(),
+                        "isActive": True,
+                        "userStatus": "ACTIVE",
+                        "trafficUsed": "0",
+                        "trafficLimit": "0",
+                    },
+                    "links": [f"vless://link-{i}" for i in range(5)],
+                    "ssConfLinks": {},
+                    "subscriptionUrl": "https://remnawave.local/sub/abc",
+                }
+            }
+        ),
+    }
+    # _parse_response разбирает сырые байты ответа
+    return {schema: body.encode() for schema, body in payloads.items()}
+
+
+def validate_uncached(schema: Any, body: str | bytes) -> Any:
+    return TypeAdapter(schema).validate_json(body)
+
+
+def validate_cached(schema: Any, body: str | bytes) -> Any:
+    return get_type_adapter(schema).validate_json(body)
+
+
+def throughput(func: Callable[[], Any], seconds: float) -> float:
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000, help="пользователей в ответе list_users")
+    parser.add_argument("--seconds", type=float, default=1.0, help="время замера на каждый вариант")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger.info("%-36s %14s %14s %8s", "schema", "new adapter/s", "cached/s", "speedup")
+    for schema, body in make_payloads(args.users).items():
+        before = throughput(partial(validate_uncached, schema, body), args.seconds)
+        after = throughput(partial(validate_cached, schema, body), args.seconds)
+        logger.info("%-36s %14.1f %14.1f %7.2fx", schema.__name__, before, after, after / before)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from dtos.rw_schema import (
+    CreateUserResponseSchema,
+    GetAllUsersResponseSchema,
+    GetSubscriptionInfoResponseSchema,
+    GetUserResponseSchema,
+)
+from enums import ClientStatus
+from utils.cache import MISSING, TTLCache
+from utils.exc import CircuitOpenError
+from utils.single_flight import SingleFlight
+
+
+class CachedRemnawaveClient(ABCRemnawaveClient):
+    """
+    Read-through кэш поверх клиента RemnaWave для пользователя и конфигурации подписки.
+    Одновременные промахи по одному uuid объединяются в один запрос. Успешные смена статуса и продление
+    применяются к закэшированному пользователю, остальные изменения и любые ошибки сбрасывают записи.
+    Пока circuit breaker разомкнут, отдаются устаревшие записи, если они есть
+    """
+
+    def __init__(
+        self,
+        rw: ABCRemnawaveClient,
+        max_size: int,
+        user_ttl: float,
+        subscription_ttl: float,
+    ):
+        self.rw = rw
+        self.users: TTLCache[UUID, GetUserResponseSchema] = TTLCache(max_size, user_ttl)
+        self.subscriptions: TTLCache[UUID, GetSubscriptionInfoResponseSchema] = TTLCache(max_size, subscription_ttl)
+        self._users_flight: SingleFlight[GetUserResponseSchema] = SingleFlight()
+        self._subscriptions_flight: SingleFlight[GetSubscriptionInfoResponseSchema] = SingleFlight()
+
+    def invalidate(self, client_id: UUID) -> None:
+        self.users.delete(client_id)
+        self.subscriptions.delete(client_id)
+        self._users_flight.forget(client_id)
+        self._subscriptions_flight.forget(client_id)
+
+    def apply(
+        self,
+        client_id: UUID,
+        requested_at: datetime,
+        status: ClientStatus | None = None,
+        extend_days: int | None = None,
+    ) -> None:
+        """
+        Применяет к закэшированному пользователю результат успешного изменяющего запроса, отправленного в requested_at.
+        Меняется только свежая запись и срок ее жизни не продлевается: устаревшая запись могла разойтись с RemnaWave.
+        Продление не применяется к записи, прочитанной из RemnaWave уже после изменения (updated_at не раньше
+        requested_at), иначе дни добавятся дважды
+        """
+        cached = self.users.peek(client_id)
+        self.invalidate(client_id)
+        if cached is None:
+            return
+        expires_at, res = cached
+        user = res.response
+        update: dict = {"updated_at": max(user.updated_at, datetime.now(UTC))}
+        if status is not None:
+            update["status"] = status
+        if extend_days and user.updated_at < requested_at:
+            update["expire_at"] = user.expire_at + timedelta(days=extend_days)
+        self.users.set(client_id, GetUserResponseSchema(response=user.model_copy(update=update)), expires_at)
+
+    async def create_client(self, username: str, expire_at: datetime) -> CreateUserResponseSchema:
+        res = await self.rw.create_client(username, expire_at)
+        self.users.set(res.response.uuid, GetUserResponseSchema(response=res.response))
+        return res
+
+    async def list_users(self, size: int = 500, start: int = 0) -> GetAllUsersResponseSchema:
+        return await self.rw.list_users(size=size, start=start)
+
+    async def get_user_by_uuid(self, client_id: UUID) -> GetUserResponseSchema:
+        res = self.users.get(client_id)
+        if res is not MISSING:
+            return res
+
+        async def load() -> GetUserResponseSchema:
+            try:
+                res = await self.rw.get_user_by_uuid(client_id)
+            except CircuitOpenError:
+                stale = self.users.get_stale(client_id)
+                if stale is MISSING:
+                    raise
+                return stale
+            # пока шел запрос пользователя могли изменить, тогда ответ уже устарел
+            if self._users_flight.is_current(client_id):
+                self.users.set(client_id, res)
+            return res
+
+        return await self._users_flight.do(client_id, load)
+
+    async def get_subscription_info_by_uuid(self, client_id: UUID) -> GetSubscriptionInfoResponseSchema:
+        res = self.subscriptions.get(client_id)
+        if res is not MISSING:
+            return res
+
+        async def load() -> GetSubscriptionInfoResponseSchema:
+            try:
+                res = await self.rw.get_subscription_info_by_uuid(client_id)
+            except CircuitOpenError:
+                stale = self.subscriptions.get_stale(client_id)
+                if stale is MISSING:
+                    raise
+                return stale
+            if self._subscriptions_flight.is_current(client_id):
+                self.subscriptions.set(client_id, res)
+            return res
+
+        return await self._subscriptions_flight.do(client_id, load)
+
+    async def delete_user(self, client_id: UUID) -> None:
+        try:
+            await self.rw.delete_user(client_id)
+        finally:
+            self.invalidate(client_id)
+
+    async def extend_expiration(self, client_id: UUID, days: int) -> None:
+        requested_at = datetime.now(UTC)
+        try:
+            await self.rw.extend_expiration(client_id, days)
+        except BaseException:
+            self.invalidate(client_id)
+            raise
+        self.apply(client_id, requested_at, extend_days=days)
+
+    async def disable_user(self, client_id: UUID) -> None:
+        requested_at = datetime.now(UTC)
+        try:
+            await self.rw.disable_user(client_id)
+        except BaseException:
+            self.invalidate(client_id)
+            raise
+        self.apply(client_id, requested_at, status=ClientStatus.DISABLED)
+
+    async def enable_user(self, client_id: UUID) -> None:
+        requested_at = datetime.now(UTC)
+        try:
+            await self.rw.enable_user(client_id)
+        except BaseException:
+            self.invalidate(client_id)
+            raise
+        self.apply(client_id, requested_at, status=ClientStatus.ACTIVE)
+
+    async def revoke_subscription(self, client_id: UUID, revoke_only_passwords: bool = False) -> None:
+        try:
+            await self.rw.revoke_subscription(client_id, revoke_only_passwords)
+        finally:
+            self.invalidate(client_id)
+
+    async def bulk_extend_expiration(self, client_ids: list[UUID], days: int) -> None:
+        requested_at = datetime.now(UTC)
+        try:
+            await self.rw.bulk_extend_expiration(client_ids, days)
+        except BaseException:
+            for client_id in client_ids:
+                self.invalidate(client_id)
+            raise
+        for client_id in client_ids:
+            self.apply(client_id, requested_at, extend_days=days)
+
+    async def bulk_delete_users(self, client_ids: list[UUID]) -> None:
+        try:
+            await self.rw.bulk_delete_users(client_ids)
+        finally:
+            for client_id in client_ids:
+                self.invalidate(client_id)
+
+    async def bulk_revoke_subscription(self, client_ids: list[UUID]) -> None:
+        try:
+            await self.rw.bulk_revoke_subscription(client_ids)
+        finally:
+            for client_id in client_ids:
+                self.invalidate(client_id)
@@ -5,6 +5,7 @@ from abcs.clients.remnawave import ABCRemnawaveClient
 from config import settings
 from dtos.rw_schema import (
     BulkExtendRequestSchema,
+    BulkUuidsRequestSchema,
     CreateUserResponseSchema,
     GetAllUsersResponseSchema,
     GetSubscriptionInfoResponseSchema,
@@ -12,11 +13,62 @@ from dtos.rw_schema import (
     RevokeUserSubscriptionBodySchema,
 )
 from enums import Method
+from utils.circuit_breaker import CircuitBreaker
+from utils.rate_limit import RateLimiter
 from utils.request import ApiRequest
+from utils.retry import ExponentialBackoffRetryPolicy, RetryBudget
+
+retry_budget = RetryBudget(rate=settings.RETRY_BUDGET_RATE, capacity=settings.RETRY_BUDGET_CAPACITY)
+# повторяются только чтения: изменяющие запросы не идемпотентны (повтор extend продлит дважды)
+read_retry_policy = ExponentialBackoffRetryPolicy(
+    max_retries=settings.RETRY_MAX_RETRIES,
+    base_delay=settings.RETRY_BASE_DELAY,
+    max_delay=settings.RETRY_MAX_DELAY,
+    budget=retry_budget,
+)
+
+
+def create_circuit_breakers() -> dict[str, CircuitBreaker]:
+    if not settings.CIRCUIT_BREAKER_ENABLED:
+        return {}
+    defaults = {
+        "failure_threshold": settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        "error_rate_threshold": settings.CIRCUIT_BREAKER_ERROR_RATE,
+        "window": settings.CIRCUIT_BREAKER_WINDOW,
+        "min_requests": settings.CIRCUIT_BREAKER_MIN_REQUESTS,
+        "recovery_timeout": settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+        "half_open_max_calls": settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS,
+    }
+    groups = dict.fromkeys(("read", "write")) | dict.fromkeys(settings.CIRCUIT_BREAKER_GROUPS)
+    return {
+        group: CircuitBreaker(group, **(defaults | settings.CIRCUIT_BREAKER_GROUPS.get(group, {})))  # pyrefly: ignore
+        for group in groups
+    }
+
+
+circuit_breakers = create_circuit_breakers()
+
+rate_limiters = {
+    "read": RateLimiter(
+        "read",
+        rate=settings.RATE_LIMIT_READ_RPS,
+        burst=settings.RATE_LIMIT_READ_BURST,
+        max_in_flight=settings.MAX_IN_FLIGHT_READ,
+    ),
+    "write": RateLimiter(
+        "write",
+        rate=settings.RATE_LIMIT_WRITE_RPS,
+        burst=settings.RATE_LIMIT_WRITE_BURST,
+        max_in_flight=settings.MAX_IN_FLIGHT_WRITE,
+    ),
+}
 
 rw_request = ApiRequest(
     base_url=settings.REMNAWAVE_URL,
     headers={"Authorization": f"Bearer {settings.REMNAWAVE_API_KEY.get_secret_value()}"},
+    single_flight=settings.REMNAWAVE_SINGLE_FLIGHT,
+    circuit_breakers=circuit_breakers,
+    rate_limiters=rate_limiters,
 )
 
 
@@ -39,25 +91,29 @@ class RemnawaveClient(ABCRemnawaveClient):
             "/api/users",
             GetAllUsersResponseSchema,
             params={"size": size, "start": start},
+            retry_policy=read_retry_policy,
             client=self.client,
         )
 
     async def get_user_by_uuid(self, client_id: UUID) -> GetUserResponseSchema:
         return await rw_request(
             Method.GET,
-            f"/api/users/{client_id}",
+            "/api/users/{client_id}",
             GetUserResponseSchema,
+            retry_policy=read_retry_policy,
+            path_params={"client_id": client_id},
             client=self.client,
         )
 
     async def delete_user(self, client_id: UUID) -> None:
         await rw_request(
             Method.DELETE,
-            f"/api/users/{client_id}",
+            "/api/users/{client_id}",
             None,
             log_request=True,
             client_id=client_id,
             has_response=False,
+            path_params={"client_id": client_id},
             client=self.client,
         )
 
@@ -77,30 +133,34 @@ class RemnawaveClient(ABCRemnawaveClient):
     async def disable_user(self, client_id: UUID) -> None:
         await rw_request(
             Method.POST,
-            f"/api/users/{client_id}/actions/disable",
+            "/api/users/{client_id}/actions/disable",
             None,
             log_request=True,
             client_id=client_id,
             has_response=False,
+            path_params={"client_id": client_id},
             client=self.client,
         )
 
     async def enable_user(self, client_id: UUID) -> None:
         await rw_request(
             Method.POST,
-            f"/api/users/{client_id}/actions/enable",
+            "/api/users/{client_id}/actions/enable",
             None,
             has_response=False,
             log_request=True,
             client_id=client_id,
+            path_params={"client_id": client_id},
             client=self.client,
         )
 
     async def get_subscription_info_by_uuid(self, client_id: UUID) -> GetSubscriptionInfoResponseSchema:
         return await rw_request(
             Method.GET,
-            f"/api/subscriptions/by-uuid/{client_id}",
+            "/api/subscriptions/by-uuid/{client_id}",
             GetSubscriptionInfoResponseSchema,
+            retry_policy=read_retry_policy,
+            path_params={"client_id": client_id},
             client=self.client,
         )
 
@@ -108,11 +168,51 @@ class RemnawaveClient(ABCRemnawaveClient):
         body = RevokeUserSubscriptionBodySchema(revoke_only_passwords=revoke_only_passwords)
         await rw_request(
             Method.POST,
-            f"/api/users/{client_id}/actions/revoke",
+            "/api/users/{client_id}/actions/revoke",
             None,
             log_request=True,
             client_id=client_id,
             has_response=False,
             json=body.model_dump(by_alias=True),
+            path_params={"client_id": client_id},
+            client=self.client,
+        )
+
+    async def bulk_extend_expiration(self, client_ids: list[UUID], days: int) -> None:
+        body = BulkExtendRequestSchema(uuids=[str(client_id) for client_id in client_ids], extend_days=days)
+        await rw_request(
+            Method.POST,
+            "/api/users/bulk/extend-expiration-date",
+            None,
+            has_response=False,
+            log_request=True,
+            client_id=client_ids,
+            json=body.model_dump(by_alias=True),
+            client=self.client,
+        )
+
+    async def bulk_delete_users(self, client_ids: list[UUID]) -> None:
+        body = BulkUuidsRequestSchema(uuids=[str(client_id) for client_id in client_ids])
+        await rw_request(
+            Method.POST,
+            "/api/users/bulk/delete",
+            None,
+            has_response=False,
+            log_request=True,
+            client_id=client_ids,
+            json=body.model_dump(by_alias=True),
+            client=self.client,
+        )
+
+    async def bulk_revoke_subscription(self, client_ids: list[UUID]) -> None:
+        body = BulkUuidsRequestSchema(uuids=[str(client_id) for client_id in client_ids])
+        await rw_request(
+            Method.POST,
+            "/api/users/bulk/revoke-subscription",
+            None,
+            has_response=False,
+            log_request=True,
+            client_id=client_ids,
+            json=body.model_dump(by_alias=True),
             client=self.client,
         )
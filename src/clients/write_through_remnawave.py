@@ -0,0 +1,116 @@
+import logging
+from datetime import UTC, datetime
+from uuid import UUID
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from abcs.listeners.user import ABCUserListener
+from abcs.repositories.user import ABCUserRepository
+from dtos.rw_schema import (
+    CreateUserResponseSchema,
+    GetAllUsersResponseSchema,
+    GetSubscriptionInfoResponseSchema,
+    GetUserResponseSchema,
+)
+from enums import ClientStatus
+
+logger = logging.getLogger(__name__)
+
+
+class WriteThroughRemnawaveClient(ABCRemnawaveClient):
+    """
+    Переносит результат успешных изменяющих запросов в зеркало пользователей и в listeners,
+    не дожидаясь синхронизации. Ошибка записи в зеркало не роняет запрос: RemnaWave уже изменен,
+    зеркало поправит следующая синхронизация
+    """
+
+    def __init__(
+        self,
+        rw: ABCRemnawaveClient,
+        user_repository: ABCUserRepository,
+        listeners: list[ABCUserListener] | None = None,
+    ):
+        self.rw = rw
+        self.user_repository = user_repository
+        self.listeners = listeners or []
+
+    async def _update_users(
+        self,
+        client_ids: list[UUID],
+        requested_at: datetime,
+        status: ClientStatus | None = None,
+        extend_days: int | None = None,
+    ) -> None:
+        for listener in self.listeners:
+            listener.on_updated(client_ids, status=status, extend_days=extend_days)
+        try:
+            await self.user_repository.update_users(
+                client_ids,
+                requested_at,
+                datetime.now(UTC),
+                status=status,
+                extend_days=extend_days,
+            )
+        except Exception:
+            logger.exception("Failed to update users mirror")
+
+    async def _delete_users(self, client_ids: list[UUID]) -> None:
+        for listener in self.listeners:
+            listener.on_deleted(client_ids)
+        try:
+            await self.user_repository.delete_users(client_ids)
+        except Exception:
+            logger.exception("Failed to delete users from mirror")
+
+    async def create_client(self, username: str, expire_at: datetime) -> CreateUserResponseSchema:
+        res = await self.rw.create_client(username, expire_at)
+        for listener in self.listeners:
+            listener.on_users([res.response])
+        try:
+            await self.user_repository.upsert_users([res.response], datetime.now(UTC))
+        except Exception:
+            logger.exception("Failed to add user to mirror")
+        return res
+
+    async def list_users(self, size: int = 500, start: int = 0) -> GetAllUsersResponseSchema:
+        return await self.rw.list_users(size=size, start=start)
+
+    async def get_user_by_uuid(self, client_id: UUID) -> GetUserResponseSchema:
+        return await self.rw.get_user_by_uuid(client_id)
+
+    async def get_subscription_info_by_uuid(self, client_id: UUID) -> GetSubscriptionInfoResponseSchema:
+        return await self.rw.get_subscription_info_by_uuid(client_id)
+
+    async def delete_user(self, client_id: UUID) -> None:
+        await self.rw.delete_user(client_id)
+        await self._delete_users([client_id])
+
+    async def extend_expiration(self, client_id: UUID, days: int) -> None:
+        requested_at = datetime.now(UTC)
+        await self.rw.extend_expiration(client_id, days)
+        await self._update_users([client_id], requested_at, extend_days=days)
+
+    async def disable_user(self, client_id: UUID) -> None:
+        requested_at = datetime.now(UTC)
+        await self.rw.disable_user(client_id)
+        await self._update_users([client_id], requested_at, status=ClientStatus.DISABLED)
+
+    async def enable_user(self, client_id: UUID) -> None:
+        requested_at = datetime.now(UTC)
+        await self.rw.enable_user(client_id)
+        await self._update_users([client_id], requested_at, status=ClientStatus.ACTIVE)
+
+    async def revoke_subscription(self, client_id: UUID, revoke_only_passwords: bool = False) -> None:
+        # меняет только данные подписки, которых в зеркале нет
+        await self.rw.revoke_subscription(client_id, revoke_only_passwords)
+
+    async def bulk_extend_expiration(self, client_ids: list[UUID], days: int) -> None:
+        requested_at = datetime.now(UTC)
+        await self.rw.bulk_extend_expiration(client_ids, days)
+        await self._update_users(client_ids, requested_at, extend_days=days)
+
+    async def bulk_delete_users(self, client_ids: list[UUID]) -> None:
+        await self.rw.bulk_delete_users(client_ids)
+        await self._delete_users(client_ids)
+
+    async def bulk_revoke_subscription(self, client_ids: list[UUID]) -> None:
+        await self.rw.bulk_revoke_subscription(client_ids)
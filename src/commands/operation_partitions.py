@@ -0,0 +1,83 @@
+"""Обслуживание партиций operations: создание будущих и удаление (или архивация) старых
+
+python -m commands.operation_partitions rollover [--ahead 3]
+python -m commands.operation_partitions retention [--keep 12] [--archive]
+
+Запускать по крону, например раз в сутки. rollover идемпотентен и также выполняется на старте приложения.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import UTC, datetime
+
+from config import settings
+from db.db_helper import db_engine
+from repositories.operation_partition import OperationPartitionRepository, add_months, month_start
+
+logger = logging.getLogger(__name__)
+
+
+async def rollover(repository: OperationPartitionRepository, ahead: int) -> list[str]:
+    """Партиции с текущего месяца на ahead месяцев вперед"""
+    partitions = await repository.get_partitions()
+    current = month_start(datetime.now(UTC).date())
+    created = []
+    for i in range(ahead + 1):
+        month = add_months(current, i)
+        if month in partitions:
+            continue
+        # сбой одного месяца не мешает создать остальные, следующий rollover повторит его
+        try:
+            name = await repository.create_partition(month)
+        except Exception:
+            logger.exception("Failed to create operations partition for %s", f"{month:%Y-%m}")
+            continue
+        if name is not None:
+            created.append(name)
+    if created:
+        logger.info("Created operations partitions: %s", ", ".join(created))
+    return created
+
+
+async def retention(repository: OperationPartitionRepository, keep: int, archive: bool) -> list[str]:
+    """Удаляет партиции старше keep месяцев, при archive только отсоединяет их как отдельные таблицы"""
+    partitions = await repository.get_partitions()
+    oldest_kept = add_months(month_start(datetime.now(UTC).date()), -keep)
+    removed = []
+    for month, name in sorted(partitions.items()):
+        if month >= oldest_kept:
+            break
+        if archive:
+            await repository.detach_partition(name)
+        else:
+            await repository.drop_partition(name)
+        removed.append(name)
+    if removed:
+        logger.info("%s operations partitions: %s", "Archived" if archive else "Dropped", ", ".join(removed))
+    return removed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rollover_parser = subparsers.add_parser("rollover")
+    rollover_parser.add_argument("--ahead", type=int, default=settings.OPERATIONS_PARTITIONS_AHEAD)
+    retention_parser = subparsers.add_parser("retention")
+    retention_parser.add_argument("--keep", type=int, default=settings.OPERATIONS_RETENTION_MONTHS)
+    retention_parser.add_argument("--archive", action="store_true", help="DETACH вместо DROP")
+    args = parser.parse_args()
+
+    settings.configure_logging()
+    repository = OperationPartitionRepository(db_engine)
+    try:
+        if args.command == "rollover":
+            await rollover(repository, args.ahead)
+        else:
+            await retention(repository, args.keep, args.archive)
+    finally:
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
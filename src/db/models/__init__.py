@@ -1,3 +1,6 @@
+from .idempotency_key import IdempotencyKeyModel
 from .operation import OperationModel
+from .sync_state import SyncStateModel
+from .user import UserModel
 
-__all__ = ("OperationModel",)
+__all__ = ("IdempotencyKeyModel", "OperationModel", "SyncStateModel", "UserModel")
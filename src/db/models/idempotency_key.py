@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class IdempotencyKeyModel(Base):
+    """Результаты изменяющих запросов по Idempotency-Key, пока не истек expires_at"""
+
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # хэш метода, пути и тела запроса: ключ нельзя переиспользовать для другого запроса
+    fingerprint: Mapped[str]
+    # False - запрос еще выполняется
+    completed: Mapped[bool] = mapped_column(default=False)
+    response: Mapped[Any | None] = mapped_column(JSONB)
+    # у незавершенного - время захвата, продлевается, пока запрос выполняется
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import DateTime, Text, func
+from sqlalchemy import DateTime, Index, String, Text, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -10,13 +10,28 @@ from enums import Method
 
 
 class OperationModel(Base):
+    """Партиционирована помесячно по created_at, партиции ведет OperationPartitionRepository"""
+
     __tablename__ = "operations"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
-    client_id: Mapped[UUID] = mapped_column(index=True)
+    client_id: Mapped[UUID]
     path: Mapped[str]
     method: Mapped[Method]
     payload: Mapped[dict] = mapped_column(JSONB, default=dict)
     status_code: Mapped[int]
     error: Mapped[str | None] = mapped_column(Text)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now())
+    # Idempotency-Key запроса, вызвавшего операцию
+    idempotency_key: Mapped[str | None] = mapped_column(String(255))
+    # ключ партиционирования обязан входить в первичный ключ
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, default=func.now())
+
+
+# под keyset пагинацию GET /operations: WHERE client_id = ? AND (created_at, id) < (?, ?)
+Index(
+    "ix_operations_client_id_created_at_id",
+    OperationModel.client_id,
+    OperationModel.created_at.desc(),
+    OperationModel.id.desc(),
+)
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class SyncStateModel(Base):
+    """Состояние фоновых задач (синхронизация зеркала, планировщик истечений), общее для всех реплик"""
+
+    __tablename__ = "sync_state"
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    # докуда задача обработала данные: для users - максимальный updated_at в зеркале
+    watermark: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    synced_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    rows: Mapped[int]
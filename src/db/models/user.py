@@ -0,0 +1,33 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import DateTime, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+from enums import ClientStatus
+
+
+class UserModel(Base):
+    """Локальное зеркало пользователей RemnaWave"""
+
+    __tablename__ = "users"
+
+    uuid: Mapped[UUID] = mapped_column(primary_key=True)
+    id: Mapped[int]
+    short_uuid: Mapped[str]
+    username: Mapped[str] = mapped_column(index=True)
+    status: Mapped[ClientStatus] = mapped_column(index=True)
+    expire_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    synced_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+# поиск GET /clients/search: подстрока через pg_trgm, короткий префикс через btree
+Index("ix_users_username_trgm", UserModel.username, postgresql_using="gin", postgresql_ops={"username": "gin_trgm_ops"})
+Index(
+    "ix_users_username_lower_prefix",
+    func.lower(UserModel.username).label("username_lower"),
+    postgresql_ops={"username_lower": "text_pattern_ops"},
+)
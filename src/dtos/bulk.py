@@ -0,0 +1,7 @@
+from utils.pydantic_utils import BaseModel
+
+
+class BulkItemResultDTO(BaseModel):
+    ok: bool
+    status_code: int | None = None
+    error: str | None = None
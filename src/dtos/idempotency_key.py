@@ -0,0 +1,13 @@
+from datetime import datetime
+from typing import Any
+
+from utils.pydantic_utils import BaseModel
+
+
+class IdempotencyKeyDTO(BaseModel):
+    key: str
+    fingerprint: str
+    completed: bool
+    response: Any | None
+    created_at: datetime
+    expires_at: datetime
@@ -15,3 +15,4 @@ class OperationDTO(BaseModel):
     status_code: int
     error: str | None
     created_at: datetime
+    idempotency_key: str | None = None
@@ -39,6 +39,10 @@ class BulkExtendRequestSchema(BaseSchemaModel):
     extend_days: int = Field(..., ge=1, le=9999)
 
 
+class BulkUuidsRequestSchema(BaseSchemaModel):
+    uuids: list[str] = Field(..., min_length=1, max_length=500)
+
+
 class SubInfoUserSchema(BaseSchemaModel):
     short_uuid: str
     username: str
@@ -0,0 +1,10 @@
+from datetime import datetime
+
+from utils.pydantic_utils import BaseModel
+
+
+class SyncStateDTO(BaseModel):
+    name: str
+    watermark: datetime | None
+    synced_at: datetime
+    rows: int
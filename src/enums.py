@@ -14,3 +14,9 @@ class ClientStatus(str, Enum):
     DISABLED = "DISABLED"
     LIMITED = "LIMITED"
     EXPIRED = "EXPIRED"
+
+
+class CircuitState(str, Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
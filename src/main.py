@@ -1,20 +1,47 @@
-from contextlib import asynccontextmanager
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
 
-import httpx
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
 from abcs.clients.remnawave import ABCRemnawaveClient
+from abcs.listeners.user import ABCUserListener
 from abcs.repositories.operation import ABCOperationRepository
+from abcs.repositories.user import ABCUserRepository
 from api import router as api_router
+from clients.cached_remnawave import CachedRemnawaveClient
 from clients.remnawave import RemnawaveClient
+from clients.write_through_remnawave import WriteThroughRemnawaveClient
+from commands.operation_partitions import rollover
 from config import settings
 from db.db_helper import db_engine
+from repositories.idempotency_key import IdempotencyKeyRepository
 from repositories.operation import OperationRepository
-from utils.deps import add_deps
-from utils.exc import NotFoundError, RequestError
+from repositories.operation_partition import OperationPartitionRepository
+from repositories.user import UserRepository
+from services.client_bulk import ClientBulkService
+from services.client_stats import ClientStats
+from services.expiry_scheduler import ExpiryHandler, ExpiryIndex, ExpiryScheduler, block_handler, webhook_handler
+from services.idempotency import IdempotencyService
+from services.user_sync import UserSync
+from utils.deps import add_dep, add_deps
+from utils.exc import (
+    BadRequestError,
+    CircuitOpenError,
+    ConflictError,
+    NotFoundError,
+    RequestError,
+    ServiceUnavailableError,
+    UnprocessableEntityError,
+)
+from utils.http import shared_http_client
+from utils.metrics import MetricsMiddleware
+from utils.operation_writer import OperationWriter
+from utils.tracing import SpanExporter, TracingMiddleware, set_exporter
 
 settings.configure_logging()
+logger = logging.getLogger(__name__)
 
 
 def exception_container(app: FastAPI) -> None:
@@ -22,27 +49,165 @@ def exception_container(app: FastAPI) -> None:
     async def request_error_handler(_request: Request, exc: RequestError) -> JSONResponse:
         return JSONResponse(
             status_code=exc.status_code,
-            content={"detail": str(exc), "body": exc.body if isinstance(exc.body, str) else None},
+            content={"detail": str(exc), "body": exc.body},
         )
 
     @app.exception_handler(NotFoundError)
     async def not_found_handler(_request: Request, exc: NotFoundError) -> JSONResponse:
         return JSONResponse(status_code=404, content={"detail": exc.message})
 
+    @app.exception_handler(CircuitOpenError)
+    async def circuit_open_handler(_request: Request, exc: CircuitOpenError) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(max(int(exc.retry_after), 1))},
+        )
+
+    @app.exception_handler(BadRequestError)
+    async def bad_request_handler(_request: Request, exc: BadRequestError) -> JSONResponse:
+        return JSONResponse(status_code=400, content={"detail": exc.message})
+
+    @app.exception_handler(ConflictError)
+    async def conflict_handler(_request: Request, exc: ConflictError) -> JSONResponse:
+        return JSONResponse(status_code=409, content={"detail": exc.message})
+
+    @app.exception_handler(UnprocessableEntityError)
+    async def unprocessable_entity_handler(_request: Request, exc: UnprocessableEntityError) -> JSONResponse:
+        return JSONResponse(status_code=422, content={"detail": exc.message})
+
+    @app.exception_handler(ServiceUnavailableError)
+    async def service_unavailable_handler(_request: Request, exc: ServiceUnavailableError) -> JSONResponse:
+        return JSONResponse(status_code=503, content={"detail": exc.message})
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with httpx.AsyncClient(verify=settings.REMNAWAVE_SSL_VERIFY) as client:
+    try:
+        await rollover(OperationPartitionRepository(db_engine), settings.OPERATIONS_PARTITIONS_AHEAD)
+    except Exception:
+        logger.exception("Failed to create operations partitions")
+
+    async with shared_http_client(settings.REMNAWAVE_SSL_VERIFY) as client:
+        span_exporter = None
+        if settings.TRACING_ENABLED and (settings.TRACING_EXPORT_PATH or settings.TRACING_OTLP_ENDPOINT):
+            span_exporter = SpanExporter(
+                settings.TRACING_EXPORT_PATH,
+                settings.TRACING_OTLP_ENDPOINT,
+                service_name=settings.TRACING_SERVICE_NAME,
+                interval=settings.TRACING_EXPORT_INTERVAL,
+            )
+            set_exporter(span_exporter)
+            span_exporter.start()
+
+        user_repository = UserRepository(db_engine)
+        listeners: list[ABCUserListener] = []
+        expiry_index = None
+        if settings.USERS_MIRROR_ENABLED and settings.EXPIRY_SCHEDULER_ENABLED:
+            expiry_index = ExpiryIndex(settings.EXPIRY_BUCKET_SECONDS)
+            listeners.append(expiry_index)
+        rw: ABCRemnawaveClient = RemnawaveClient(client)
+        client_stats = None
+        if settings.USERS_MIRROR_ENABLED:
+            client_stats = ClientStats(
+                rw,
+                expiry_index,
+                refresh_interval=settings.CLIENT_STATS_REFRESH_INTERVAL,
+                reconcile_interval=settings.CLIENT_STATS_RECONCILE_INTERVAL,
+            )
+            listeners.append(client_stats)
+            rw = WriteThroughRemnawaveClient(rw, user_repository, listeners)
+        if settings.CACHE_ENABLED:
+            rw = CachedRemnawaveClient(
+                rw,
+                max_size=settings.CACHE_MAX_SIZE,
+                user_ttl=settings.CACHE_USER_TTL,
+                subscription_ttl=settings.CACHE_SUBSCRIPTION_TTL,
+            )
+        operation_repository = OperationRepository(db_engine)
+        operation_writer = OperationWriter(
+            operation_repository,
+            max_queue_size=settings.OPERATIONS_WRITER_QUEUE_SIZE,
+            batch_size=settings.OPERATIONS_WRITER_BATCH_SIZE,
+            flush_interval=settings.OPERATIONS_WRITER_FLUSH_INTERVAL,
+            retries=settings.OPERATIONS_WRITER_RETRIES,
+            retry_delay=settings.OPERATIONS_WRITER_RETRY_DELAY,
+        )
+        operation_writer.start()
+        client_bulk_service = ClientBulkService(
+            rw,
+            chunk_size=settings.BULK_CHUNK_SIZE,
+            concurrency=settings.BULK_CONCURRENCY,
+        )
+        idempotency_service = IdempotencyService(
+            IdempotencyKeyRepository(db_engine),
+            ttl=settings.IDEMPOTENCY_TTL,
+            cache_size=settings.IDEMPOTENCY_CACHE_SIZE,
+            lock_timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT,
+        )
         deps = {
-            ABCRemnawaveClient: RemnawaveClient(client),
-            ABCOperationRepository: OperationRepository(db_engine),
+            ABCRemnawaveClient: rw,
+            ABCOperationRepository: operation_repository,
+            ABCUserRepository: user_repository,
+            OperationWriter: operation_writer,
+            ClientBulkService: client_bulk_service,
+            IdempotencyService: idempotency_service,
         }
         add_deps(deps)
+
+        tasks = [asyncio.create_task(idempotency_service.run_cleanup(settings.IDEMPOTENCY_CLEANUP_INTERVAL))]
+        if settings.USERS_MIRROR_ENABLED:
+            user_sync = UserSync(
+                rw,
+                user_repository,
+                interval=settings.USERS_SYNC_INTERVAL,
+                page_size=settings.USERS_SYNC_PAGE_SIZE,
+                full_every=settings.USERS_SYNC_FULL_EVERY,
+                listeners=listeners,
+            )
+            add_dep(UserSync, user_sync)
+            tasks.append(asyncio.create_task(user_sync.run()))
+
+            if client_stats is not None:
+                client_stats.user_sync = user_sync
+                add_dep(ClientStats, client_stats)
+                tasks.append(asyncio.create_task(client_stats.run()))
+
+            if expiry_index is not None:
+                handlers: list[ExpiryHandler] = []
+                if settings.EXPIRY_WEBHOOK_URL:
+                    handlers.append(webhook_handler(settings.EXPIRY_WEBHOOK_URL, client))
+                if settings.EXPIRY_BLOCK:
+                    handlers.append(block_handler(client_bulk_service))
+                expiry_scheduler = ExpiryScheduler(
+                    expiry_index,
+                    user_repository,
+                    handlers,
+                    interval=settings.EXPIRY_TICK_INTERVAL,
+                    batch_size=settings.EXPIRY_BATCH_SIZE,
+                    is_ready=lambda: user_sync.ready,
+                )
+                add_deps({ExpiryIndex: expiry_index, ExpiryScheduler: expiry_scheduler})
+                tasks.append(asyncio.create_task(expiry_scheduler.run()))
+
         yield
 
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        await operation_writer.close()
+        if span_exporter:
+            await span_exporter.close()
+            set_exporter(None)
+
 
 app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(MetricsMiddleware)
+# добавлен последним - внешний, request id есть уже при замере метрик и в логах всех слоев
+app.add_middleware(TracingMiddleware)
 app.include_router(api_router)
 
 exception_container(app)
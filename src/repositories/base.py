@@ -3,6 +3,8 @@ from typing import Literal
 
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
+from utils.tracing import start_span
+
 ISOLATION_LEVEL = Literal[
     "READ COMMITTED",
     "SERIALIZABLE",
@@ -29,5 +31,6 @@ class BaseRepository:
 
     @asynccontextmanager
     async def session(self):
-        async with self.async_session_maker().begin() as session:
-            yield session
+        with start_span("db.session", repository=type(self).__name__):
+            async with self.async_session_maker().begin() as session:
+                yield session
@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from abcs.repositories.idempotency_key import ABCIdempotencyKeyRepository
+from db.models.idempotency_key import IdempotencyKeyModel
+from dtos.idempotency_key import IdempotencyKeyDTO
+from repositories.base import BaseRepository
+from utils.metrics import db_query_duration, timed
+
+
+class IdempotencyKeyRepository(ABCIdempotencyKeyRepository, BaseRepository):
+    @timed(db_query_duration, "idempotency_key", "get")
+    async def get(self, key: str, now: datetime) -> IdempotencyKeyDTO | None:
+        stmt = select(IdempotencyKeyModel).where(IdempotencyKeyModel.key == key, IdempotencyKeyModel.expires_at > now)
+        async with self.session() as session:
+            record = await session.scalar(stmt)
+        return IdempotencyKeyDTO.model_validate(record) if record else None
+
+    @timed(db_query_duration, "idempotency_key", "claim")
+    async def claim(
+        self,
+        key: str,
+        fingerprint: str,
+        now: datetime,
+        expires_at: datetime,
+        stale_before: datetime,
+    ) -> bool:
+        """
+        Занимает ключ под выполняемый запрос. Истекшую запись и незавершенную, брошенную упавшей репликой
+        (created_at < stale_before), можно занять заново
+        """
+        values = {
+            "key": key,
+            "fingerprint": fingerprint,
+            "completed": False,
+            "response": None,
+            "created_at": now,
+            "expires_at": expires_at,
+        }
+        stmt = insert(IdempotencyKeyModel).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKeyModel.key],
+            set_=values,
+            where=or_(
+                IdempotencyKeyModel.expires_at <= now,
+                IdempotencyKeyModel.completed.is_(False) & (IdempotencyKeyModel.created_at < stale_before),
+            ),
+        ).returning(IdempotencyKeyModel.key)
+        async with self.session() as session:
+            claimed = await session.scalar(stmt)
+        return claimed is not None
+
+    @timed(db_query_duration, "idempotency_key", "extend")
+    async def extend(self, key: str, now: datetime) -> None:
+        """Продлевает захват незавершенного ключа, чтобы его не заняли как брошенный"""
+        stmt = (
+            update(IdempotencyKeyModel)
+            .where(IdempotencyKeyModel.key == key, IdempotencyKeyModel.completed.is_(False))
+            .values(created_at=now)
+        )
+        async with self.session() as session:
+            await session.execute(stmt)
+
+    @timed(db_query_duration, "idempotency_key", "complete")
+    async def complete(self, key: str, response: Any) -> None:
+        stmt = (
+            update(IdempotencyKeyModel).where(IdempotencyKeyModel.key == key).values(completed=True, response=response)
+        )
+        async with self.session() as session:
+            await session.execute(stmt)
+
+    @timed(db_query_duration, "idempotency_key", "release")
+    async def release(self, key: str) -> None:
+        stmt = delete(IdempotencyKeyModel).where(
+            IdempotencyKeyModel.key == key,
+            IdempotencyKeyModel.completed.is_(False),
+        )
+        async with self.session() as session:
+            await session.execute(stmt)
+
+    @timed(db_query_duration, "idempotency_key", "delete_expired")
+    async def delete_expired(self, now: datetime) -> int:
+        stmt = delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at <= now)
+        async with self.session() as session:
+            result = cast(CursorResult, await session.execute(stmt))
+        return result.rowcount
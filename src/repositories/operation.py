@@ -1,15 +1,18 @@
+from datetime import UTC, datetime
 from typing import Any
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import insert, literal, select, tuple_
 
 from abcs.repositories.operation import ABCOperationRepository
 from db.models.operation import OperationModel
 from dtos.operation import OperationDTO
 from repositories.base import BaseRepository
+from utils.metrics import db_query_duration, timed
 
 
 class OperationRepository(ABCOperationRepository, BaseRepository):
+    @timed(db_query_duration, "operation", "get_operations")
     async def get_operations(self, client_id: UUID, limit: int, page: int) -> list[OperationDTO]:
         offset = (page - 1) * limit
         stmt = (
@@ -24,10 +27,43 @@ class OperationRepository(ABCOperationRepository, BaseRepository):
         operations = result.scalars().all()
         return [OperationDTO.model_validate(operation) for operation in operations]
 
+    @timed(db_query_duration, "operation", "get_operations_after")
+    async def get_operations_after(
+        self,
+        client_id: UUID,
+        limit: int,
+        cursor: tuple[datetime, UUID] | None = None,
+    ) -> list[OperationDTO]:
+        stmt = select(OperationModel).where(OperationModel.client_id == client_id)
+        if cursor is not None:
+            stmt = stmt.where(tuple_(OperationModel.created_at, OperationModel.id) < tuple_(*map(literal, cursor)))
+        stmt = stmt.order_by(OperationModel.created_at.desc(), OperationModel.id.desc()).limit(limit)
+        async with self.session() as session:
+            result = await session.execute(stmt)
+        operations = result.scalars().all()
+        return [OperationDTO.model_validate(operation) for operation in operations]
+
+    @timed(db_query_duration, "operation", "create_operation")
     async def create_operation(self, operation_data: dict[str, Any]) -> OperationDTO:
-        operation = OperationModel(**operation_data)
+        operations = await self.create_operations([operation_data])
+        return operations[0]
+
+    @timed(db_query_duration, "operation", "create_operations")
+    async def create_operations(self, operations_data: list[dict[str, Any]]) -> list[OperationDTO]:
+        if not operations_data:
+            return []
+        # id и created_at генерируются на клиенте, поэтому хватает одного INSERT без RETURNING и refresh
+        values = [
+            {
+                "id": uuid4(),
+                "created_at": datetime.now(UTC),
+                "payload": {},
+                "error": None,
+                "idempotency_key": None,
+                **operation_data,
+            }
+            for operation_data in operations_data
+        ]
         async with self.session() as session:
-            session.add(operation)
-            await session.flush()
-            await session.refresh(operation)
-        return OperationDTO.model_validate(operation)
+            await session.execute(insert(OperationModel), values)
+        return [OperationDTO.model_validate(value) for value in values]
@@ -0,0 +1,100 @@
+import re
+from datetime import UTC, date, datetime
+from zlib import crc32
+
+from sqlalchemy import text
+
+from db.models.operation import OperationModel
+from repositories.base import BaseRepository
+
+PARTITION_NAME_RE = re.compile(rf"^{OperationModel.__tablename__}_p(\d{{4}})(\d{{2}})$")
+PARTITIONS_LOCK_KEY = crc32(f"partitions:{OperationModel.__tablename__}".encode())
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{OperationModel.__tablename__}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=UTC).isoformat()
+
+
+class OperationPartitionRepository(BaseRepository):
+    """Помесячные партиции таблицы operations"""
+
+    table = OperationModel.__tablename__
+    default_partition = f"{OperationModel.__tablename__}_default"
+
+    async def get_partitions(self) -> dict[date, str]:
+        stmt = text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :table
+            """
+        )
+        async with self.session() as session:
+            result = await session.execute(stmt, {"table": self.table})
+        partitions = {}
+        for name in result.scalars():
+            if match := PARTITION_NAME_RE.match(name):
+                partitions[date(int(match[1]), int(match[2]), 1)] = name
+        return partitions
+
+    async def create_partition(self, month: date) -> str | None:
+        """
+        Создает партицию на месяц, None если она уже есть. Rollover идет на каждой реплике,
+        поэтому создание сериализуется advisory lock на транзакцию, а наличие партиции проверяется уже под ним.
+        Строки этого месяца, успевшие попасть в default партицию, переносятся в новую до ATTACH,
+        иначе Postgres не даст ее присоединить. default блокируется до переноса, чтобы новая вставка
+        между переносом и ATTACH не сорвала ATTACH
+        """
+        name = partition_name(month)
+        lower, upper = _bound(month), _bound(add_months(month, 1))
+        async with self.session() as session:
+            await session.execute(text("SELECT pg_advisory_xact_lock(:key)").bindparams(key=PARTITIONS_LOCK_KEY))
+            attached = await session.scalar(
+                text(
+                    """
+                    SELECT 1
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    JOIN pg_class p ON p.oid = i.inhparent
+                    WHERE p.relname = :table AND c.relname = :name
+                    """
+                ).bindparams(table=self.table, name=name)
+            )
+            if attached:
+                return None
+            await session.execute(text(f"CREATE TABLE IF NOT EXISTS {name} (LIKE {self.table} INCLUDING DEFAULTS)"))
+            await session.execute(text(f"LOCK TABLE {self.default_partition} IN ACCESS EXCLUSIVE MODE"))
+            await session.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {self.default_partition} "
+                    f"WHERE created_at >= :lower AND created_at < :upper RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ).bindparams(lower=datetime.fromisoformat(lower), upper=datetime.fromisoformat(upper))
+            )
+            await session.execute(
+                text(f"ALTER TABLE {self.table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+            )
+        return name
+
+    async def detach_partition(self, name: str) -> None:
+        async with self.session() as session:
+            await session.execute(text(f"ALTER TABLE {self.table} DETACH PARTITION {name}"))
+
+    async def drop_partition(self, name: str) -> None:
+        async with self.session() as session:
+            await session.execute(text(f"DROP TABLE {name}"))
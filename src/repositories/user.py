@@ -0,0 +1,191 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from itertools import batched
+from typing import Any
+from uuid import UUID
+from zlib import crc32
+
+from sqlalchemy import case, delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from abcs.repositories.user import ABCUserRepository
+from db.models.sync_state import SyncStateModel
+from db.models.user import UserModel
+from dtos.rw_schema import RwUserItemSchema
+from dtos.sync_state import SyncStateDTO
+from enums import ClientStatus
+from repositories.base import BaseRepository
+from utils.metrics import db_query_duration, timed
+
+SYNC_STATE_NAME = "users"
+DELETE_BATCH_SIZE = 10_000
+# короче триграммы индекс pg_trgm не помогает, такие запросы ищутся только по префиксу
+TRIGRAM_MIN_LENGTH = 3
+
+_UPSERT_COLUMNS = ("id", "short_uuid", "username", "status", "expire_at", "created_at", "updated_at", "synced_at")
+
+
+class UserRepository(ABCUserRepository, BaseRepository):
+    @timed(db_query_duration, "user", "get_users")
+    async def get_users(
+        self,
+        now: datetime,
+        status: ClientStatus | None,
+        expired: bool | None,
+        limit: int,
+        page: int,
+    ) -> list[RwUserItemSchema]:
+        offset = (page - 1) * limit
+        stmt = select(UserModel)
+        if status is not None:
+            stmt = stmt.where(UserModel.status == status)
+        if expired is not None:
+            stmt = stmt.where(UserModel.expire_at < now if expired else UserModel.expire_at >= now)
+        stmt = stmt.order_by(UserModel.created_at.desc(), UserModel.uuid).limit(limit).offset(offset)
+        async with self.session() as session:
+            result = await session.execute(stmt)
+        users = result.scalars().all()
+        return [RwUserItemSchema.model_validate(user) for user in users]
+
+    async def iter_users(
+        self,
+        page_size: int = 1000,
+        synced_after: datetime | None = None,
+    ) -> AsyncIterator[list[RwUserItemSchema]]:
+        """Пользователи зеркала страницами по uuid, с synced_after - только записанные позже"""
+        last_uuid: UUID | None = None
+        while True:
+            stmt = select(UserModel).order_by(UserModel.uuid).limit(page_size)
+            if synced_after is not None:
+                stmt = stmt.where(UserModel.synced_at > synced_after)
+            if last_uuid is not None:
+                stmt = stmt.where(UserModel.uuid > last_uuid)
+            async with self.session() as session:
+                result = await session.execute(stmt)
+            users = result.scalars().all()
+            if not users:
+                return
+            yield [RwUserItemSchema.model_validate(user) for user in users]
+            last_uuid = users[-1].uuid
+
+    @timed(db_query_duration, "user", "search_users")
+    async def search_users(self, query: str, limit: int) -> list[RwUserItemSchema]:
+        """Поиск по части username: сначала точное совпадение, затем префикс, затем по похожести"""
+        query = query.lower()
+        pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        username = func.lower(UserModel.username)
+        is_prefix = username.like(f"{pattern}%", escape="\\")
+        stmt = select(UserModel)
+        if len(query) < TRIGRAM_MIN_LENGTH:
+            stmt = stmt.where(is_prefix)
+        else:
+            stmt = stmt.where(UserModel.username.ilike(f"%{pattern}%", escape="\\"))
+        stmt = stmt.order_by(
+            (username == query).desc(),
+            is_prefix.desc(),
+            func.similarity(UserModel.username, query).desc(),
+            UserModel.username,
+        ).limit(limit)
+        async with self.session() as session:
+            result = await session.execute(stmt)
+        return [RwUserItemSchema.model_validate(user) for user in result.scalars().all()]
+
+    @timed(db_query_duration, "user", "upsert_users")
+    async def upsert_users(self, users: list[RwUserItemSchema], synced_at: datetime) -> None:
+        if not users:
+            return
+        values = [{**user.model_dump(), "synced_at": synced_at} for user in users]
+        stmt = insert(UserModel).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserModel.uuid],
+            set_={column: stmt.excluded[column] for column in _UPSERT_COLUMNS},
+            # строку, записанную после начала прохода (см. update_users), страница синхронизации не затирает
+            where=UserModel.synced_at <= stmt.excluded.synced_at,
+        )
+        async with self.session() as session:
+            await session.execute(stmt)
+
+    @timed(db_query_duration, "user", "update_users")
+    async def update_users(
+        self,
+        client_ids: list[UUID],
+        requested_at: datetime,
+        updated_at: datetime,
+        status: ClientStatus | None = None,
+        extend_days: int | None = None,
+    ) -> None:
+        """
+        Применяет к зеркалу известный результат изменяющего запроса в RemnaWave, отправленного в requested_at.
+        Продление относительное, поэтому не применяется к строкам, которые синхронизация уже записала
+        с updated_at из RemnaWave не раньше requested_at: в них продление уже учтено
+        """
+        values: dict[str, Any] = {
+            "updated_at": func.greatest(UserModel.updated_at, updated_at),
+            "synced_at": updated_at,
+        }
+        if status is not None:
+            values["status"] = status
+        if extend_days:
+            values["expire_at"] = case(
+                (UserModel.updated_at < requested_at, UserModel.expire_at + timedelta(days=extend_days)),
+                else_=UserModel.expire_at,
+            )
+        stmt = update(UserModel).where(UserModel.uuid.in_(client_ids)).values(values)
+        async with self.session() as session:
+            await session.execute(stmt)
+
+    @timed(db_query_duration, "user", "delete_users")
+    async def delete_users(self, client_ids: list[UUID]) -> None:
+        async with self.session() as session:
+            for chunk in batched(client_ids, DELETE_BATCH_SIZE):
+                await session.execute(delete(UserModel).where(UserModel.uuid.in_(chunk)))
+
+    @timed(db_query_duration, "user", "get_existing_users")
+    async def get_existing_users(self, client_ids: list[UUID]) -> set[UUID]:
+        """Какие из client_ids есть в зеркале"""
+        if not client_ids:
+            return set()
+        async with self.session() as session:
+            result = await session.execute(select(UserModel.uuid).where(UserModel.uuid.in_(client_ids)))
+        return set(result.scalars())
+
+    @timed(db_query_duration, "user", "get_missing_users")
+    async def get_missing_users(self, seen: set[UUID], synced_before: datetime) -> set[UUID]:
+        """
+        Пользователи зеркала, которых не было в проходе по RemnaWave.
+        Записанные после начала прохода (synced_before), например только что созданные, не возвращаются
+        """
+        async with self.session() as session:
+            result = await session.execute(select(UserModel.uuid).where(UserModel.synced_at < synced_before))
+        return set(result.scalars()) - seen
+
+    async def get_sync_state(self, name: str = SYNC_STATE_NAME) -> SyncStateDTO | None:
+        async with self.session() as session:
+            state = await session.get(SyncStateModel, name)
+        return SyncStateDTO.model_validate(state) if state else None
+
+    async def save_sync_state(
+        self,
+        watermark: datetime | None,
+        synced_at: datetime,
+        rows: int,
+        name: str = SYNC_STATE_NAME,
+    ) -> None:
+        values = {"name": name, "watermark": watermark, "synced_at": synced_at, "rows": rows}
+        stmt = insert(SyncStateModel).values(values)
+        stmt = stmt.on_conflict_do_update(index_elements=[SyncStateModel.name], set_=values)
+        async with self.session() as session:
+            await session.execute(stmt)
+
+    @asynccontextmanager
+    async def sync_lock(self, name: str = SYNC_STATE_NAME) -> AsyncIterator[bool]:
+        """pg_advisory_lock на имя задачи: задачу выполняет одна реплика, остальные получают False"""
+        key = crc32(f"sync_state:{name}".encode())
+        async with self._db_engine.connect() as connection:
+            acquired = await connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+            try:
+                yield bool(acquired)
+            finally:
+                if acquired:
+                    await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from uuid import UUID
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from dtos.bulk import BulkItemResultDTO
+from utils.exc import RequestError
+
+logger = logging.getLogger(__name__)
+
+OK = BulkItemResultDTO(ok=True)
+
+
+def _error_result(exc: Exception) -> BulkItemResultDTO:
+    if isinstance(exc, RequestError):
+        return BulkItemResultDTO(ok=False, status_code=exc.status_code, error=exc.body or str(exc))
+    return BulkItemResultDTO(ok=False, error=repr(exc))
+
+
+class ClientBulkService:
+    """
+    Массовые операции над клиентами. Где у RemnaWave есть bulk эндпоинт, uuid режутся на пачки по chunk_size,
+    иначе выполняются одиночные запросы не больше concurrency одновременно
+    """
+
+    def __init__(self, rw: ABCRemnawaveClient, chunk_size: int = 500, concurrency: int = 10):
+        self.rw = rw
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+
+    async def extend(self, client_ids: list[UUID], days: int) -> dict[UUID, BulkItemResultDTO]:
+        return await self._chunked(client_ids, lambda chunk: self.rw.bulk_extend_expiration(chunk, days))
+
+    async def delete(self, client_ids: list[UUID]) -> dict[UUID, BulkItemResultDTO]:
+        return await self._chunked(client_ids, self.rw.bulk_delete_users)
+
+    async def rotate(self, client_ids: list[UUID]) -> dict[UUID, BulkItemResultDTO]:
+        return await self._chunked(client_ids, self.rw.bulk_revoke_subscription)
+
+    async def block(self, client_ids: list[UUID]) -> dict[UUID, BulkItemResultDTO]:
+        return await self._each(client_ids, self.rw.disable_user)
+
+    async def unblock(self, client_ids: list[UUID]) -> dict[UUID, BulkItemResultDTO]:
+        return await self._each(client_ids, self.rw.enable_user)
+
+    async def _chunked(
+        self,
+        client_ids: list[UUID],
+        func: Callable[[list[UUID]], Awaitable[None]],
+    ) -> dict[UUID, BulkItemResultDTO]:
+        client_ids = list(dict.fromkeys(client_ids))
+        chunks = [client_ids[i : i + self.chunk_size] for i in range(0, len(client_ids), self.chunk_size)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: dict[UUID, BulkItemResultDTO] = {}
+
+        async def run(chunk: list[UUID]) -> None:
+            async with semaphore:
+                try:
+                    await func(chunk)
+                except Exception as e:
+                    logger.warning("Bulk request for %s clients failed: %r", len(chunk), e)
+                    result = _error_result(e)
+                else:
+                    result = OK
+            results.update(dict.fromkeys(chunk, result))
+
+        await asyncio.gather(*(run(chunk) for chunk in chunks))
+        return {client_id: results[client_id] for client_id in client_ids}
+
+    async def _each(
+        self,
+        client_ids: list[UUID],
+        func: Callable[[UUID], Awaitable[None]],
+    ) -> dict[UUID, BulkItemResultDTO]:
+        client_ids = list(dict.fromkeys(client_ids))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: dict[UUID, BulkItemResultDTO] = {}
+
+        async def run(client_id: UUID) -> None:
+            async with semaphore:
+                try:
+                    await func(client_id)
+                except Exception as e:
+                    results[client_id] = _error_result(e)
+                else:
+                    results[client_id] = OK
+
+        await asyncio.gather(*(run(client_id) for client_id in client_ids))
+        return {client_id: results[client_id] for client_id in client_ids}
@@ -0,0 +1,53 @@
+import asyncio
+import csv
+import io
+from collections.abc import AsyncIterator, Iterable
+from contextlib import suppress
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from dtos.rw_schema import GetAllUsersResponseSchema, RwUserItemSchema
+
+CSV_COLUMNS = tuple(field.alias or name for name, field in RwUserItemSchema.model_fields.items())
+
+
+async def iter_user_pages(rw: ABCRemnawaveClient, page_size: int = 1000) -> AsyncIterator[list[RwUserItemSchema]]:
+    """
+    Страницы list_users по порядку. Следующая страница запрашивается, пока обрабатывается текущая,
+    в памяти не больше двух страниц
+    """
+    start = 0
+    next_page: asyncio.Task[GetAllUsersResponseSchema] | None = asyncio.create_task(
+        rw.list_users(size=page_size, start=start)
+    )
+    try:
+        while next_page is not None:
+            res = await next_page
+            next_page = None
+            users = res.response.users
+            if not users:
+                return
+            start += page_size
+            if start < res.response.total:
+                next_page = asyncio.create_task(rw.list_users(size=page_size, start=start))
+            yield users
+    finally:
+        # клиент отключился посреди выгрузки
+        if next_page is not None:
+            next_page.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await next_page
+
+
+def to_ndjson(users: Iterable[RwUserItemSchema]) -> str:
+    return "".join(f"{user.model_dump_json(by_alias=True)}\n" for user in users)
+
+
+def to_csv(users: Iterable[RwUserItemSchema], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for user in users:
+        row = user.model_dump(mode="json", by_alias=True)
+        writer.writerow(row[column] for column in CSV_COLUMNS)
+    return buffer.getvalue()
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from abcs.listeners.user import ABCUserListener
+from dtos.rw_schema import RwUserItemSchema
+from enums import ClientStatus
+from services.expiry_scheduler import ExpiryIndex
+from services.user_sync import UserSync
+
+logger = logging.getLogger(__name__)
+
+EXPIRING_WINDOWS = {"1d": timedelta(days=1), "7d": timedelta(days=7), "30d": timedelta(days=30)}
+
+
+@dataclass
+class ClientStatsSnapshot:
+    total: int = 0
+    by_status: dict[ClientStatus, int] = field(default_factory=dict)
+    expiring: dict[str, int] = field(default_factory=dict)
+    upstream_total: int | None = None
+    computed_at: datetime | None = None
+    reconciled_at: datetime | None = None
+
+
+class ClientStats(ABCUserListener):
+    """
+    Счетчики клиентов по статусу, обновляются синхронизацией зеркала и изменяющими запросами.
+    Число истекающих в окнах EXPIRING_WINDOWS пересчитывается по индексу истечений раз в refresh_interval,
+    раз в reconcile_interval total сверяется с RemnaWave, расхождение запускает внеочередную синхронизацию.
+    snapshot() не обходит пользователей
+    """
+
+    def __init__(
+        self,
+        rw: ABCRemnawaveClient,
+        expiry_index: ExpiryIndex | None = None,
+        refresh_interval: float = 30,
+        reconcile_interval: float = 300,
+    ):
+        self.rw = rw
+        self.expiry_index = expiry_index
+        self.refresh_interval = refresh_interval
+        self.reconcile_interval = reconcile_interval
+        self.user_sync: UserSync | None = None
+        self._status: dict[UUID, ClientStatus] = {}
+        self._counts: Counter[ClientStatus] = Counter()
+        self._expiring: dict[str, int] = {}
+        self._computed_at: datetime | None = None
+        self._upstream_total: int | None = None
+        self._reconciled_at: datetime | None = None
+
+    def _set_status(self, client_id: UUID, status: ClientStatus) -> None:
+        old = self._status.get(client_id)
+        if old == status:
+            return
+        if old is not None:
+            self._counts[old] -= 1
+        self._status[client_id] = status
+        self._counts[status] += 1
+
+    def _remove(self, client_id: UUID) -> None:
+        old = self._status.pop(client_id, None)
+        if old is not None:
+            self._counts[old] -= 1
+
+    def on_users(self, users: list[RwUserItemSchema]) -> None:
+        for user in users:
+            self._set_status(user.uuid, user.status)
+
+    def on_updated(
+        self,
+        client_ids: list[UUID],
+        status: ClientStatus | None = None,
+        extend_days: int | None = None,
+    ) -> None:
+        if status is None:
+            return
+        for client_id in client_ids:
+            if client_id in self._status:
+                self._set_status(client_id, status)
+
+    def on_deleted(self, client_ids: list[UUID]) -> None:
+        for client_id in client_ids:
+            self._remove(client_id)
+
+    def on_synced(self, seen: set[UUID]) -> None:
+        for client_id in self._status.keys() - seen:
+            self._remove(client_id)
+
+    def snapshot(self) -> ClientStatsSnapshot:
+        return ClientStatsSnapshot(
+            total=len(self._status),
+            by_status={status: self._counts[status] for status in ClientStatus},
+            expiring=self._expiring,
+            upstream_total=self._upstream_total,
+            computed_at=self._computed_at,
+            reconciled_at=self._reconciled_at,
+        )
+
+    def refresh(self) -> None:
+        if self.expiry_index is None:
+            return
+        now = datetime.now(UTC)
+        self._expiring = {
+            name: self.expiry_index.count_between(now, now + window) for name, window in EXPIRING_WINDOWS.items()
+        }
+        self._computed_at = now
+
+    async def reconcile(self) -> None:
+        res = await self.rw.list_users(size=1, start=0)
+        self._upstream_total = res.response.total
+        self._reconciled_at = datetime.now(UTC)
+        if self._upstream_total != len(self._status):
+            logger.warning(
+                "Client stats drifted: %s counted, %s in RemnaWave, requesting sync",
+                len(self._status),
+                self._upstream_total,
+            )
+            if self.user_sync:
+                self.user_sync.request_sync()
+
+    async def run(self) -> None:
+        reconciled = time.monotonic()
+        while True:
+            self.refresh()
+            ready = self.user_sync is None or self.user_sync.ready
+            if ready and time.monotonic() - reconciled >= self.reconcile_interval:
+                reconciled = time.monotonic()
+                try:
+                    await self.reconcile()
+                except Exception:
+                    logger.exception("Client stats reconciliation failed")
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+import httpx
+
+from abcs.listeners.user import ABCUserListener
+from abcs.repositories.user import ABCUserRepository
+from dtos.rw_schema import RwUserItemSchema
+from enums import ClientStatus
+from services.client_bulk import ClientBulkService
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_STATE_NAME = "expiry"
+
+
+@dataclass(frozen=True)
+class ExpiryEvent:
+    client_id: UUID
+    expire_at: datetime
+
+
+type ExpiryHandler = Callable[[list[ExpiryEvent]], Awaitable[None]]
+
+
+class ExpiryIndex(ABCUserListener):
+    """
+    expire_at пользователей, разложенные по корзинам bucket_seconds. Выборка за интервал смотрит
+    только непустые корзины этого интервала, найденные двоичным поиском по отсортированным номерам корзин.
+    Изменение одного пользователя - O(1), если его корзина не создается и не пустеет
+    """
+
+    def __init__(self, bucket_seconds: float = 60):
+        self.bucket_seconds = bucket_seconds
+        self._expire_at: dict[UUID, datetime] = {}
+        self._buckets: dict[int, set[UUID]] = {}
+        # номера непустых корзин по возрастанию
+        self._bucket_keys: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._expire_at)
+
+    def _bucket(self, moment: datetime) -> int:
+        return int(moment.timestamp() // self.bucket_seconds)
+
+    def get(self, client_id: UUID) -> datetime | None:
+        return self._expire_at.get(client_id)
+
+    def put(self, client_id: UUID, expire_at: datetime) -> None:
+        old = self._expire_at.get(client_id)
+        if old == expire_at:
+            return
+        if old is not None:
+            self._discard(client_id, old)
+        self._expire_at[client_id] = expire_at
+        bucket = self._bucket(expire_at)
+        client_ids = self._buckets.get(bucket)
+        if client_ids is None:
+            client_ids = self._buckets[bucket] = set()
+            insort(self._bucket_keys, bucket)
+        client_ids.add(client_id)
+
+    def remove(self, client_id: UUID) -> None:
+        old = self._expire_at.pop(client_id, None)
+        if old is not None:
+            self._discard(client_id, old)
+
+    def _discard(self, client_id: UUID, expire_at: datetime) -> None:
+        bucket = self._bucket(expire_at)
+        client_ids = self._buckets[bucket]
+        client_ids.discard(client_id)
+        if not client_ids:
+            del self._buckets[bucket]
+            del self._bucket_keys[bisect_left(self._bucket_keys, bucket)]
+
+    def _buckets_between(self, after: datetime, until: datetime) -> list[int]:
+        return self._bucket_keys[
+            bisect_left(self._bucket_keys, self._bucket(after)) : bisect_right(self._bucket_keys, self._bucket(until))
+        ]
+
+    def between(self, after: datetime, until: datetime) -> list[ExpiryEvent]:
+        """Пользователи с after < expire_at <= until, по возрастанию expire_at"""
+        events = []
+        for bucket in self._buckets_between(after, until):
+            for client_id in self._buckets[bucket]:
+                expire_at = self._expire_at[client_id]
+                if after < expire_at <= until:
+                    events.append(ExpiryEvent(client_id, expire_at))
+        return sorted(events, key=lambda event: event.expire_at)
+
+    def count_between(self, after: datetime, until: datetime) -> int:
+        """Как len(between(...)), но внутренние корзины интервала считаются целиком, без просмотра записей"""
+        first, last = self._bucket(after), self._bucket(until)
+        count = 0
+        for bucket in self._buckets_between(after, until):
+            client_ids = self._buckets[bucket]
+            if first < bucket < last:
+                count += len(client_ids)
+            else:
+                count += sum(1 for client_id in client_ids if after < self._expire_at[client_id] <= until)
+        return count
+
+    def on_users(self, users: list[RwUserItemSchema]) -> None:
+        for user in users:
+            self.put(user.uuid, user.expire_at)
+
+    def on_updated(
+        self,
+        client_ids: list[UUID],
+        status: ClientStatus | None = None,
+        extend_days: int | None = None,
+    ) -> None:
+        if not extend_days:
+            return
+        for client_id in client_ids:
+            # неизвестного пользователя добавит синхронизация
+            if (expire_at := self.get(client_id)) is not None:
+                self.put(client_id, expire_at + timedelta(days=extend_days))
+
+    def on_deleted(self, client_ids: list[UUID]) -> None:
+        for client_id in client_ids:
+            self.remove(client_id)
+
+    def on_synced(self, seen: set[UUID]) -> None:
+        for client_id in self._expire_at.keys() - seen:
+            self.remove(client_id)
+
+
+@dataclass
+class ExpirySchedulerStats:
+    ticks: int = 0
+    skipped: int = 0
+    failures: int = 0
+    events: int = 0
+
+
+class ExpiryScheduler:
+    """
+    Раз в interval отдает handlers пачки пользователей, у которых наступил expire_at.
+    Обработанный момент хранится в sync_state, тик выполняет одна реплика под advisory lock,
+    поэтому событие доставляется один раз на все реплики. Момент сохраняется после каждой пачки,
+    при ошибке обработчика следующий тик повторяет только недоставленные пачки
+    """
+
+    def __init__(
+        self,
+        index: ExpiryIndex,
+        user_repository: ABCUserRepository,
+        handlers: list[ExpiryHandler],
+        interval: float = 10,
+        batch_size: int = 500,
+        is_ready: Callable[[], bool] = lambda: True,
+    ):
+        self.index = index
+        self.user_repository = user_repository
+        self.handlers = handlers
+        self.interval = interval
+        self.batch_size = batch_size
+        # индекс заполняется синхронизацией зеркала, до этого события не отдаются
+        self.is_ready = is_ready
+        self.stats = ExpirySchedulerStats()
+
+    async def tick(self) -> None:
+        async with self.user_repository.sync_lock(EXPIRY_STATE_NAME) as acquired:
+            if not acquired:
+                self.stats.skipped += 1
+                return
+            now = datetime.now(UTC)
+            state = await self.user_repository.get_sync_state(EXPIRY_STATE_NAME)
+            # при первом запуске давно истекшие не обрабатываются
+            processed_until = state.watermark if state and state.watermark else now
+            events = self.index.between(processed_until, now)
+            delivered = 0
+            for batch in self._batches(events):
+                for handler in self.handlers:
+                    await handler(batch)
+                delivered += len(batch)
+                self.stats.events += len(batch)
+                await self.user_repository.save_sync_state(batch[-1].expire_at, now, delivered, name=EXPIRY_STATE_NAME)
+            await self.user_repository.save_sync_state(now, now, delivered, name=EXPIRY_STATE_NAME)
+            self.stats.ticks += 1
+            if events:
+                logger.info("Expiry scheduler processed %s expired clients", len(events))
+
+    def _batches(self, events: list[ExpiryEvent]) -> Iterator[list[ExpiryEvent]]:
+        """
+        Пачки по batch_size из событий по возрастанию expire_at. События с одним expire_at не разделяются:
+        watermark пачки - ее последний expire_at, и хвост с тем же моментом иначе был бы пропущен
+        """
+        start = 0
+        while start < len(events):
+            end = min(start + self.batch_size, len(events))
+            while end < len(events) and events[end].expire_at == events[end - 1].expire_at:
+                end += 1
+            yield events[start:end]
+            start = end
+
+    async def run(self) -> None:
+        while True:
+            if self.is_ready():
+                try:
+                    await self.tick()
+                except Exception:
+                    self.stats.failures += 1
+                    logger.exception("Expiry scheduler tick failed")
+            await asyncio.sleep(self.interval)
+
+
+def webhook_handler(url: str, client: httpx.AsyncClient) -> ExpiryHandler:
+    """POST пачки событий на url: {"events": [{"uuid": ..., "expireAt": ...}]}"""
+
+    async def handle(events: list[ExpiryEvent]) -> None:
+        body = {"events": [{"uuid": str(event.client_id), "expireAt": event.expire_at.isoformat()} for event in events]}
+        res = await client.post(url, json=body)
+        res.raise_for_status()
+
+    return handle
+
+
+def block_handler(bulk: ClientBulkService) -> ExpiryHandler:
+    """Блокирует истекших клиентов. Ошибки по отдельным клиентам логируются, пачка не повторяется"""
+
+    async def handle(events: list[ExpiryEvent]) -> None:
+        results = await bulk.block([event.client_id for event in events])
+        failed = [client_id for client_id, result in results.items() if not result.ok]
+        if failed:
+            logger.warning("Failed to block %s expired clients", len(failed))
+
+    return handle
@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from pydantic_core import to_jsonable_python
+
+from abcs.repositories.idempotency_key import ABCIdempotencyKeyRepository
+from dtos.idempotency_key import IdempotencyKeyDTO
+from utils.cache import MISSING, TTLCache
+from utils.exc import ConflictError, UnprocessableEntityError
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def request_fingerprint(method: str, path: str, body: Any = None) -> str:
+    data = json.dumps([method, path, to_jsonable_python(body)], sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+@dataclass
+class IdempotencyStats:
+    executed: int = 0
+    replayed: int = 0
+    coalesced: int = 0
+    conflicts: int = 0
+
+
+class IdempotencyService:
+    """
+    Повторный изменяющий запрос с тем же Idempotency-Key в течение ttl получает сохраненный ответ,
+    а не выполняется заново. Ответы хранятся в Postgres (общие для реплик) и в LRU кэше в памяти.
+    Одновременные запросы с одним ключом на реплике объединяются в один, на разных репликах второй
+    получает 409, пока первый не завершится. Сохраняются только успешные ответы, после ошибки ключ освобождается
+    """
+
+    def __init__(
+        self,
+        repository: ABCIdempotencyKeyRepository,
+        ttl: float,
+        cache_size: int = 10_000,
+        lock_timeout: float = 60,
+    ):
+        self.repository = repository
+        self.ttl = ttl
+        # незавершенный ключ, не продленный дольше lock_timeout, считается брошенным упавшей репликой
+        self.lock_timeout = lock_timeout
+        self.cache: TTLCache[str, IdempotencyKeyDTO] = TTLCache(cache_size, ttl)
+        self.stats = IdempotencyStats()
+        self._flight: SingleFlight[tuple[Any, bool]] = SingleFlight()
+        self._fingerprints: dict[str, str] = {}
+
+    def _check(self, key: str, stored: str, fingerprint: str) -> None:
+        if stored != fingerprint:
+            self.stats.conflicts += 1
+            raise UnprocessableEntityError(f"Idempotency-Key {key} was already used for a different request")
+
+    async def run(self, key: str, fingerprint: str, func: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Результат func и флаг, что это сохраненный ответ, а не новое выполнение"""
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            self._check(key, cached.fingerprint, fingerprint)
+            self.stats.replayed += 1
+            return cached.response, True
+
+        in_flight = self._fingerprints.get(key)
+        if in_flight is not None:
+            self._check(key, in_flight, fingerprint)
+            self.stats.coalesced += 1
+        else:
+            self._fingerprints[key] = fingerprint
+        return await self._flight.do(key, lambda: self._execute(key, fingerprint, func))
+
+    async def _execute(self, key: str, fingerprint: str, func: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        try:
+            now = datetime.now(UTC)
+            record = await self.repository.get(key, now)
+            if record is not None:
+                self._check(key, record.fingerprint, fingerprint)
+                if record.completed:
+                    self.cache.set(key, record)
+                    self.stats.replayed += 1
+                    return record.response, True
+
+            expires_at = now + timedelta(seconds=self.ttl)
+            stale_before = now - timedelta(seconds=self.lock_timeout)
+            if not await self.repository.claim(key, fingerprint, now, expires_at, stale_before):
+                self.stats.conflicts += 1
+                raise ConflictError(f"Request with Idempotency-Key {key} is already in progress")
+
+            try:
+                async with self._hold(key):
+                    result = await func()
+            except Exception:
+                await self.repository.release(key)
+                raise
+            self.stats.executed += 1
+
+            response = to_jsonable_python(result, by_alias=True)
+            self.cache.set(
+                key,
+                IdempotencyKeyDTO(
+                    key=key,
+                    fingerprint=fingerprint,
+                    completed=True,
+                    response=response,
+                    created_at=now,
+                    expires_at=expires_at,
+                ),
+            )
+            try:
+                await self.repository.complete(key, response)
+            except Exception:
+                # запрос уже выполнен, ошибка сохранения не должна превращать успех в повод для повтора
+                logger.exception("Failed to store response for Idempotency-Key %s", key)
+            return result, False
+        finally:
+            self._fingerprints.pop(key, None)
+
+    @asynccontextmanager
+    async def _hold(self, key: str) -> AsyncIterator[None]:
+        """Пока запрос выполняется, захват ключа продлевается: массовые операции идут дольше lock_timeout"""
+
+        async def extend() -> None:
+            while True:
+                await asyncio.sleep(self.lock_timeout / 3)
+                try:
+                    await self.repository.extend(key, datetime.now(UTC))
+                except Exception:
+                    logger.exception("Failed to extend Idempotency-Key %s", key)
+
+        task = asyncio.create_task(extend())
+        try:
+            yield
+        finally:
+            task.cancel()
+
+    async def run_cleanup(self, interval: float) -> None:
+        while True:
+            try:
+                deleted = await self.repository.delete_expired(datetime.now(UTC))
+                if deleted:
+                    logger.info("Deleted %s expired idempotency keys", deleted)
+            except Exception:
+                logger.exception("Failed to delete expired idempotency keys")
+            await asyncio.sleep(interval)
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from itertools import batched
+from uuid import UUID
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from abcs.listeners.user import ABCUserListener
+from abcs.repositories.user import ABCUserRepository
+from dtos.rw_schema import RwUserItemSchema
+from dtos.sync_state import SyncStateDTO
+from utils.exc import RequestError
+
+logger = logging.getLogger(__name__)
+
+# сколько кандидатов на удаление перепроверяется в RemnaWave одновременно
+RECHECK_BATCH_SIZE = 20
+
+
+@dataclass
+class UserSyncStats:
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    users: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    duration: float = 0
+    rows_per_second: float = 0
+
+
+class UserSync:
+    """
+    Периодически переносит пользователей RemnaWave в локальное зеркало (таблица users).
+    Синхронизацию выполняет одна реплика (advisory lock), остальные только читают состояние из sync_state.
+    RemnaWave не умеет фильтровать по updated_at, поэтому страницы читаются все, а в БД пишутся
+    только строки новее watermark и отсутствующие в зеркале. Раз в full_every проходов пишутся все строки.
+    Пользователь удаляется из зеркала, только если его нет в проходе и RemnaWave отвечает на него 404.
+    listeners получают все страницы прохода; на остальных репликах после каждой синхронизации
+    они получают из зеркала строки, записанные после прошлой загрузки
+    """
+
+    def __init__(
+        self,
+        rw: ABCRemnawaveClient,
+        user_repository: ABCUserRepository,
+        interval: float,
+        page_size: int = 1000,
+        full_every: int = 60,
+        listeners: list[ABCUserListener] | None = None,
+    ):
+        self.rw = rw
+        self.user_repository = user_repository
+        self.interval = interval
+        self.page_size = page_size
+        self.full_every = full_every
+        self.listeners = listeners or []
+        self.stats = UserSyncStats()
+        # время последней успешной синхронизации любой репликой
+        self.synced_at: datetime | None = None
+        # зеркало можно читать только после первого полного прохода
+        self.ready = False
+        self._wake = asyncio.Event()
+        # uuid, известные listeners, и число неполных загрузок из зеркала с последней полной
+        self._known: set[UUID] | None = None
+        self._partial_loads = 0
+
+    @property
+    def lag(self) -> float | None:
+        """Насколько зеркало отстает от RemnaWave, секунды"""
+        if self.synced_at is None:
+            return None
+        return (datetime.now(UTC) - self.synced_at).total_seconds()
+
+    async def sync(self) -> None:
+        async with self.user_repository.sync_lock() as acquired:
+            if acquired:
+                await self._sync()
+                return
+        self.stats.skipped += 1
+        state = await self.user_repository.get_sync_state()
+        if state and state.synced_at != self.synced_at:
+            if self.listeners:
+                await self._load_listeners(state)
+            self.synced_at = state.synced_at
+            self.ready = True
+
+    async def _load_listeners(self, state: SyncStateDTO) -> None:
+        """
+        Обновляет listeners из зеркала, которое синхронизировала другая реплика: только строки,
+        записанные после прошлой загрузки. Удаления так не видны, поэтому зеркало перечитывается целиком
+        при первой загрузке, раз в full_every загрузок и если известных uuid не столько, сколько в проходе
+        """
+        known = self._known
+        if known is not None and self.synced_at is not None and self._partial_loads < self.full_every:
+            async for users in self.user_repository.iter_users(self.page_size, synced_after=self.synced_at):
+                known.update(user.uuid for user in users)
+                self._notify_users(users)
+            self._partial_loads += 1
+            if len(known) == state.rows:
+                return
+
+        seen: set[UUID] = set()
+        async for users in self.user_repository.iter_users(self.page_size):
+            seen.update(user.uuid for user in users)
+            self._notify_users(users)
+        for listener in self.listeners:
+            listener.on_synced(seen)
+        self._known = seen
+        self._partial_loads = 0
+
+    def _notify_users(self, users: list[RwUserItemSchema]) -> None:
+        for listener in self.listeners:
+            listener.on_users(users)
+
+    async def _sync(self) -> None:
+        started = time.perf_counter()
+        synced_at = datetime.now(UTC)
+        state = await self.user_repository.get_sync_state()
+        watermark = state.watermark if state else None
+        full = watermark is None or self.stats.runs % self.full_every == 0
+
+        seen: set[UUID] = set()
+        new_watermark = watermark
+        upserted = 0
+        start = 0
+        total: int | None = None
+        # страницы читаются по смещению: если список менялся во время прохода, они сдвигаются
+        # и живой пользователь может не попасть в seen
+        shifted = False
+        while True:
+            res = await self.rw.list_users(size=self.page_size, start=start)
+            if total is None:
+                total = res.response.total
+            elif res.response.total != total:
+                shifted = True
+            users = res.response.users
+            if not users:
+                break
+            seen.update(user.uuid for user in users)
+            self._notify_users(users)
+            if full:
+                changed = users
+            else:
+                assert watermark is not None
+                # строка, которой нет в зеркале, пишется даже без изменений, иначе ее вернет только полный проход
+                existing = await self.user_repository.get_existing_users([user.uuid for user in users])
+                changed = [user for user in users if user.updated_at > watermark or user.uuid not in existing]
+            await self.user_repository.upsert_users(changed, synced_at)
+            upserted += len(changed)
+            page_watermark = max(user.updated_at for user in users)
+            if new_watermark is None or page_watermark > new_watermark:
+                new_watermark = page_watermark
+            start += self.page_size
+            if start >= res.response.total:
+                break
+
+        # удаленных в RemnaWave нет в выдаче, их видно только по полному списку uuid
+        deleted = 0
+        rows = len(seen)
+        if shifted:
+            logger.warning("Users list changed during sync, deleting missing users postponed to the next pass")
+            self._known = None
+        else:
+            missing = await self.user_repository.get_missing_users(seen, synced_at)
+            gone = await self._confirm_deleted(missing)
+            if gone:
+                await self.user_repository.delete_users(gone)
+            deleted = len(gone)
+            known = seen | (missing - set(gone))
+            for listener in self.listeners:
+                listener.on_synced(known)
+            self._known = known
+            rows = len(known)
+        self._partial_loads = 0
+        await self.user_repository.save_sync_state(new_watermark, synced_at, rows)
+
+        duration = time.perf_counter() - started
+        self.stats.runs += 1
+        self.stats.users = len(seen)
+        self.stats.upserted = upserted
+        self.stats.deleted = deleted
+        self.stats.duration = duration
+        self.stats.rows_per_second = len(seen) / duration if duration else 0
+        self.synced_at = synced_at
+        self.ready = True
+        logger.info(
+            "Users mirror synced in %.2fs (%.0f rows/s): %s users, %s upserted, %s deleted, full=%s",
+            duration,
+            self.stats.rows_per_second,
+            len(seen),
+            upserted,
+            deleted,
+            full,
+        )
+
+    async def _confirm_deleted(self, missing: set[UUID]) -> list[UUID]:
+        """Кандидаты на удаление, которых RemnaWave действительно не находит"""
+        gone = []
+        for chunk in batched(missing, RECHECK_BATCH_SIZE):
+            results = await asyncio.gather(*(self._is_deleted(client_id) for client_id in chunk))
+            gone.extend(client_id for client_id, deleted in zip(chunk, results, strict=True) if deleted)
+        return gone
+
+    async def _is_deleted(self, client_id: UUID) -> bool:
+        try:
+            await self.rw.get_user_by_uuid(client_id)
+        except RequestError as e:
+            return e.status_code == 404
+        return False
+
+    def request_sync(self) -> None:
+        """Запускает следующий проход, не дожидаясь interval"""
+        self._wake.set()
+
+    async def run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                await self.sync()
+            except Exception:
+                self.stats.failures += 1
+                logger.exception("Users mirror sync failed")
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.interval)
@@ -0,0 +1,181 @@
+import asyncio
+from collections.abc import Iterable, Iterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID, uuid4
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import ClauseElement
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from dtos.rw_schema import (
+    CreateUserResponseSchema,
+    GetAllUsersResponseSchema,
+    GetSubscriptionInfoResponseSchema,
+    GetUserResponseSchema,
+    RwUserItemSchema,
+)
+from enums import ClientStatus
+from utils.exc import RequestError
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def compile_pg(stmt: ClauseElement) -> tuple[str, dict[str, Any]]:
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    return str(compiled), dict(compiled.params or {})
+
+
+class FakeResult:
+    def __init__(self, rows: Iterable[Any] = ()):
+        self.rows = list(rows)
+        self.rowcount = len(self.rows)
+
+    def scalars(self) -> "FakeResult":
+        return self
+
+    def all(self) -> list[Any]:
+        return self.rows
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.rows)
+
+    def scalar_one_or_none(self) -> Any:
+        return self.rows[0] if self.rows else None
+
+
+class FakeSession:
+    """Записывает выполненные запросы и по очереди отдает заготовленные результаты"""
+
+    def __init__(self, results: Iterable[FakeResult] = ()):
+        self.statements: list[Any] = []
+        self._results = iter(results)
+
+    async def execute(self, stmt: Any) -> FakeResult:
+        self.statements.append(stmt)
+        return next(self._results, FakeResult())
+
+    async def scalar(self, stmt: Any) -> Any:
+        return (await self.execute(stmt)).scalar_one_or_none()
+
+
+class FakeSessionMixin:
+    """Подменяет BaseRepository.session, чтобы проверять запросы без Postgres"""
+
+    def __init__(self, *results: FakeResult):
+        self.fake_session = FakeSession(results)
+
+    @asynccontextmanager
+    async def session(self):
+        yield self.fake_session
+
+
+class FakeClock:
+    """Подменяет модуль time в тестируемом модуле: время идет только через advance"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeAsyncio:
+    """Подменяет модуль asyncio в тестируемом модуле: sleep двигает FakeClock, остальное берется из asyncio"""
+
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.sleeps: list[float] = []
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.clock.advance(delay)
+        await asyncio.sleep(0)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(asyncio, name)
+
+
+def make_user(
+    username: str = "user",
+    status: ClientStatus = ClientStatus.ACTIVE,
+    expire_at: datetime = NOW + timedelta(days=30),
+    updated_at: datetime = NOW,
+) -> RwUserItemSchema:
+    return RwUserItemSchema(
+        uuid=uuid4(),
+        id=1,
+        short_uuid="short",
+        username=username,
+        status=status,
+        expire_at=expire_at,
+        created_at=NOW,
+        updated_at=updated_at,
+    )
+
+
+class FakeRemnawaveClient(ABCRemnawaveClient):
+    """RemnaWave в памяти: list_users отдает срезы users, остальные методы меняют их"""
+
+    def __init__(self, users: Iterable[RwUserItemSchema] = ()):
+        self.users = list(users)
+        self.list_calls: list[int] = []
+
+    async def list_users(self, size: int = 500, start: int = 0) -> GetAllUsersResponseSchema:
+        self.list_calls.append(start)
+        return GetAllUsersResponseSchema(
+            response=GetAllUsersResponseSchema.Response(users=self.users[start : start + size], total=len(self.users))
+        )
+
+    def _find(self, client_id: UUID) -> int:
+        for i, user in enumerate(self.users):
+            if user.uuid == client_id:
+                return i
+        raise RequestError("Request failed with status code 404", status_code=404)
+
+    async def create_client(self, username: str, expire_at: datetime) -> CreateUserResponseSchema:
+        user = make_user(username, expire_at=expire_at)
+        self.users.append(user)
+        return CreateUserResponseSchema(response=user)
+
+    async def get_user_by_uuid(self, client_id: UUID) -> GetUserResponseSchema:
+        return GetUserResponseSchema(response=self.users[self._find(client_id)])
+
+    async def delete_user(self, client_id: UUID) -> None:
+        del self.users[self._find(client_id)]
+
+    async def get_subscription_info_by_uuid(self, client_id: UUID) -> GetSubscriptionInfoResponseSchema:
+        raise NotImplementedError
+
+    def _update(self, client_id: UUID, **update: Any) -> None:
+        i = self._find(client_id)
+        self.users[i] = self.users[i].model_copy(update={**update, "updated_at": datetime.now(UTC)})
+
+    async def extend_expiration(self, client_id: UUID, days: int) -> None:
+        await self.bulk_extend_expiration([client_id], days)
+
+    async def disable_user(self, client_id: UUID) -> None:
+        self._update(client_id, status=ClientStatus.DISABLED)
+
+    async def enable_user(self, client_id: UUID) -> None:
+        self._update(client_id, status=ClientStatus.ACTIVE)
+
+    async def revoke_subscription(self, client_id: UUID, revoke_only_passwords: bool = False) -> None:
+        self._find(client_id)
+
+    async def bulk_extend_expiration(self, client_ids: list[UUID], days: int) -> None:
+        for client_id in client_ids:
+            user = self.users[self._find(client_id)]
+            self._update(client_id, expire_at=user.expire_at + timedelta(days=days))
+
+    async def bulk_delete_users(self, client_ids: list[UUID]) -> None:
+        for client_id in client_ids:
+            await self.delete_user(client_id)
+
+    async def bulk_revoke_subscription(self, client_ids: list[UUID]) -> None:
+        for client_id in client_ids:
+            self._find(client_id)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+from typing import cast
+from uuid import UUID, uuid4
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from clients.cached_remnawave import CachedRemnawaveClient
+from dtos.rw_schema import GetUserResponseSchema, RwUserItemSchema
+from enums import ClientStatus
+from tests.fakes import FakeRemnawaveClient, make_user
+from utils.cache import MISSING
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def make_client() -> CachedRemnawaveClient:
+    return CachedRemnawaveClient(cast(ABCRemnawaveClient, None), max_size=10, user_ttl=30, subscription_ttl=30)
+
+
+def make_response() -> GetUserResponseSchema:
+    user = RwUserItemSchema(
+        uuid=uuid4(),
+        id=1,
+        short_uuid="short",
+        username="user",
+        status=ClientStatus.ACTIVE,
+        expire_at=NOW,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+    return GetUserResponseSchema(response=user)
+
+
+def test_apply_patches_fresh_entry_and_keeps_its_expiry():
+    client = make_client()
+    res = make_response()
+    client_id = res.response.uuid
+    expires_at = time.monotonic() + 5
+    client.users.set(client_id, res, expires_at)
+
+    client.apply(client_id, datetime.now(UTC), status=ClientStatus.DISABLED, extend_days=1)
+
+    item = client.users.peek(client_id)
+    assert item is not None
+    assert item[0] == expires_at
+    assert item[1].response.status == ClientStatus.DISABLED
+    assert item[1].response.expire_at.day == 2
+
+
+def test_apply_does_not_revive_expired_entry():
+    client = make_client()
+    res = make_response()
+    client_id = res.response.uuid
+    client.users.set(client_id, res, time.monotonic() - 1)
+
+    client.apply(client_id, datetime.now(UTC), status=ClientStatus.DISABLED)
+
+    assert client.users.peek(client_id) is None
+    assert client.users.get_stale(client_id) is MISSING
+
+
+class RacingRemnawaveClient(FakeRemnawaveClient):
+    """Пока ответ на продление идет обратно, другой запрос успевает закэшировать уже продленного пользователя"""
+
+    cached: CachedRemnawaveClient
+
+    async def bulk_extend_expiration(self, client_ids: list[UUID], days: int) -> None:
+        await super().bulk_extend_expiration(client_ids, days)
+        for client_id in client_ids:
+            await self.cached.get_user_by_uuid(client_id)
+
+
+def test_extend_is_not_applied_twice_to_entry_read_after_mutation():
+    user = make_user(expire_at=NOW)
+    rw = RacingRemnawaveClient([user])
+    client = CachedRemnawaveClient(rw, max_size=10, user_ttl=30, subscription_ttl=30)
+    rw.cached = client
+
+    async def scenario():
+        await client.extend_expiration(user.uuid, 3)
+        return await client.get_user_by_uuid(user.uuid)
+
+    res = asyncio.run(scenario())
+
+    assert res.response.expire_at == NOW + timedelta(days=3)
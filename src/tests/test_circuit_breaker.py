@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+
+import httpx
+
+from enums import CircuitState
+from tests.fakes import FakeClock
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker
+from utils.exc import CircuitOpenError, RequestError
+
+
+def make_breaker(monkeypatch, **kwargs) -> tuple[CircuitBreaker, FakeClock]:
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return CircuitBreaker("test", **kwargs), clock
+
+
+def fail(breaker: CircuitBreaker, exc: Exception) -> None:
+    with contextlib.suppress(type(exc)), breaker.guard():
+        raise exc
+
+
+def succeed(breaker: CircuitBreaker) -> None:
+    with breaker.guard():
+        pass
+
+
+def test_consecutive_failures_open_circuit(monkeypatch):
+    breaker, _ = make_breaker(monkeypatch, failure_threshold=3)
+
+    for _ in range(2):
+        fail(breaker, httpx.ConnectError("refused"))
+    succeed(breaker)
+    for _ in range(2):
+        fail(breaker, httpx.ConnectError("refused"))
+    # успех сбрасывает счетчик подряд идущих ошибок
+    assert breaker.state == CircuitState.CLOSED
+
+    fail(breaker, httpx.ConnectError("refused"))
+    assert breaker.state == CircuitState.OPEN
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        assert e.retry_after == breaker.recovery_timeout
+    else:
+        raise AssertionError("open circuit must reject calls")
+    assert breaker.stats.rejected == 1
+
+
+def test_client_errors_do_not_count(monkeypatch):
+    breaker, _ = make_breaker(monkeypatch, failure_threshold=1)
+
+    fail(breaker, RequestError("not found", status_code=404))
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.stats.successes == 1
+
+
+def test_error_rate_opens_circuit_within_window(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=100, min_requests=4, window=10)
+
+    # старые ошибки выпадают из окна и в долю не попадают
+    fail(breaker, RequestError("unavailable", status_code=503))
+    fail(breaker, RequestError("unavailable", status_code=503))
+    clock.advance(11)
+    succeed(breaker)
+    succeed(breaker)
+    fail(breaker, RequestError("unavailable", status_code=503))
+    assert breaker.state == CircuitState.CLOSED
+
+    fail(breaker, RequestError("too many", status_code=429))
+    assert breaker.error_rate == 0.5
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_half_open_limits_probes_and_recovers(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=1, recovery_timeout=10, half_open_max_calls=1)
+    fail(breaker, TimeoutError())
+    clock.advance(9)
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        assert e.retry_after == 1
+    else:
+        raise AssertionError("circuit must stay open until recovery_timeout")
+    assert breaker.state == CircuitState.OPEN
+
+    clock.advance(1)
+    with breaker.guard():
+        assert breaker.state == CircuitState.HALF_OPEN
+        # пока пробный запрос идет, остальные отклоняются
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            pass
+        else:
+            raise AssertionError("half-open circuit must limit probes")
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.error_rate == 0
+
+
+def test_failed_probe_reopens_circuit(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=1, recovery_timeout=10)
+    fail(breaker, TimeoutError())
+    clock.advance(10)
+
+    fail(breaker, TimeoutError())
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.stats.opened == 2
+    clock.advance(5)
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        assert e.retry_after == 5
+    else:
+        raise AssertionError("reopened circuit must wait a full recovery_timeout")
+
+
+def test_cancelled_probe_frees_its_slot(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=1, recovery_timeout=10)
+    fail(breaker, TimeoutError())
+    clock.advance(10)
+
+    with contextlib.suppress(asyncio.CancelledError), breaker.guard():
+        raise asyncio.CancelledError
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    succeed(breaker)
+    assert breaker.state == CircuitState.CLOSED
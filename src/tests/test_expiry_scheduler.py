@@ -0,0 +1,111 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from datetime import UTC, datetime, timedelta
+from typing import cast
+from uuid import UUID, uuid4
+
+from abcs.repositories.user import ABCUserRepository
+from dtos.sync_state import SyncStateDTO
+from services.expiry_scheduler import EXPIRY_STATE_NAME, ExpiryEvent, ExpiryHandler, ExpiryIndex, ExpiryScheduler
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def test_between_returns_sorted_events_inside_interval():
+    index = ExpiryIndex(bucket_seconds=60)
+    ids = [uuid4() for _ in range(4)]
+    index.put(ids[0], NOW + timedelta(seconds=30))
+    index.put(ids[1], NOW + timedelta(days=300))
+    index.put(ids[2], NOW + timedelta(seconds=10))
+    index.put(ids[3], NOW - timedelta(seconds=1))
+
+    events = index.between(NOW, NOW + timedelta(days=365))
+
+    assert [event.client_id for event in events] == [ids[2], ids[0], ids[1]]
+    assert index.count_between(NOW, NOW + timedelta(days=365)) == 3
+    assert index.count_between(NOW + timedelta(seconds=10), NOW + timedelta(days=1)) == 1
+
+
+def test_put_moves_and_remove_drops_empty_buckets():
+    index = ExpiryIndex(bucket_seconds=60)
+    client_id = uuid4()
+    index.put(client_id, NOW)
+    index.put(client_id, NOW + timedelta(days=10))
+
+    assert index.between(NOW - timedelta(minutes=1), NOW + timedelta(minutes=1)) == []
+    assert len(index._bucket_keys) == 1
+
+    index.remove(client_id)
+
+    assert len(index) == 0
+    assert index._buckets == {}
+    assert index._bucket_keys == []
+
+
+def test_on_synced_drops_unseen_and_on_updated_extends():
+    index = ExpiryIndex()
+    kept, dropped = uuid4(), uuid4()
+    index.put(kept, NOW)
+    index.put(dropped, NOW)
+
+    index.on_synced({kept})
+    index.on_updated([kept], extend_days=2)
+
+    assert index.get(dropped) is None
+    assert index.get(kept) == NOW + timedelta(days=2)
+
+
+class StateRepository:
+    def __init__(self, watermark: datetime):
+        self.state = SyncStateDTO(name=EXPIRY_STATE_NAME, watermark=watermark, synced_at=watermark, rows=0)
+
+    @asynccontextmanager
+    async def sync_lock(self, name: str = "users"):
+        yield True
+
+    async def get_sync_state(self, name: str = "users") -> SyncStateDTO | None:
+        return self.state
+
+    async def save_sync_state(self, watermark: datetime | None, synced_at: datetime, rows: int, name: str = "users"):
+        self.state = SyncStateDTO(name=name, watermark=watermark, synced_at=synced_at, rows=rows)
+
+
+def make_scheduler(index: ExpiryIndex, repository: StateRepository, handler: ExpiryHandler) -> ExpiryScheduler:
+    return ExpiryScheduler(index, cast(ABCUserRepository, repository), [handler], batch_size=2)
+
+
+def test_tick_does_not_resend_delivered_batches_after_failure():
+    start = datetime.now(UTC) - timedelta(hours=1)
+    index = ExpiryIndex()
+    ids = [uuid4() for _ in range(4)]
+    for minute, client_id in enumerate(ids, start=1):
+        index.put(client_id, start + timedelta(minutes=minute))
+    repository = StateRepository(start)
+    delivered: list[UUID] = []
+    fail = True
+
+    async def handler(events: list[ExpiryEvent]) -> None:
+        if fail and ids[2] in [event.client_id for event in events]:
+            raise RuntimeError("handler failed")
+        delivered.extend(event.client_id for event in events)
+
+    scheduler = make_scheduler(index, repository, handler)
+    with suppress(RuntimeError):
+        asyncio.run(scheduler.tick())
+    assert repository.state.watermark == start + timedelta(minutes=2)
+
+    fail = False
+    asyncio.run(scheduler.tick())
+
+    assert delivered == ids
+    assert scheduler.stats.events == 4
+
+
+def test_batches_keep_events_with_same_expire_at_together():
+    index = ExpiryIndex()
+    repository = StateRepository(NOW)
+    scheduler = ExpiryScheduler(index, cast(ABCUserRepository, repository), [], batch_size=2)
+    same = NOW + timedelta(minutes=1)
+    events = [ExpiryEvent(uuid4(), same) for _ in range(3)] + [ExpiryEvent(uuid4(), same + timedelta(seconds=1))]
+
+    assert [len(batch) for batch in scheduler._batches(events)] == [3, 1]
@@ -0,0 +1,163 @@
+import asyncio
+from contextlib import suppress
+from datetime import datetime
+from typing import Any
+
+from abcs.repositories.idempotency_key import ABCIdempotencyKeyRepository
+from dtos.idempotency_key import IdempotencyKeyDTO
+from repositories.idempotency_key import IdempotencyKeyRepository
+from services.idempotency import IdempotencyService, request_fingerprint
+from tests.fakes import FakeSessionMixin, compile_pg
+from utils.exc import ConflictError, UnprocessableEntityError
+
+
+class MemoryIdempotencyKeyRepository(ABCIdempotencyKeyRepository):
+    def __init__(self):
+        self.records: dict[str, IdempotencyKeyDTO] = {}
+        self.extended: list[str] = []
+
+    async def get(self, key: str, now: datetime) -> IdempotencyKeyDTO | None:
+        record = self.records.get(key)
+        return record if record is not None and record.expires_at > now else None
+
+    async def claim(
+        self,
+        key: str,
+        fingerprint: str,
+        now: datetime,
+        expires_at: datetime,
+        stale_before: datetime,
+    ) -> bool:
+        record = self.records.get(key)
+        if record is not None and record.expires_at > now and (record.completed or record.created_at >= stale_before):
+            return False
+        self.records[key] = IdempotencyKeyDTO(
+            key=key,
+            fingerprint=fingerprint,
+            completed=False,
+            response=None,
+            created_at=now,
+            expires_at=expires_at,
+        )
+        return True
+
+    async def extend(self, key: str, now: datetime) -> None:
+        self.extended.append(key)
+        record = self.records[key]
+        self.records[key] = record.model_copy(update={"created_at": now})
+
+    async def complete(self, key: str, response: Any) -> None:
+        record = self.records[key]
+        self.records[key] = record.model_copy(update={"completed": True, "response": response})
+
+    async def release(self, key: str) -> None:
+        record = self.records.get(key)
+        if record is not None and not record.completed:
+            del self.records[key]
+
+    async def delete_expired(self, now: datetime) -> int:
+        expired = [key for key, record in self.records.items() if record.expires_at <= now]
+        for key in expired:
+            del self.records[key]
+        return len(expired)
+
+
+def make_service(repository: ABCIdempotencyKeyRepository, lock_timeout: float = 60) -> IdempotencyService:
+    return IdempotencyService(repository, ttl=3600, lock_timeout=lock_timeout)
+
+
+def test_repeated_key_replays_stored_response():
+    repository = MemoryIdempotencyKeyRepository()
+    calls = 0
+
+    async def func() -> dict:
+        nonlocal calls
+        calls += 1
+        return {"ok": calls}
+
+    fingerprint = request_fingerprint("POST", "/clients", {"username": "alice"})
+
+    async def scenario():
+        first = await make_service(repository).run("key", fingerprint, func)
+        # другая реплика: ответ берется из репозитория, а не из кэша в памяти
+        second = await make_service(repository).run("key", fingerprint, func)
+        return first, second
+
+    assert asyncio.run(scenario()) == (({"ok": 1}, False), ({"ok": 1}, True))
+    assert calls == 1
+
+
+def test_same_key_for_other_request_is_rejected():
+    service = make_service(MemoryIdempotencyKeyRepository())
+
+    async def func() -> int:
+        return 1
+
+    async def scenario() -> bool:
+        await service.run("key", request_fingerprint("POST", "/clients/a/block"), func)
+        try:
+            await service.run("key", request_fingerprint("POST", "/clients/b/block"), func)
+        except UnprocessableEntityError:
+            return True
+        return False
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_key_in_progress_on_other_replica_conflicts_and_failure_releases_it():
+    repository = MemoryIdempotencyKeyRepository()
+    fingerprint = request_fingerprint("DELETE", "/clients/a")
+
+    async def scenario():
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def slow() -> int:
+            started.set()
+            await finish.wait()
+            raise RuntimeError("upstream failed")
+
+        first = asyncio.create_task(make_service(repository).run("key", fingerprint, slow))
+        await started.wait()
+        try:
+            await make_service(repository).run("key", fingerprint, slow)
+        except ConflictError:
+            conflict = True
+        else:
+            conflict = False
+        finish.set()
+        with suppress(RuntimeError):
+            await first
+        return conflict
+
+    assert asyncio.run(scenario()) is True
+    assert repository.records == {}
+
+
+def test_lock_is_extended_while_request_runs():
+    repository = MemoryIdempotencyKeyRepository()
+    service = make_service(repository, lock_timeout=0.03)
+
+    async def slow() -> int:
+        await asyncio.sleep(0.1)
+        return 1
+
+    asyncio.run(service.run("key", request_fingerprint("POST", "/clients/bulk/block"), slow))
+
+    assert len(repository.extended) >= 2
+    assert repository.records["key"].completed
+
+
+class FakeIdempotencyKeyRepository(FakeSessionMixin, IdempotencyKeyRepository):
+    pass
+
+
+def test_extend_touches_only_unfinished_key():
+    repository = FakeIdempotencyKeyRepository()
+
+    asyncio.run(repository.extend("key", datetime(2026, 1, 1)))
+
+    sql, params = compile_pg(repository.fake_session.statements[0])
+    assert sql.startswith("UPDATE idempotency_keys SET created_at=")
+    assert "idempotency_keys.completed IS false" in sql
+    assert params["key_1"] == "key"
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_app_serves_requests():
+    # без lifespan: зависимости не созданы, но приложение импортируется и отвечает
+    client = TestClient(main.app)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "remnawave_request_duration_seconds" in response.text
+
+
+def test_expiring_rejects_out_of_range_within():
+    client = TestClient(main.app)
+
+    for within in ("0", "-60", "P400D", "1e20"):
+        assert client.get("/clients/expiring", params={"within": within}).status_code == 422
+
+    # в пределах: проверка проходит, индекс без lifespan не создан
+    assert client.get("/clients/expiring", params={"within": "P7D"}).status_code == 503
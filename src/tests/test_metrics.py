@@ -0,0 +1,25 @@
+import asyncio
+
+from utils.metrics import Gauge, Histogram, timed
+
+
+def test_gauge_without_labels_supports_dec_and_set():
+    gauge = Gauge("test_in_flight", "In flight")
+
+    gauge.inc(3)
+    gauge.dec()
+    assert gauge.labels().value == 2
+
+    gauge.set(7)
+    assert gauge.expose()[-1] == "test_in_flight 7"
+
+
+def test_timed_keeps_result_and_observes():
+    histogram = Histogram("test_duration_seconds", "Duration", ("operation",))
+
+    @timed(histogram, "double")
+    async def double(value: int) -> int:
+        return value * 2
+
+    assert asyncio.run(double(21)) == 42
+    assert histogram.labels("double").count == 1
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import UTC, date, datetime
+from typing import cast
+
+from commands.operation_partitions import rollover
+from repositories.operation_partition import (
+    PARTITIONS_LOCK_KEY,
+    OperationPartitionRepository,
+    add_months,
+    month_start,
+    partition_name,
+)
+from tests.fakes import FakeResult, FakeSessionMixin, compile_pg
+
+
+class FakeOperationPartitionRepository(FakeSessionMixin, OperationPartitionRepository):
+    pass
+
+
+def test_create_partition_locks_then_moves_and_attaches():
+    repository = FakeOperationPartitionRepository(FakeResult(), FakeResult())
+
+    name = asyncio.run(repository.create_partition(date(2026, 3, 1)))
+
+    assert name == "operations_p202603"
+    statements = [compile_pg(stmt) for stmt in repository.fake_session.statements]
+    sql = [text for text, _ in statements]
+    assert sql[0] == "SELECT pg_advisory_xact_lock(%(key)s)"
+    assert statements[0][1] == {"key": PARTITIONS_LOCK_KEY}
+    assert "c.relname = %(name)s" in sql[1]
+    assert sql[2].startswith("CREATE TABLE IF NOT EXISTS operations_p202603")
+    # default заблокирована до переноса строк и до ATTACH
+    assert sql[3] == "LOCK TABLE operations_default IN ACCESS EXCLUSIVE MODE"
+    assert "DELETE FROM operations_default" in sql[4]
+    assert "ATTACH PARTITION operations_p202603" in sql[5]
+
+
+def test_create_partition_skips_attached():
+    repository = FakeOperationPartitionRepository(FakeResult(), FakeResult([1]))
+
+    assert asyncio.run(repository.create_partition(date(2026, 3, 1))) is None
+    assert len(repository.fake_session.statements) == 2
+
+
+class FlakyPartitionRepository:
+    def __init__(self, existing: dict[date, str], failing: date):
+        self.existing = existing
+        self.failing = failing
+        self.attempted: list[date] = []
+
+    async def get_partitions(self) -> dict[date, str]:
+        return self.existing
+
+    async def create_partition(self, month: date) -> str | None:
+        self.attempted.append(month)
+        if month == self.failing:
+            raise RuntimeError("lock timeout")
+        return partition_name(month)
+
+
+def test_rollover_continues_after_failed_month():
+    current = month_start(datetime.now(UTC).date())
+    months = [add_months(current, i) for i in range(4)]
+    repository = FlakyPartitionRepository({months[0]: partition_name(months[0])}, failing=months[1])
+
+    created = asyncio.run(rollover(cast(OperationPartitionRepository, repository), ahead=3))
+
+    assert repository.attempted == months[1:]
+    assert created == [partition_name(months[2]), partition_name(months[3])]
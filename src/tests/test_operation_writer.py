@@ -0,0 +1,142 @@
+import asyncio
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from abcs.repositories.operation import ABCOperationRepository
+from dtos.operation import OperationDTO
+from utils.operation_writer import OperationWriter
+
+
+class MemoryOperationRepository(ABCOperationRepository):
+    """Пишет строки в rows; пока gate закрыт, запись ждет; падают первые fail_times вызовов и пачки с bad=True"""
+
+    def __init__(self, fail_times: int = 0):
+        self.rows: list[dict[str, Any]] = []
+        self.calls = 0
+        self.fail_times = fail_times
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def get_operations(self, client_id: UUID, limit: int, page: int) -> list[OperationDTO]:
+        raise NotImplementedError
+
+    async def get_operations_after(
+        self,
+        client_id: UUID,
+        limit: int,
+        cursor: tuple[datetime, UUID] | None = None,
+    ) -> list[OperationDTO]:
+        raise NotImplementedError
+
+    async def create_operation(self, operation_data: dict[str, Any]) -> OperationDTO:
+        raise NotImplementedError
+
+    async def create_operations(self, operations_data: list[dict[str, Any]]) -> list[OperationDTO]:
+        await self.gate.wait()
+        self.calls += 1
+        if self.calls <= self.fail_times or any(row.get("bad") for row in operations_data):
+            raise RuntimeError("insert failed")
+        self.rows.extend(operations_data)
+        return []
+
+
+def make_writer(repository: MemoryOperationRepository, max_queue_size: int = 100) -> OperationWriter:
+    return OperationWriter(repository, max_queue_size=max_queue_size, batch_size=10, flush_interval=0.01, retry_delay=0)
+
+
+def numbers(repository: MemoryOperationRepository) -> list[int]:
+    return sorted(row["n"] for row in repository.rows)
+
+
+def test_close_drains_queue():
+    repository = MemoryOperationRepository()
+    writer = make_writer(repository)
+
+    async def scenario():
+        writer.start()
+        for n in range(25):
+            await writer.put({"n": n})
+        await writer.close()
+
+    asyncio.run(scenario())
+
+    assert numbers(repository) == list(range(25))
+    assert writer.stats.written == 25
+
+
+def test_full_queue_blocks_until_writer_catches_up():
+    repository = MemoryOperationRepository()
+    writer = make_writer(repository, max_queue_size=2)
+
+    async def scenario():
+        await writer.put({"n": 0})
+        await writer.put({"n": 1})
+        blocked = asyncio.create_task(writer.put({"n": 2}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        writer.start()
+        await blocked
+        await writer.close()
+
+    asyncio.run(scenario())
+
+    assert writer.stats.blocked == 1
+    assert numbers(repository) == [0, 1, 2]
+
+
+def test_put_blocked_during_close_writes_directly():
+    repository = MemoryOperationRepository()
+    repository.gate.clear()
+    writer = OperationWriter(repository, max_queue_size=1, batch_size=1, flush_interval=0.01, retry_delay=0)
+
+    async def scenario():
+        writer.start()
+        await writer.put({"n": 0})
+        await asyncio.sleep(0.01)
+        # writer занят первой строкой, вторая занимает очередь, третья ждет места
+        await writer.put({"n": 1})
+        blocked = asyncio.create_task(writer.put({"n": 2}))
+        await asyncio.sleep(0.01)
+        closing = asyncio.create_task(writer.close())
+        await asyncio.sleep(0.01)
+        repository.gate.set()
+        await asyncio.gather(blocked, closing)
+
+    asyncio.run(scenario())
+
+    assert numbers(repository) == [0, 1, 2]
+    assert writer.stats.failed == 0
+
+
+def test_failed_batch_is_retried():
+    repository = MemoryOperationRepository(fail_times=2)
+    writer = make_writer(repository)
+
+    async def scenario():
+        writer.start()
+        for n in range(5):
+            await writer.put({"n": n})
+        await writer.close()
+
+    asyncio.run(scenario())
+
+    assert numbers(repository) == list(range(5))
+    assert writer.stats.failed == 0
+
+
+def test_bad_row_does_not_lose_the_batch():
+    repository = MemoryOperationRepository()
+    writer = make_writer(repository)
+
+    async def scenario():
+        writer.start()
+        for n in range(5):
+            await writer.put({"n": n, "bad": n == 3})
+        await writer.close()
+
+    asyncio.run(scenario())
+
+    assert numbers(repository) == [0, 1, 2, 4]
+    assert writer.stats.written == 4
+    assert writer.stats.failed == 1
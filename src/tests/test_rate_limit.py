@@ -0,0 +1,109 @@
+import asyncio
+
+from tests.fakes import FakeAsyncio, FakeClock
+from utils import rate_limit
+from utils.rate_limit import AsyncTokenBucket, RateLimiter
+
+
+def patch_clock(monkeypatch) -> tuple[FakeClock, FakeAsyncio]:
+    clock = FakeClock()
+    fake_asyncio = FakeAsyncio(clock)
+    monkeypatch.setattr(rate_limit, "time", clock)
+    monkeypatch.setattr(rate_limit, "asyncio", fake_asyncio)
+    return clock, fake_asyncio
+
+
+def test_burst_then_refill_at_rate(monkeypatch):
+    clock, fake_asyncio = patch_clock(monkeypatch)
+
+    async def scenario():
+        bucket = AsyncTokenBucket(rate=2, capacity=3)
+        burst = [await bucket.acquire() for _ in range(3)]
+        throttled = await bucket.acquire()
+        clock.advance(1)
+        refilled = [await bucket.acquire() for _ in range(2)]
+        return burst, throttled, refilled
+
+    burst, throttled, refilled = asyncio.run(scenario())
+
+    assert burst == [0, 0, 0]
+    assert throttled == 0.5
+    assert refilled == [0, 0]
+    assert fake_asyncio.sleeps == [0.5]
+
+
+def test_idle_bucket_does_not_exceed_capacity(monkeypatch):
+    clock, _ = patch_clock(monkeypatch)
+
+    async def scenario():
+        bucket = AsyncTokenBucket(rate=1, capacity=2)
+        clock.advance(60)
+        return [await bucket.acquire() for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [0, 0, 1]
+
+
+def test_waiters_are_served_in_arrival_order(monkeypatch):
+    clock, _ = patch_clock(monkeypatch)
+    served: list[tuple[int, float]] = []
+
+    async def scenario():
+        bucket = AsyncTokenBucket(rate=1, capacity=1)
+        await bucket.acquire()
+
+        async def waiter(n: int) -> None:
+            await bucket.acquire()
+            served.append((n, clock.now))
+
+        await asyncio.gather(*(waiter(n) for n in range(4)))
+
+    asyncio.run(scenario())
+
+    # каждый следующий получает токен ровно через 1/rate после предыдущего
+    assert served == [(0, 1001.0), (1, 1002.0), (2, 1003.0), (3, 1004.0)]
+
+
+def test_in_flight_is_capped(monkeypatch):
+    patch_clock(monkeypatch)
+    peak = 0
+
+    async def scenario():
+        limiter = RateLimiter("test", max_in_flight=2)
+        release = asyncio.Event()
+
+        async def request() -> None:
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.stats.in_flight)
+                await release.wait()
+
+        tasks = [asyncio.create_task(request()) for _ in range(5)]
+        await asyncio.sleep(0)
+        in_flight = limiter.stats.in_flight
+        release.set()
+        await asyncio.gather(*tasks)
+        return limiter, in_flight
+
+    limiter, in_flight = asyncio.run(scenario())
+
+    assert in_flight == 2
+    assert peak == 2
+    assert limiter.stats.acquired == 5
+    assert limiter.stats.in_flight == 0
+
+
+def test_limiter_counts_throttled_wait(monkeypatch):
+    patch_clock(monkeypatch)
+
+    async def scenario():
+        limiter = RateLimiter("test", rate=4, burst=2)
+        for _ in range(3):
+            async with limiter.slot():
+                pass
+        return limiter
+
+    limiter = asyncio.run(scenario())
+
+    assert limiter.stats.acquired == 3
+    assert limiter.stats.throttled == 1
+    assert limiter.stats.wait_seconds == 0.25
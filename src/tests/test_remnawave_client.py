@@ -0,0 +1,43 @@
+import asyncio
+from uuid import uuid4
+
+import httpx
+
+from clients.remnawave import RemnawaveClient
+from enums import Method
+from utils.metrics import upstream_in_flight, upstream_requests
+
+USER = {
+    "uuid": str(uuid4()),
+    "id": 1,
+    "shortUuid": "short",
+    "username": "alice",
+    "status": "ACTIVE",
+    "expireAt": "2026-02-01T00:00:00Z",
+    "createdAt": "2026-01-01T00:00:00Z",
+    "updatedAt": "2026-01-01T00:00:00Z",
+}
+
+
+def test_list_users_goes_through_api_request():
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"response": {"users": [USER], "total": 1}})
+
+    ok = upstream_requests.labels(Method.GET, "/api/users", "2xx")
+    ok_before = ok.value
+
+    async def call():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await RemnawaveClient(client).list_users(size=10)
+
+    result = asyncio.run(call())
+
+    assert result.response.total == 1
+    assert result.response.users[0].username == "alice"
+    assert len(requests) == 1
+    assert requests[0].url.params["size"] == "10"
+    assert ok.value == ok_before + 1
+    assert upstream_in_flight.labels().value == 0
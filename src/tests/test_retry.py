@@ -0,0 +1,162 @@
+import asyncio
+import random
+
+import httpx
+
+from tests.fakes import FakeAsyncio, FakeClock
+from utils import retry as retry_module
+from utils.exc import RequestError
+from utils.retry import ExponentialBackoffRetryPolicy, RetryBudget, parse_retry_after, retry
+
+
+class UpperBound:
+    """random с максимальным jitter: uniform всегда отдает верхнюю границу"""
+
+    @staticmethod
+    def uniform(_a: float, b: float) -> float:
+        return b
+
+
+class NoJitter:
+    @staticmethod
+    def uniform(a: float, _b: float) -> float:
+        return a
+
+
+def patch_clock(monkeypatch, jitter=UpperBound) -> tuple[FakeClock, FakeAsyncio]:
+    clock = FakeClock()
+    fake_asyncio = FakeAsyncio(clock)
+    monkeypatch.setattr(retry_module, "time", clock)
+    monkeypatch.setattr(retry_module, "asyncio", fake_asyncio)
+    monkeypatch.setattr(retry_module, "random", jitter)
+    return clock, fake_asyncio
+
+
+class Failing:
+    """Падает ошибками из errors по очереди, затем отвечает ok"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def status_error(status_code: int, retry_after: str | None = None) -> RequestError:
+    headers = {"Retry-After": retry_after} if retry_after is not None else None
+    return RequestError(f"Request failed with status code {status_code}", status_code=status_code, headers=headers)
+
+
+def run(policy: ExponentialBackoffRetryPolicy, func: Failing) -> object:
+    try:
+        return asyncio.run(retry(policy, func))
+    except Exception as e:
+        return e
+
+
+def test_only_throttling_server_and_transport_errors_are_retryable():
+    assert ExponentialBackoffRetryPolicy.is_retryable(status_error(429))
+    assert ExponentialBackoffRetryPolicy.is_retryable(status_error(500))
+    assert ExponentialBackoffRetryPolicy.is_retryable(status_error(503))
+    assert ExponentialBackoffRetryPolicy.is_retryable(httpx.ConnectError("refused"))
+    assert ExponentialBackoffRetryPolicy.is_retryable(TimeoutError())
+    for status_code in (400, 401, 404, 409, 422):
+        assert not ExponentialBackoffRetryPolicy.is_retryable(status_error(status_code))
+
+
+def test_client_error_is_not_retried(monkeypatch):
+    _, fake_asyncio = patch_clock(monkeypatch)
+    error = status_error(404)
+    func = Failing(error)
+
+    assert run(ExponentialBackoffRetryPolicy(max_retries=3), func) is error
+    assert func.calls == 1
+    assert fake_asyncio.sleeps == []
+
+
+def test_backoff_doubles_up_to_max_delay(monkeypatch):
+    _, fake_asyncio = patch_clock(monkeypatch)
+    func = Failing(*(status_error(503) for _ in range(4)))
+
+    result = run(ExponentialBackoffRetryPolicy(max_retries=4, base_delay=1, max_delay=5), func)
+
+    assert result == "ok"
+    assert fake_asyncio.sleeps == [1, 2, 4, 5]
+
+
+def test_jitter_stays_within_bounds(monkeypatch):
+    _, fake_asyncio = patch_clock(monkeypatch, jitter=random.Random(7))
+    func = Failing(*(httpx.ReadTimeout("timeout") for _ in range(5)))
+
+    assert run(ExponentialBackoffRetryPolicy(max_retries=5, base_delay=1, max_delay=8), func) == "ok"
+    for retry_number, delay in enumerate(fake_asyncio.sleeps, start=1):
+        assert 0 <= delay <= min(8, 2 ** (retry_number - 1))
+
+
+def test_gives_up_with_original_error_after_max_retries(monkeypatch):
+    _, fake_asyncio = patch_clock(monkeypatch)
+    last = status_error(502)
+    func = Failing(status_error(500), status_error(503), last)
+
+    assert run(ExponentialBackoffRetryPolicy(max_retries=2, base_delay=1), func) is last
+    assert func.calls == 3
+    assert len(fake_asyncio.sleeps) == 2
+
+
+def test_retry_after_sets_minimum_delay(monkeypatch):
+    _, fake_asyncio = patch_clock(monkeypatch, jitter=NoJitter)
+    func = Failing(status_error(429, retry_after="3"))
+
+    assert run(ExponentialBackoffRetryPolicy(max_retries=1, base_delay=1, max_delay=10), func) == "ok"
+    assert fake_asyncio.sleeps == [3]
+
+
+def test_retry_after_above_max_delay_fails_fast(monkeypatch):
+    _, fake_asyncio = patch_clock(monkeypatch)
+    error = status_error(503, retry_after="60")
+    func = Failing(error)
+
+    assert run(ExponentialBackoffRetryPolicy(max_retries=3, max_delay=10), func) is error
+    assert fake_asyncio.sleeps == []
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_budget_refills_over_time(monkeypatch):
+    clock, _ = patch_clock(monkeypatch)
+    budget = RetryBudget(rate=0.5, capacity=2)
+
+    assert budget.try_acquire()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    clock.advance(1)
+    assert not budget.try_acquire()
+    clock.advance(1)
+    assert budget.try_acquire()
+    # за простой токены не копятся сверх capacity
+    clock.advance(100)
+    assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+    assert budget.exhausted == 3
+
+
+def test_exhausted_budget_stops_retries(monkeypatch):
+    _, fake_asyncio = patch_clock(monkeypatch)
+    budget = RetryBudget(rate=0, capacity=1)
+    policy = ExponentialBackoffRetryPolicy(max_retries=5, base_delay=1, budget=budget)
+    last = status_error(503)
+    func = Failing(status_error(503), last)
+
+    assert run(policy, func) is last
+    assert func.calls == 2
+    assert fake_asyncio.sleeps == [1]
+    assert budget.exhausted == 1
@@ -0,0 +1,89 @@
+import asyncio
+from contextlib import suppress
+
+from api.clients import scan_clients
+from dtos.rw_schema import GetAllUsersResponseSchema
+from enums import ClientStatus
+from tests.fakes import NOW, FakeRemnawaveClient, make_user
+
+PAGE_SIZE = 3
+
+
+class GatedRemnawaveClient(FakeRemnawaveClient):
+    """Страницы с start >= gate_from ждут бесконечно, страница fail_start падает"""
+
+    def __init__(self, *args, gate_from: int, fail_start: int | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gate_from = gate_from
+        self.fail_start = fail_start
+        self.cancelled: list[int] = []
+
+    async def list_users(self, size: int = 500, start: int = 0) -> GetAllUsersResponseSchema:
+        if start == self.fail_start:
+            raise RuntimeError("page failed")
+        if start >= self.gate_from:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(start)
+                raise
+        return await super().list_users(size, start)
+
+
+class ReversedRemnawaveClient(FakeRemnawaveClient):
+    """Дальние страницы отвечают раньше ближних"""
+
+    async def list_users(self, size: int = 500, start: int = 0) -> GetAllUsersResponseSchema:
+        await asyncio.sleep(0.001 * (len(self.users) - start) / size)
+        return await super().list_users(size, start)
+
+
+def make_users(count: int):
+    return [make_user(f"user{i}", status=ClientStatus.ACTIVE if i % 2 else ClientStatus.DISABLED) for i in range(count)]
+
+
+def other_tasks() -> set[asyncio.Task]:
+    return asyncio.all_tasks() - {asyncio.current_task()}
+
+
+def test_scan_keeps_upstream_order_with_offset_and_limit():
+    users = make_users(20)
+    rw = ReversedRemnawaveClient(users)
+
+    result = asyncio.run(
+        scan_clients(rw, NOW, ClientStatus.ACTIVE, None, offset=2, limit=5, concurrency=4, page_size=PAGE_SIZE)
+    )
+
+    active = [user.username for user in users if user.status == ClientStatus.ACTIVE]
+    assert [user.username for user in result] == active[2:7]
+
+
+def test_scan_cancels_pages_after_limit_is_reached():
+    rw = GatedRemnawaveClient(make_users(20), gate_from=2 * PAGE_SIZE)
+
+    async def scenario():
+        result = await scan_clients(rw, NOW, None, None, offset=1, limit=4, concurrency=10, page_size=PAGE_SIZE)
+        return result, other_tasks()
+
+    result, leftover = asyncio.run(scenario())
+
+    assert [user.username for user in result] == ["user1", "user2", "user3", "user4"]
+    assert sorted(rw.cancelled) == list(range(2 * PAGE_SIZE, 20, PAGE_SIZE))
+    assert leftover == set()
+
+
+def test_scan_page_failure_propagates_and_cancels_other_pages():
+    rw = GatedRemnawaveClient(make_users(20), gate_from=2 * PAGE_SIZE, fail_start=PAGE_SIZE)
+
+    async def scenario():
+        completed = False
+        with suppress(RuntimeError):
+            await scan_clients(rw, NOW, None, None, offset=0, limit=30, concurrency=10, page_size=PAGE_SIZE)
+            completed = True
+        return completed, other_tasks()
+
+    completed, leftover = asyncio.run(scenario())
+
+    assert completed is False
+    assert sorted(rw.cancelled) == list(range(2 * PAGE_SIZE, 20, PAGE_SIZE))
+    assert leftover == set()
@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+
+from enums import Method
+from utils.exc import RequestError
+from utils.request import ApiRequest
+from utils.single_flight import SingleFlight
+
+
+class GatedCall:
+    """Вызов, который ждет gate; считает запуски"""
+
+    def __init__(self, result: object = "ok", error: Exception | None = None):
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self) -> object:
+        self.calls += 1
+        await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight: SingleFlight[object] = SingleFlight()
+        call = GatedCall()
+        waiters = [asyncio.create_task(flight.do("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        call.gate.set()
+        return flight, call, await asyncio.gather(*waiters)
+
+    flight, call, results = asyncio.run(scenario())
+
+    assert results == ["ok", "ok", "ok"]
+    assert call.calls == 1
+    assert flight.coalesced == 2
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def scenario():
+        flight: SingleFlight[object] = SingleFlight()
+        call = GatedCall()
+        first = asyncio.create_task(flight.do("key", call))
+        second = asyncio.create_task(flight.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        call.gate.set()
+        return first, await second, call
+
+    first, result, call = asyncio.run(scenario())
+
+    assert first.cancelled()
+    assert result == "ok"
+    assert call.calls == 1
+
+
+def test_error_reaches_every_waiter():
+    async def scenario():
+        flight: SingleFlight[object] = SingleFlight()
+        call = GatedCall(error=RuntimeError("upstream down"))
+        waiters = [asyncio.create_task(flight.do("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        call.gate.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        # после ошибки ключ освобожден, следующий вызов идет заново
+        call.error = None
+        return results, await flight.do("key", call), call
+
+    results, retried, call = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "ok"
+    assert call.calls == 2
+
+
+def run_api_requests(*requests: tuple[Method, dict], status: int = 200) -> tuple[list[object], int]:
+    """Одновременные запросы через ApiRequest(single_flight=True): результаты и число запросов в апстрим"""
+    upstream: list[httpx.Request] = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            upstream.append(request)
+            await gate.wait()
+            return httpx.Response(status, json={"n": len(upstream)})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            api_request = ApiRequest(base_url="http://upstream", single_flight=True)
+            tasks = [
+                asyncio.create_task(api_request(method, "/api/users", dict, client=client, **kwargs))
+                for method, kwargs in requests
+            ]
+            await asyncio.sleep(0.01)
+            gate.set()
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    return results, len(upstream)
+
+
+def test_api_request_coalesces_identical_gets():
+    results, upstream = run_api_requests((Method.GET, {"params": {"size": 10}}), (Method.GET, {"params": {"size": 10}}))
+
+    assert upstream == 1
+    assert results[0] == results[1]
+
+
+def test_api_request_does_not_coalesce_different_params():
+    _, upstream = run_api_requests((Method.GET, {"params": {"size": 10}}), (Method.GET, {"params": {"size": 20}}))
+
+    assert upstream == 2
+
+
+def test_api_request_never_coalesces_writes_or_logged_requests():
+    _, upstream = run_api_requests((Method.POST, {}), (Method.POST, {}))
+    assert upstream == 2
+
+    _, upstream = run_api_requests((Method.GET, {"log_request": True}), (Method.GET, {"log_request": True}))
+    assert upstream == 2
+
+
+def test_api_request_error_reaches_every_coalesced_caller():
+    results, upstream = run_api_requests((Method.GET, {}), (Method.GET, {}), status=503)
+
+    assert upstream == 1
+    assert all(isinstance(result, RequestError) and result.status_code == 503 for result in results)
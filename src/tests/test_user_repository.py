@@ -0,0 +1,136 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from db.models.user import UserModel
+from dtos.rw_schema import RwUserItemSchema
+from enums import ClientStatus
+from repositories.user import UserRepository
+from tests.fakes import FakeResult, FakeSessionMixin, compile_pg
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class FakeUserRepository(FakeSessionMixin, UserRepository):
+    pass
+
+
+def make_user_model(username: str = "user") -> UserModel:
+    return UserModel(
+        uuid=uuid4(),
+        id=1,
+        short_uuid="short",
+        username=username,
+        status=ClientStatus.ACTIVE,
+        expire_at=NOW + timedelta(days=30),
+        created_at=NOW,
+        updated_at=NOW,
+        synced_at=NOW,
+    )
+
+
+def test_get_users_filters_and_paginates():
+    repository = FakeUserRepository(FakeResult([make_user_model("alice")]))
+
+    users = asyncio.run(repository.get_users(NOW, ClientStatus.ACTIVE, expired=True, limit=20, page=3))
+
+    assert [user.username for user in users] == ["alice"]
+    sql, params = compile_pg(repository.fake_session.statements[0])
+    assert "users.status = %(status_1)s" in sql
+    assert "users.expire_at < %(expire_at_1)s" in sql
+    assert "ORDER BY users.created_at DESC, users.uuid" in sql
+    assert params["status_1"] == ClientStatus.ACTIVE
+    assert params["expire_at_1"] == NOW
+    assert params["param_1"] == 20
+    assert params["param_2"] == 40
+
+
+def test_get_users_without_filters():
+    repository = FakeUserRepository()
+
+    asyncio.run(repository.get_users(NOW, None, expired=False, limit=10, page=1))
+
+    sql, _ = compile_pg(repository.fake_session.statements[0])
+    assert "users.status" not in sql.split("FROM")[1]
+    assert "users.expire_at >= %(expire_at_1)s" in sql
+
+
+def test_iter_users_uses_keyset_by_uuid():
+    first, second = make_user_model("a"), make_user_model("b")
+    repository = FakeUserRepository(FakeResult([first, second]), FakeResult())
+
+    async def collect():
+        return [page async for page in repository.iter_users(page_size=2)]
+
+    pages = asyncio.run(collect())
+
+    assert [[user.username for user in page] for page in pages] == [["a", "b"]]
+    first_sql, _ = compile_pg(repository.fake_session.statements[0])
+    next_sql, next_params = compile_pg(repository.fake_session.statements[1])
+    assert "WHERE" not in first_sql
+    assert "WHERE users.uuid > %(uuid_1)s::UUID ORDER BY users.uuid" in next_sql
+    assert next_params["uuid_1"] == second.uuid
+
+
+def test_search_users_short_query_uses_prefix_only():
+    repository = FakeUserRepository()
+
+    asyncio.run(repository.search_users("A_", limit=5))
+
+    sql, params = compile_pg(repository.fake_session.statements[0])
+    assert "ILIKE" not in sql
+    assert "lower(users.username) LIKE" in sql
+    assert params["lower_1"] == "a\\_%"
+
+
+def test_search_users_long_query_uses_substring():
+    repository = FakeUserRepository()
+
+    asyncio.run(repository.search_users("Bob%", limit=5))
+
+    sql, params = compile_pg(repository.fake_session.statements[0])
+    assert "users.username ILIKE %(username_1)s" in sql
+    assert params["username_1"] == "%bob\\%%"
+    assert "similarity(users.username" in sql
+
+
+def test_upsert_users_keeps_rows_written_after_sync_start():
+    repository = FakeUserRepository()
+
+    asyncio.run(repository.upsert_users([RwUserItemSchema.model_validate(make_user_model("carol"))], NOW))
+
+    sql, _ = compile_pg(repository.fake_session.statements[0])
+    assert "ON CONFLICT (uuid) DO UPDATE" in sql
+    assert "WHERE users.synced_at <= excluded.synced_at" in sql
+
+
+def test_upsert_users_skips_empty_batch():
+    repository = FakeUserRepository()
+
+    asyncio.run(repository.upsert_users([], NOW))
+
+    assert repository.fake_session.statements == []
+
+
+def test_get_missing_users_skips_seen_and_rows_written_after_sync_start():
+    seen, stale = uuid4(), uuid4()
+    repository = FakeUserRepository(FakeResult([seen, stale]))
+
+    missing = asyncio.run(repository.get_missing_users({seen}, NOW))
+
+    assert missing == {stale}
+    sql, params = compile_pg(repository.fake_session.statements[0])
+    assert "WHERE users.synced_at < %(synced_at_1)s" in sql
+    assert params["synced_at_1"] == NOW
+
+
+def test_update_users_extends_only_rows_not_refreshed_after_request():
+    repository = FakeUserRepository()
+    requested_at = NOW + timedelta(minutes=1)
+
+    asyncio.run(repository.update_users([uuid4()], requested_at, NOW + timedelta(minutes=2), extend_days=3))
+
+    sql, params = compile_pg(repository.fake_session.statements[0])
+    assert "expire_at=CASE WHEN (users.updated_at < %(updated_at_1)s) THEN users.expire_at + %(expire_at_1)s" in sql
+    assert params["updated_at_1"] == requested_at
+    assert params["expire_at_1"] == timedelta(days=3)
@@ -0,0 +1,256 @@
+import asyncio
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+from uuid import UUID, uuid4
+
+from abcs.clients.remnawave import ABCRemnawaveClient
+from abcs.listeners.user import ABCUserListener
+from abcs.repositories.user import ABCUserRepository
+from dtos.rw_schema import RwUserItemSchema
+from dtos.sync_state import SyncStateDTO
+from enums import ClientStatus
+from services.user_sync import UserSync
+from tests.fakes import FakeRemnawaveClient
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def make_user() -> RwUserItemSchema:
+    return RwUserItemSchema(
+        uuid=uuid4(),
+        id=1,
+        short_uuid="short",
+        username="user",
+        status=ClientStatus.ACTIVE,
+        expire_at=NOW,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+class FollowerRepository:
+    """Зеркало, которое синхронизирует другая реплика: sync_lock всегда занят"""
+
+    def __init__(self):
+        self.rows: dict[UUID, tuple[RwUserItemSchema, datetime]] = {}
+        self.state: SyncStateDTO | None = None
+        self.loads: list[datetime | None] = []
+
+    def synced(self, synced_at: datetime) -> None:
+        self.state = SyncStateDTO(name="users", watermark=NOW, synced_at=synced_at, rows=len(self.rows))
+
+    @asynccontextmanager
+    async def sync_lock(self, name: str = "users"):
+        yield False
+
+    async def get_sync_state(self, name: str = "users") -> SyncStateDTO | None:
+        return self.state
+
+    async def iter_users(self, page_size: int = 1000, synced_after: datetime | None = None):
+        self.loads.append(synced_after)
+        users = [user for user, synced_at in self.rows.values() if synced_after is None or synced_at > synced_after]
+        if users:
+            yield users
+
+
+class RecordingListener(ABCUserListener):
+    def __init__(self):
+        self.users: set[UUID] = set()
+
+    def on_users(self, users: list[RwUserItemSchema]) -> None:
+        self.users.update(user.uuid for user in users)
+
+    def on_updated(self, client_ids: list[UUID], status: Any = None, extend_days: int | None = None) -> None:
+        pass
+
+    def on_deleted(self, client_ids: list[UUID]) -> None:
+        self.users.difference_update(client_ids)
+
+    def on_synced(self, seen: set[UUID]) -> None:
+        self.users &= seen
+
+
+def make_follower(repository: FollowerRepository, full_every: int = 60) -> tuple[UserSync, RecordingListener]:
+    listener = RecordingListener()
+    sync = UserSync(
+        rw=cast(ABCRemnawaveClient, None),
+        user_repository=cast(ABCUserRepository, repository),
+        interval=60,
+        full_every=full_every,
+        listeners=[listener],
+    )
+    return sync, listener
+
+
+def test_follower_loads_only_rows_written_since_last_sync():
+    repository = FollowerRepository()
+    first = make_user()
+    repository.rows[first.uuid] = (first, NOW)
+    repository.synced(NOW)
+    sync, listener = make_follower(repository)
+
+    asyncio.run(sync.sync())
+    later = NOW + timedelta(minutes=1)
+    second = make_user()
+    repository.rows[second.uuid] = (second, later)
+    repository.synced(later)
+    asyncio.run(sync.sync())
+    # состояние не изменилось - зеркало не читается
+    asyncio.run(sync.sync())
+
+    assert repository.loads == [None, NOW]
+    assert listener.users == {first.uuid, second.uuid}
+    assert sync.synced_at == later
+
+
+def test_follower_reloads_when_users_were_deleted():
+    repository = FollowerRepository()
+    first = make_user()
+    second = make_user()
+    repository.rows = {first.uuid: (first, NOW), second.uuid: (second, NOW)}
+    repository.synced(NOW)
+    sync, listener = make_follower(repository)
+    asyncio.run(sync.sync())
+
+    del repository.rows[second.uuid]
+    later = NOW + timedelta(minutes=1)
+    repository.synced(later)
+    asyncio.run(sync.sync())
+
+    assert repository.loads == [None, NOW, None]
+    assert listener.users == {first.uuid}
+
+
+def test_follower_reloads_every_full_every_loads():
+    repository = FollowerRepository()
+    user = make_user()
+    repository.rows[user.uuid] = (user, NOW)
+    sync, _ = make_follower(repository, full_every=2)
+
+    for minute in range(4):
+        repository.synced(NOW + timedelta(minutes=minute))
+        asyncio.run(sync.sync())
+
+    assert repository.loads == [None, NOW, NOW + timedelta(minutes=1), None]
+
+
+class MirrorRepository(FollowerRepository):
+    """Зеркало на реплике, которая держит sync_lock и сама синхронизирует"""
+
+    def __init__(self, users: list[RwUserItemSchema]):
+        super().__init__()
+        self.rows = {user.uuid: (user, NOW) for user in users}
+        self.upserted: list[UUID] = []
+
+    @asynccontextmanager
+    async def sync_lock(self, name: str = "users"):
+        yield True
+
+    async def upsert_users(self, users: list[RwUserItemSchema], synced_at: datetime) -> None:
+        for user in users:
+            self.rows[user.uuid] = (user, synced_at)
+            self.upserted.append(user.uuid)
+
+    async def get_existing_users(self, client_ids: list[UUID]) -> set[UUID]:
+        return set(client_ids) & self.rows.keys()
+
+    async def get_missing_users(self, seen: set[UUID], synced_before: datetime) -> set[UUID]:
+        return {uuid for uuid, (_, synced_at) in self.rows.items() if synced_at < synced_before} - seen
+
+    async def delete_users(self, client_ids: list[UUID]) -> None:
+        for client_id in client_ids:
+            del self.rows[client_id]
+
+    async def save_sync_state(self, watermark: datetime | None, synced_at: datetime, rows: int, name: str = "users"):
+        self.state = SyncStateDTO(name=name, watermark=watermark, synced_at=synced_at, rows=rows)
+
+
+class ShiftingRemnawaveClient(FakeRemnawaveClient):
+    """Если задан change, после первой страницы список в RemnaWave меняется, и следующие страницы сдвигаются"""
+
+    def __init__(self, users: list[RwUserItemSchema]):
+        super().__init__(users)
+        self.change: Callable[[list[RwUserItemSchema]], None] | None = None
+
+    async def list_users(self, size: int = 500, start: int = 0):
+        res = await super().list_users(size, start)
+        if self.change is not None:
+            self.change(self.users)
+            self.change = None
+        return res
+
+
+def make_leader(rw: FakeRemnawaveClient, repository: MirrorRepository) -> tuple[UserSync, RecordingListener]:
+    listener = RecordingListener()
+    sync = UserSync(
+        rw=rw,
+        user_repository=cast(ABCUserRepository, repository),
+        interval=60,
+        page_size=2,
+        listeners=[listener],
+    )
+    return sync, listener
+
+
+def drop_first(current: list[RwUserItemSchema]) -> None:
+    del current[0]
+
+
+def test_page_shift_does_not_delete_live_users():
+    users = [make_user() for _ in range(4)]
+    rw = ShiftingRemnawaveClient(users)
+    repository = MirrorRepository(users)
+    sync, listener = make_leader(rw, repository)
+    asyncio.run(sync.sync())
+    rw.change = drop_first
+
+    # первый пользователь удален после первой страницы, третий уехал на нее и в проход не попал
+    asyncio.run(sync.sync())
+    assert set(repository.rows) == {user.uuid for user in users}
+    assert sync.stats.deleted == 0
+
+    asyncio.run(sync.sync())
+    assert set(repository.rows) == {user.uuid for user in users[1:]}
+    assert listener.users == {user.uuid for user in users[1:]}
+    assert sync.stats.deleted == 1
+
+
+def test_page_shift_with_same_total_rechecks_candidates():
+    users = [make_user() for _ in range(4)]
+
+    def replace_first(current: list[RwUserItemSchema]) -> None:
+        drop_first(current)
+        current.append(make_user())
+
+    rw = ShiftingRemnawaveClient(users)
+    repository = MirrorRepository(users)
+    sync, listener = make_leader(rw, repository)
+    asyncio.run(sync.sync())
+    rw.change = replace_first
+
+    # total не изменился, но третий пользователь уехал на первую страницу и в проход не попал
+    asyncio.run(sync.sync())
+    assert users[2].uuid in repository.rows
+    assert users[2].uuid in listener.users
+    assert sync.stats.deleted == 0
+
+    asyncio.run(sync.sync())
+    assert users[0].uuid not in repository.rows
+    assert sync.stats.deleted == 1
+
+
+def test_incremental_pass_restores_rows_missing_from_mirror():
+    users = [make_user() for _ in range(3)]
+    rw = FakeRemnawaveClient(users)
+    repository = MirrorRepository(users)
+    sync, _ = make_leader(rw, repository)
+    asyncio.run(sync.sync())
+    del repository.rows[users[1].uuid]
+    repository.upserted.clear()
+
+    asyncio.run(sync.sync())
+
+    assert repository.upserted == [users[1].uuid]
+    assert set(repository.rows) == {user.uuid for user in users}
@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+MISSING: Any = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class TTLCache[K, V]:
+    """Ограниченный LRU кэш, записи которого живут ttl секунд"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V:
+        """Возвращает MISSING, если записи нет или она устарела"""
+        item = self._data.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return MISSING
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            # устаревшая запись остается до вытеснения, см. get_stale
+            self.stats.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def get_stale(self, key: K) -> V:
+        """Запись без учета TTL, например когда апстрим недоступен"""
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+        self.stats.stale_hits += 1
+        return item[1]
+
+    def peek(self, key: K) -> tuple[float, V] | None:
+        """Свежая запись вместе с моментом устаревания (time.monotonic), без учета в статистике"""
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return None
+        return item
+
+    def set(self, key: K, value: V, expires_at: float | None = None) -> None:
+        """expires_at - момент устаревания по time.monotonic, по умолчанию через ttl"""
+        self._data[key] = (time.monotonic() + self.ttl if expires_at is None else expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def delete(self, key: K) -> None:
+        if self._data.pop(key, None) is not None:
+            self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self._data.clear()
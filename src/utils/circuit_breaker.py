@@ -0,0 +1,172 @@
+import logging
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+from typing import Protocol
+
+import httpx
+
+from enums import CircuitState, Method
+
+from .exc import CircuitOpenError, RequestError
+
+logger = logging.getLogger(__name__)
+
+
+def is_failure(exc: BaseException) -> bool:
+    """4xx означает, что апстрим жив и ответил, на состояние не влияет"""
+    if isinstance(exc, RequestError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, httpx.TransportError | TimeoutError)
+
+
+@dataclass
+class CircuitBreakerStats:
+    successes: int = 0
+    failures: int = 0
+    rejected: int = 0
+    opened: int = 0
+
+
+class CircuitBreaker:
+    """
+    Размыкается после failure_threshold ошибок подряд или если за window секунд доля ошибок
+    не меньше error_rate_threshold (при минимум min_requests запросах).
+    Разомкнутый сразу отвечает CircuitOpenError, через recovery_timeout пропускает half_open_max_calls
+    пробных запросов: успех замыкает, ошибка снова размыкает
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        error_rate_threshold: float = 0.5,
+        window: float = 30,
+        min_requests: int = 20,
+        recovery_timeout: float = 10,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.window = window
+        self.min_requests = min_requests
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitState.CLOSED
+        self.stats = CircuitBreakerStats()
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        # (время, ошибка ли) за последние window секунд
+        self._calls: deque[tuple[float, bool]] = deque()
+
+    @property
+    def error_rate(self) -> float:
+        self._trim(time.monotonic())
+        if not self._calls:
+            return 0
+        return sum(failed for _, failed in self._calls) / len(self._calls)
+
+    def before_call(self) -> None:
+        now = time.monotonic()
+        if self.state == CircuitState.OPEN:
+            retry_after = self._opened_at + self.recovery_timeout - now
+            if retry_after > 0:
+                self.stats.rejected += 1
+                raise CircuitOpenError(self.name, retry_after)
+            self._set_state(CircuitState.HALF_OPEN)
+            self._half_open_calls = 0
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.stats.rejected += 1
+                raise CircuitOpenError(self.name, self.recovery_timeout)
+            self._half_open_calls += 1
+
+    def record_success(self) -> None:
+        self.stats.successes += 1
+        self._consecutive_failures = 0
+        self._record(failed=False)
+        if self.state == CircuitState.HALF_OPEN:
+            self._calls.clear()
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        self.stats.failures += 1
+        self._consecutive_failures += 1
+        self._record(failed=True)
+        if self.state == CircuitState.HALF_OPEN or (
+            self.state == CircuitState.CLOSED
+            and (
+                self._consecutive_failures >= self.failure_threshold
+                or (len(self._calls) >= self.min_requests and self.error_rate >= self.error_rate_threshold)
+            )
+        ):
+            self._open()
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        self.before_call()
+        try:
+            yield
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # отмена: пробный запрос не состоялся, освобождаем место
+            if self.state == CircuitState.HALF_OPEN:
+                self._half_open_calls -= 1
+            raise
+        else:
+            self.record_success()
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self.stats.opened += 1
+        self._set_state(CircuitState.OPEN)
+
+    def _set_state(self, state: CircuitState) -> None:
+        if state != self.state:
+            logger.warning("Circuit breaker %s: %s -> %s", self.name, self.state.value, state.value)
+            self.state = state
+
+    def _record(self, failed: bool) -> None:
+        now = time.monotonic()
+        self._calls.append((now, failed))
+        self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+
+class CircuitBreakerProtocol(Protocol):
+    circuit_breakers: dict[str, CircuitBreaker]
+
+
+def breaker_group(method: Method) -> str:
+    return "read" if method == Method.GET else "write"
+
+
+def with_circuit_breaker(request_func):
+    """
+    Оборачивает каждую попытку запроса (ставится под can_retry).
+    Группа берется из kwargs breaker_group, по умолчанию read для GET и write для остальных
+    """
+
+    @wraps(request_func)
+    async def wrapper(obj: CircuitBreakerProtocol, method: Method, *args, **kwargs):
+        group = kwargs.pop("breaker_group", None) or breaker_group(method)
+        breaker = obj.circuit_breakers.get(group)
+        if breaker is None:
+            return await request_func(obj, method, *args, **kwargs)
+        with breaker.guard():
+            return await request_func(obj, method, *args, **kwargs)
+
+    return wrapper
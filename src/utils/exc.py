@@ -1,3 +1,6 @@
+from collections.abc import Mapping
+
+
 class RequestError(Exception):
     def __init__(
         self,
@@ -5,13 +8,55 @@ class RequestError(Exception):
         *,
         status_code: int,
         body: str | bytes | None = None,
+        encoding: str = "utf-8",
+        headers: Mapping[str, str] | None = None,
     ):
-        self.body = body
+        self._body = body
+        self.headers = headers or {}
+        self._encoding = encoding
         self.status_code = status_code
         super().__init__(message)
 
+    @property
+    def body(self) -> str | None:
+        # тело ошибки декодируется только при обращении
+        if isinstance(self._body, bytes):
+            self._body = self._body.decode(self._encoding, errors="replace")
+        return self._body
+
 
 class NotFoundError(Exception):
     def __init__(self, message: str = "Not found"):
         self.message = message
         super().__init__(message)
+
+
+class BadRequestError(Exception):
+    def __init__(self, message: str = "Bad request"):
+        self.message = message
+        super().__init__(message)
+
+
+class ConflictError(Exception):
+    def __init__(self, message: str = "Conflict"):
+        self.message = message
+        super().__init__(message)
+
+
+class UnprocessableEntityError(Exception):
+    def __init__(self, message: str = "Unprocessable entity"):
+        self.message = message
+        super().__init__(message)
+
+
+class ServiceUnavailableError(Exception):
+    def __init__(self, message: str = "Service unavailable"):
+        self.message = message
+        super().__init__(message)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit breaker {name} is open")
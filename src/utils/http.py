@@ -0,0 +1,80 @@
+"""Общий на процесс пул HTTP соединений"""
+
+import importlib.util
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# клиенты по значению verify, чтобы запросы без явного client не открывали новое соединение
+_clients: dict[bool, httpx.AsyncClient] = {}
+
+
+def create_http_client(verify: bool = True) -> httpx.AsyncClient:
+    http2 = settings.HTTP2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2 is enabled but h2 is not installed (httpx[http2]), falling back to HTTP/1.1")
+        http2 = False
+    return httpx.AsyncClient(
+        verify=verify,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            read=settings.HTTP_READ_TIMEOUT,
+            write=settings.HTTP_WRITE_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT,
+        ),
+    )
+
+
+def get_http_client(verify: bool = True) -> httpx.AsyncClient:
+    client = _clients.get(verify)
+    if client is None or client.is_closed:
+        client = _clients[verify] = create_http_client(verify)
+    return client
+
+
+async def close_http_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def shared_http_client(verify: bool = True) -> AsyncIterator[httpx.AsyncClient]:
+    """Создает общий клиент на время жизни приложения и закрывает все пулы на выходе"""
+    client = get_http_client(verify)
+    try:
+        yield client
+    finally:
+        await close_http_clients()
+
+
+def pool_stats(client: httpx.AsyncClient) -> dict[str, int]:
+    """Загрузка пула httpcore: публичного API у httpx для этого нет, поэтому читаем внутренности бережно"""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    requests = list(getattr(pool, "_requests", []))
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {
+        "max_connections": getattr(pool, "_max_connections", settings.HTTP_MAX_CONNECTIONS),
+        "connections": len(connections),
+        "active": len(connections) - idle,
+        "idle": idle,
+        "queued": sum(1 for request in requests if getattr(request, "is_queued", lambda: False)()),
+    }
+
+
+def all_pool_stats() -> dict[str, dict[str, int]]:
+    return {f"verify={verify}": pool_stats(client) for verify, client in _clients.items()}
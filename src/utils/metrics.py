@@ -0,0 +1,273 @@
+"""
+Метрики в текстовом формате Prometheus без внешних зависимостей.
+Дочерние серии с метками создаются один раз и кэшируются, на горячем пути только поиск по кортежу меток
+"""
+
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Coroutine, Iterable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+Sample = tuple[dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric[C]:
+    type_: str
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], C] = {}
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_}"]
+
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class GaugeChild(CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _Value[C: CounterChild](_Metric[C]):
+    child_type: type[C]
+
+    def labels(self, *values: str) -> C:
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self.child_type()
+        return child
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def expose(self) -> list[str]:
+        lines = self.header()
+        for values, child in self._children.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {child.value}")
+        return lines
+
+
+class Counter(_Value[CounterChild]):
+    type_ = "counter"
+    child_type = CounterChild
+
+
+class Gauge(_Value[GaugeChild]):
+    type_ = "gauge"
+    child_type = GaugeChild
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # последний элемент - +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric[HistogramChild]):
+    type_ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def labels(self, *values: str) -> HistogramChild:
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = HistogramChild(self.buckets)
+        return child
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def expose(self) -> list[str]:
+        lines = self.header()
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), child.counts, strict=True):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {child.sum}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {child.count}")
+        return lines
+
+
+class CallbackMetric:
+    """Значения собираются в момент выдачи /metrics из уже существующих счетчиков (stats объектов)"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Sample]],
+        type_: str = "gauge",
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.type_ = type_
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_}"]
+        for labels, value in self.callback():
+            names = tuple(labels)
+            lines.append(f"{self.name}{_labels(names, tuple(labels[name] for name in names))} {float(value)}")
+        return lines
+
+
+def timed[**P, R](
+    histogram: Histogram, *labels: str
+) -> Callable[[Callable[P, Coroutine[Any, Any, R]]], Callable[P, Coroutine[Any, Any, R]]]:
+    """Декоратор для async функций, серия с метками выбирается один раз при декорировании"""
+    child = histogram.labels(*labels)
+
+    def decorator(func: Callable[P, Coroutine[Any, Any, R]]) -> Callable[P, Coroutine[Any, Any, R]]:
+        @wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with child.time():
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram | CallbackMetric] = {}
+
+    def register[M: Counter | Gauge | Histogram | CallbackMetric](self, metric: M) -> M:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# status_code // 100 -> метка, чтобы не собирать строку на каждый ответ
+STATUS_CLASSES = ("1xx", "1xx", "2xx", "3xx", "4xx", "5xx")
+
+upstream_request_duration = registry.register(
+    Histogram(
+        "remnawave_request_duration_seconds",
+        "Latency of RemnaWave requests per attempt",
+        ("method", "path"),
+    )
+)
+upstream_requests = registry.register(
+    Counter("remnawave_requests_total", "RemnaWave responses by status class", ("method", "path", "status"))
+)
+upstream_in_flight = registry.register(Gauge("remnawave_in_flight_requests", "RemnaWave requests in flight"))
+request_retries = registry.register(Counter("request_retries_total", "Request attempts retried by utils.retry"))
+response_parse_duration = registry.register(
+    Histogram(
+        "remnawave_response_parse_seconds",
+        "Time spent validating RemnaWave responses",
+        ("schema",),
+        buckets=FAST_BUCKETS,
+    )
+)
+db_query_duration = registry.register(
+    Histogram("db_query_duration_seconds", "Repository call latency", ("repository", "operation"))
+)
+http_request_duration = registry.register(
+    Histogram("http_request_duration_seconds", "Latency of API endpoints", ("method", "route", "status"))
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: время ответа по шаблону роута, а не по конкретному пути"""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_duration.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                STATUS_CLASSES[min(status_code // 100, 5)],
+            ).observe(time.perf_counter() - started)
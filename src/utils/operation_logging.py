@@ -1,4 +1,5 @@
-import json
+from datetime import UTC, datetime
+from typing import Any
 from uuid import UUID
 
 from httpx import Response
@@ -7,28 +8,56 @@ from abcs.repositories.operation import ABCOperationRepository
 from config import settings
 from enums import Method
 from utils.deps import get_dep
+from utils.operation_writer import OperationWriter
+from utils.request_context import idempotency_key_var
+from utils.tracing import start_span
 
 
 async def log_operation(
-    client_id: UUID,
+    client_id: UUID | list[UUID],
     response: Response,
+    payload: dict[str, Any] | None = None,
 ):
+    """
+    payload - json запроса в исходном виде, чтобы не разбирать заново тело запроса.
+    Для bulk запросов client_id - список, на каждого клиента пишется своя строка
+    """
     request = response.request
 
     path = str(request.url).removeprefix(settings.REMNAWAVE_URL)
     method = Method(request.method)
-    payload = json.loads(request.content) if request.content else {}
+    payload = payload or {}
     status_code = response.status_code
     error = response.text if response.is_error else None
+    # время операции, а не записи пачки в БД
+    created_at = datetime.now(UTC)
+    idempotency_key = idempotency_key_var.get()
 
-    repo = get_dep(ABCOperationRepository)
-    await repo.create_operation(
+    client_ids = [client_id]
+    if isinstance(client_id, list):
+        client_ids = client_id
+        # список uuid в каждой строке не нужен, строка и так привязана к клиенту
+        payload = {key: value for key, value in payload.items() if key != "uuids"}
+    operations_data = [
         {
-            "client_id": client_id,
+            "client_id": operation_client_id,
             "path": path,
             "method": method,
             "payload": payload,
             "status_code": status_code,
             "error": error,
+            "created_at": created_at,
+            "idempotency_key": idempotency_key,
         }
-    )
+        for operation_client_id in client_ids
+    ]
+
+    with start_span("log_operation", rows=len(operations_data)):
+        writer: OperationWriter | None = get_dep(OperationWriter)
+        if writer:
+            for operation_data in operations_data:
+                await writer.put(operation_data)
+            return
+
+        repo = get_dep(ABCOperationRepository)
+        await repo.create_operations(operations_data)
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from abcs.repositories.operation import ABCOperationRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OperationWriterStats:
+    enqueued: int = 0
+    written: int = 0
+    failed: int = 0
+    # сколько раз log_operation ждал места в заполненной очереди
+    blocked: int = 0
+    batches: int = 0
+    last_batch_size: int = 0
+    last_flush_seconds: float = 0
+
+
+class OperationWriter:
+    """
+    Фоновая запись аудита операций пачками, чтобы запрос клиента не ждал INSERT.
+    Неудачная пачка повторяется retries раз с экспоненциальной задержкой, затем пишется по строке:
+    потерянными считаются только строки, которые не записались и так
+    """
+
+    def __init__(
+        self,
+        repository: ABCOperationRepository,
+        max_queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        retries: int = 3,
+        retry_delay: float = 0.5,
+    ):
+        self.repository = repository
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.stats = OperationWriterStats()
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=max_queue_size)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, operation_data: dict[str, Any]) -> None:
+        try:
+            try:
+                self._queue.put_nowait(operation_data)
+            except asyncio.QueueFull:
+                self.stats.blocked += 1
+                logger.warning("Operations queue is full (%s), waiting for writer", self._queue.maxsize)
+                await self._queue.put(operation_data)
+        except asyncio.QueueShutDown:
+            # writer уже остановлен или остановился, пока ждали места в очереди, пишем напрямую
+            await self._flush([operation_data])
+            return
+        self.stats.enqueued += 1
+
+    async def close(self) -> None:
+        """Дописывает все, что осталось в очереди"""
+        self._queue.shutdown()
+        if self._task:
+            await self._task
+        logger.info("Operations writer stopped: %s", self.stats)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        closed = False
+        while not closed:
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except TimeoutError:
+                        break
+            except asyncio.QueueShutDown:
+                closed = True
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list[dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        written = await self._write(batch)
+        self.stats.written += written
+        self.stats.failed += len(batch) - written
+        self.stats.batches += 1
+        self.stats.last_batch_size = len(batch)
+        self.stats.last_flush_seconds = time.perf_counter() - started
+
+    async def _write(self, batch: list[dict[str, Any]]) -> int:
+        """Сколько строк записано"""
+        for attempt in range(self.retries + 1):
+            try:
+                await self.repository.create_operations(batch)
+                return len(batch)
+            except Exception:
+                if attempt == self.retries:
+                    logger.exception("Failed to write %s operations, writing them one by one", len(batch))
+                    break
+                logger.warning("Failed to write %s operations, retrying", len(batch), exc_info=True)
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+        if len(batch) == 1:
+            return 0
+        # одна некорректная строка не должна терять всю пачку
+        written = 0
+        for operation_data in batch:
+            try:
+                await self.repository.create_operations([operation_data])
+            except Exception:
+                logger.exception("Failed to write operation for client %s", operation_data.get("client_id"))
+            else:
+                written += 1
+        return written
@@ -0,0 +1,21 @@
+import base64
+import binascii
+from datetime import datetime
+from uuid import UUID
+
+from .exc import BadRequestError
+
+
+def encode_cursor(created_at: datetime, id_: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{id_}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Курсор непрозрачен для клиента: base64 от (created_at, id) последней строки страницы"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id_ = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(id_)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise BadRequestError("Invalid cursor") from e
@@ -1,5 +1,8 @@
+from functools import cache
+from typing import Any
+
 from pydantic import BaseModel as DefaultModel
-from pydantic import ConfigDict
+from pydantic import ConfigDict, TypeAdapter
 from pydantic.alias_generators import to_camel
 
 
@@ -13,3 +16,9 @@ class BaseModel(DefaultModel):
 
 class BaseSchemaModel(BaseModel):
     model_config = ConfigDict(alias_generator=to_camel)
+
+
+@cache
+def get_type_adapter(tp: Any) -> TypeAdapter:
+    """TypeAdapter строится один раз на тип, сборка core schema дорогая"""
+    return TypeAdapter(tp)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import wraps
+from typing import Protocol
+
+from enums import Method
+
+
+class AsyncTokenBucket:
+    """rate токенов в секунду, не больше capacity про запас. Ожидающие обслуживаются по очереди"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Возвращает, сколько секунд пришлось ждать"""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - started
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class RateLimiterStats:
+    acquired: int = 0
+    # сколько запросов ждали токен
+    throttled: int = 0
+    wait_seconds: float = 0
+    in_flight: int = 0
+
+
+class RateLimiter:
+    """Ограничение частоты (token bucket) и числа одновременных запросов. 0 - без ограничения"""
+
+    def __init__(self, name: str, rate: float = 0, burst: float = 1, max_in_flight: int = 0):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.stats = RateLimiterStats()
+        self._bucket = AsyncTokenBucket(rate, max(burst, 1)) if rate > 0 else None
+        self._semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        started = time.monotonic()
+        if self._semaphore:
+            await self._semaphore.acquire()
+        try:
+            if self._bucket:
+                await self._bucket.acquire()
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                self.stats.throttled += 1
+                self.stats.wait_seconds += waited
+            self.stats.acquired += 1
+            self.stats.in_flight += 1
+            try:
+                yield
+            finally:
+                self.stats.in_flight -= 1
+        finally:
+            if self._semaphore:
+                self._semaphore.release()
+
+
+class RateLimitProtocol(Protocol):
+    rate_limiters: dict[str, RateLimiter]
+
+
+def rate_limit_group(method: Method) -> str:
+    return "read" if method == Method.GET else "write"
+
+
+def with_rate_limit(request_func):
+    """Каждая попытка запроса ждет свой слот: повтор тоже расходует бюджет"""
+
+    @wraps(request_func)
+    async def wrapper(obj: RateLimitProtocol, method: Method, *args, **kwargs):
+        limiter = obj.rate_limiters.get(rate_limit_group(method))
+        if limiter is None:
+            return await request_func(obj, method, *args, **kwargs)
+        async with limiter.slot():
+            return await request_func(obj, method, *args, **kwargs)
+
+    return wrapper
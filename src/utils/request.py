@@ -1,18 +1,38 @@
 import logging
+import time
 from typing import Any
 from uuid import UUID
 
 import httpx
-from pydantic import TypeAdapter
 
 from enums import Method
 
+from .circuit_breaker import CircuitBreaker, with_circuit_breaker
 from .exc import RequestError
+from .http import get_http_client
+from .metrics import (
+    STATUS_CLASSES,
+    response_parse_duration,
+    upstream_in_flight,
+    upstream_request_duration,
+    upstream_requests,
+)
 from .operation_logging import log_operation
+from .pydantic_utils import get_type_adapter
+from .rate_limit import RateLimiter, with_rate_limit
 from .retry import ABCRetryPolicy, NotRetryPolicy, can_retry
+from .single_flight import SingleFlight
+from .tracing import propagation_headers, start_span
 
 logger = logging.getLogger(__name__)
 
+# запросы, которые безопасно объединять в один
+IDEMPOTENT_METHODS = frozenset({Method.GET})
+
+
+def _freeze(d: dict | None) -> tuple | None:
+    return tuple(sorted(d.items())) if d else None
+
 
 class BareRequest:
     async def __call__(
@@ -36,17 +56,15 @@ class BareRequest:
             **kwargs,
         }
 
-        if not session_kwargs:
-            session_kwargs = {}
-        session_kwargs |= {"verify": ssl_verify}
         try:
-            if client:
-                res = await client.request(**_request_kwargs)  # pyrefly: ignore
-                return res
-            else:
-                async with httpx.AsyncClient(**session_kwargs) as client:
+            if client is None and session_kwargs:
+                # особые настройки клиента, общий пул не подходит
+                async with httpx.AsyncClient(**(session_kwargs | {"verify": ssl_verify})) as client:
                     res = await client.request(**_request_kwargs)  # pyrefly: ignore
                     return res
+            client = client or get_http_client(ssl_verify)
+            res = await client.request(**_request_kwargs)  # pyrefly: ignore
+            return res
         except httpx.TimeoutException:
             logger.error("Request %s %s timeout", method, url)
             raise
@@ -58,20 +76,62 @@ class ApiRequest:
         headers: dict | None = None,
         base_url: str | None = None,
         retry_policy: ABCRetryPolicy = NotRetryPolicy(),
+        single_flight: bool = False,
+        circuit_breakers: dict[str, CircuitBreaker] | None = None,
+        rate_limiters: dict[str, RateLimiter] | None = None,
     ):
         self.retry_policy = retry_policy
+        self.circuit_breakers = circuit_breakers or {}
+        self.rate_limiters = rate_limiters or {}
         self.headers = headers or {}
         self.base_url = base_url
         self.bare_request = BareRequest()
+        self.single_flight = single_flight
+        self._flight: SingleFlight[Any] = SingleFlight()
+
+    @property
+    def coalesced(self) -> int:
+        """Сколько запросов не ушло в апстрим, а дождалось результата такого же запроса"""
+        return self._flight.coalesced
 
-    @can_retry
     async def __call__(
         self,
         method: Method,
         url: str,
         response_type: Any | None,
+        single_flight: bool | None = None,
+        **kwargs,
+    ) -> Any:
+        """
+        single_flight: одновременные одинаковые GET (метод, url, params, headers) выполняются одним запросом,
+        результат или ошибку получают все. По умолчанию берется из конструктора
+        """
+        if single_flight is None:
+            single_flight = self.single_flight
+        if not single_flight or method not in IDEMPOTENT_METHODS or kwargs.get("log_request"):
+            return await self.request(method, url, response_type, **kwargs)
+
+        key = (
+            method,
+            url,
+            response_type,
+            _freeze(kwargs.get("path_params")),
+            _freeze(kwargs.get("params")),
+            _freeze(kwargs.get("headers")),
+        )
+        return await self._flight.do(key, lambda: self.request(method, url, response_type, **kwargs))
+
+    @can_retry
+    @with_circuit_breaker
+    @with_rate_limit
+    async def request(
+        self,
+        method: Method,
+        url: str,
+        response_type: Any | None,
+        path_params: dict | None = None,
         log_request: bool = False,
-        client_id: UUID | None = None,
+        client_id: UUID | list[UUID] | None = None,
         retry_policy: ABCRetryPolicy | None = None,
         has_response: bool = True,
         headers: dict | None = None,
@@ -82,23 +142,41 @@ class ApiRequest:
         session_kwargs: dict | None = None,
         **kwargs,
     ) -> Any:
+        """
+        url - шаблон пути, подставляются path_params. Шаблон же служит меткой метрик,
+        поэтому идентификаторы передаются через path_params, а не f-строкой
+        """
         if headers is None:
             headers = {}
+        path = url.format(**path_params) if path_params else url
 
-        res = await self.bare_request(
-            method=method,
-            url=f"{self.base_url}{url}" if self.base_url else url,
-            headers={**self.headers, **headers},
-            json=json,
-            params=params,
-            ssl_verify=ssl_verify,
-            client=client,
-            session_kwargs=session_kwargs,
-            **kwargs,
-        )
-        if res.is_success:
-            return await self._on_success(res, has_response, response_type, log_request, client_id)
-        return await self._on_fail(res, log_request, client_id)
+        with start_span("remnawave.request", **{"http.method": method, "http.route": url, "http.url": path}) as span:
+            headers = {**self.headers, **propagation_headers(), **headers}
+            latency = upstream_request_duration.labels(method, url)
+            upstream_in_flight.inc()
+            started = time.perf_counter()
+            try:
+                res = await self.bare_request(
+                    method=method,
+                    url=f"{self.base_url}{path}" if self.base_url else path,
+                    headers=headers,
+                    json=json,
+                    params=params,
+                    ssl_verify=ssl_verify,
+                    client=client,
+                    session_kwargs=session_kwargs,
+                    **kwargs,
+                )
+            finally:
+                upstream_in_flight.dec()
+                latency.observe(time.perf_counter() - started)
+            upstream_requests.labels(method, url, STATUS_CLASSES[min(res.status_code // 100, 5)]).inc()
+            if span is not None:
+                span.attributes["http.status_code"] = res.status_code
+
+            if res.is_success:
+                return await self._on_success(res, has_response, response_type, log_request, client_id, json)
+            return await self._on_fail(res, log_request, client_id, json)
 
     async def _on_success(
         self,
@@ -106,24 +184,34 @@ class ApiRequest:
         has_response: bool,
         response_type: Any,
         log_request: bool,
-        client_id: UUID | None,
+        client_id: UUID | list[UUID] | None,
+        payload: dict | None = None,
     ) -> Any:
         if log_request and client_id:
-            await log_operation(client_id, response)
+            await log_operation(client_id, response, payload)
         return self._parse_response(response, has_response, response_type)
 
-    async def _on_fail(self, response: httpx.Response, log_request: bool, client_id: UUID | None):
+    async def _on_fail(
+        self,
+        response: httpx.Response,
+        log_request: bool,
+        client_id: UUID | list[UUID] | None,
+        payload: dict | None = None,
+    ):
         if log_request and client_id:
-            await log_operation(client_id, response)
+            await log_operation(client_id, response, payload)
         raise RequestError(
             f"Request failed with status code {response.status_code}",
             status_code=response.status_code,
-            body=response.text,
+            body=response.content,
+            encoding=response.encoding or "utf-8",
+            headers=response.headers,
         )
 
     def _parse_response(self, response: httpx.Response, has_response: bool, response_type: Any) -> Any | None:
         if not has_response or response_type is None:
             return None
-        t = TypeAdapter(response_type)
-        res = t.validate_json(response.text)
+        t = get_type_adapter(response_type)
+        with response_parse_duration.labels(getattr(response_type, "__name__", "other")).time():
+            res = t.validate_json(response.content)
         return res
@@ -0,0 +1,14 @@
+"""Контекст входящего запроса, доступный из любого места обработки (в том числе в логах)"""
+
+import logging
+from contextvars import ContextVar
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+# Idempotency-Key изменяющего запроса, пишется в аудит операций
+idempotency_key_var: ContextVar[str | None] = ContextVar("idempotency_key", default=None)
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
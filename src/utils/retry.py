@@ -1,10 +1,17 @@
 import abc
 import asyncio
 import logging
+import random
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 from functools import wraps
 from typing import Protocol
 
+import httpx
+
 from .exc import RequestError
+from .metrics import request_retries
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +77,94 @@ class DelayConstRetryPolicy(MaxRetriesRetryPolicy):
         await asyncio.sleep(self.delay)
 
 
+class RetryBudget:
+    """
+    Token bucket на повторы, общий для всех запросов процесса: каждый повтор тратит токен,
+    токены пополняются со скоростью rate в секунду до capacity. Когда апстрим деградирует,
+    повторы быстро кончаются и не умножают нагрузку
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.exhausted = 0
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if self._tokens < 1:
+            self.exhausted += 1
+            return False
+        self._tokens -= 1
+        return True
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After в секундах или HTTP-дата"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ExponentialBackoffRetryPolicy(MaxRetriesRetryPolicy):
+    """
+    Повтор только 429, 5xx, таймаутов и сетевых ошибок.
+    Задержка - full jitter: random(0, min(max_delay, base_delay * 2 ** (retry - 1))), но не меньше Retry-After.
+    Если Retry-After больше max_delay или бюджет повторов исчерпан, ошибка отдается сразу
+    """
+
+    exceptions_to_catch = (asyncio.TimeoutError, RequestError, httpx.TransportError)
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 10,
+        budget: RetryBudget | None = None,
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        super().__init__(max_retries)
+
+    @staticmethod
+    def is_retryable(exc: Exception) -> bool:
+        if isinstance(exc, RequestError):
+            return exc.status_code == 429 or exc.status_code >= 500
+        return True
+
+    async def before_next(self, context, retry: int, exc: Exception):
+        if not self.is_retryable(exc):
+            raise exc
+        if retry > self.max_retries:
+            # исходная ошибка, чтобы ее статус дошел до клиента API
+            logger.error("Max retries %s for failed %s", self.max_retries, context)
+            raise exc
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+        if isinstance(exc, RequestError):
+            retry_after = parse_retry_after(exc.headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > self.max_delay:
+                    raise exc
+                delay = max(delay, retry_after)
+
+        if self.budget and not self.budget.try_acquire():
+            logger.warning("Retry budget exhausted, not retrying %s", context)
+            raise exc
+        await asyncio.sleep(delay)
+
+
 async def retry(policy: ABCRetryPolicy, func, *args, **kwargs):
     _retry = 0
     while True:
@@ -78,6 +173,7 @@ async def retry(policy: ABCRetryPolicy, func, *args, **kwargs):
         except policy.exceptions_to_catch as e:
             _retry += 1
             await policy.before_next((args, kwargs), _retry, e)
+            request_retries.inc()
 
 
 class CanRetryProtocol(Protocol):
@@ -0,0 +1,36 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+
+class SingleFlight[V]:
+    """
+    Объединяет одновременные вызовы с одинаковым ключом: выполняется один, остальные ждут его результат.
+    Ошибка тоже получают все ожидающие
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls: dict[Hashable, asyncio.Task[V]] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[V]]) -> V:
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # отдельная задача, чтобы отмена первого вызывающего не отменяла запрос остальным
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable) -> None:
+        """Следующий вызов с этим ключом выполнится заново, даже если текущий еще не завершен"""
+        self._calls.pop(key, None)
+
+    def is_current(self, key: Hashable) -> bool:
+        """Вызывается внутри func: False, если ключ сбросили через forget, пока func выполнялась"""
+        return self._calls.get(key) is asyncio.current_task()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
@@ -0,0 +1,232 @@
+"""
+Легковесная трассировка: спаны в contextvars, экспорт пачками в формате OTLP/JSON в файл (JSON lines)
+и/или на OTLP/HTTP коллектор (например http://collector:4318/v1/traces)
+"""
+
+import asyncio
+import json
+import logging
+import random
+import secrets
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from config import settings
+
+from .http import get_http_client
+from .request_context import request_id_var
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    sampled: bool
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    status: int = STATUS_OK
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}} for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """W3C traceparent: 00-<trace_id>-<parent_id>-<flags>"""
+    if not value:
+        return None
+    parts = value.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+@contextmanager
+def start_span(name: str, parent: tuple[str, str, bool] | None = None, **attributes: Any) -> Iterator[Span | None]:
+    """
+    Спан вложен в текущий. Для корневого решение о сэмплировании принимается по TRACING_SAMPLE_RATE,
+    parent - (trace_id, span_id, sampled) из входящего traceparent
+    """
+    if not settings.TRACING_ENABLED:
+        yield None
+        return
+
+    current = current_span.get()
+    if current is not None:
+        trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+    elif parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id, sampled = uuid4().hex, None, random.random() < settings.TRACING_SAMPLE_RATE
+
+    span = Span(name, trace_id, secrets.token_hex(8), parent_id, sampled, attributes)
+    if request_id := request_id_var.get():
+        span.attributes["request.id"] = request_id
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = STATUS_ERROR
+        span.attributes["exception.type"] = type(e).__name__
+        raise
+    finally:
+        current_span.reset(token)
+        span.end_ns = time.time_ns()
+        if span.sampled and _exporter is not None:
+            _exporter.export(span)
+
+
+def propagation_headers() -> dict[str, str]:
+    """Заголовки для запросов в апстрим: request id и traceparent текущего спана"""
+    headers = {}
+    if request_id := request_id_var.get():
+        headers["X-Request-ID"] = request_id
+    if span := current_span.get():
+        headers["traceparent"] = span.traceparent
+    return headers
+
+
+class SpanExporter:
+    def __init__(
+        self,
+        path: str | None,
+        endpoint: str | None,
+        service_name: str,
+        interval: float = 5,
+        max_buffer: int = 10_000,
+    ):
+        self.path = Path(path) if path else None
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.interval = interval
+        self.dropped = 0
+        self._spans: deque[Span] = deque()
+        self._max_buffer = max_buffer
+        self._task: asyncio.Task | None = None
+
+    def export(self, span: Span) -> None:
+        if len(self._spans) >= self._max_buffer:
+            self.dropped += 1
+            return
+        self._spans.append(span)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self._spans:
+            return
+        spans = [self._spans.popleft() for _ in range(len(self._spans))]
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}],
+                    },
+                    "scopeSpans": [{"scope": {"name": self.service_name}, "spans": [s.to_otlp() for s in spans]}],
+                }
+            ]
+        }
+        try:
+            if self.path:
+                await asyncio.to_thread(self._write, json.dumps(payload))
+            if self.endpoint:
+                res = await get_http_client().post(self.endpoint, json=payload)
+                res.raise_for_status()
+        except Exception:
+            logger.exception("Failed to export %s spans", len(spans))
+
+    def _write(self, line: str) -> None:
+        with self.path.open("a") as f:  # pyrefly: ignore
+            f.write(line + "\n")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+_exporter: SpanExporter | None = None
+
+
+def set_exporter(exporter: SpanExporter | None) -> None:
+    global _exporter
+    _exporter = exporter
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: request id из X-Request-ID (или новый) и корневой спан на весь запрос,
+    продолжает входящий traceparent. Request id возвращается в заголовке ответа
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        request_id = headers.get("x-request-id") or uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+                if span is not None:
+                    span.attributes["http.status_code"] = message["status"]
+            await send(message)
+
+        try:
+            with start_span(
+                f"{scope['method']} {scope['path']}",
+                parent=parse_traceparent(headers.get("traceparent")),
+                **{"http.method": scope["method"], "http.target": scope["path"]},
+            ) as span:
+                await self.app(scope, receive, send_wrapper)
+                if span is not None and (route := scope.get("route")) is not None:
+                    span.name = f"{scope['method']} {route.path}"
+        finally:
+            request_id_var.reset(token)